@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""Micro-benchmark for the cutoff line classifier
+
+Extracts the text of a cutoff PDF once, then times the legacy
+string-pattern ``_parse_text`` against the precompiled single-pass
+classifier and reports lines per second for each.
+
+Usage: python benchmarks/bench_parse_text.py [pdf_path] [repeat]
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kcet_project.settings')
+
+import django
+django.setup()
+
+import pdfplumber
+
+from cutoff.utils.pdf_parser import PDFParser, CATEGORY_DESCRIPTIONS
+
+
+def legacy_parse_text(text):
+    """The classifier as it was before patterns were precompiled"""
+    parsed_rows = []
+    lines = text.split('\n')
+    current_college_code = None
+    current_college_name = None
+
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line or len(line) < 3:
+            continue
+
+        college_match = re.search(r'E\d{3}\s+(.+?)(?:\s+\(|$)', line)
+        if college_match and re.search(r'E\d{3}', line):
+            current_college_code = re.search(r'E\d{3}', line).group()
+            college_name = college_match.group(1).strip()
+            college_name = re.sub(r'\s*\(.*?\)\s*', ' ', college_name).strip()
+            current_college_name = college_name
+            continue
+
+        if re.search(r'\b[0-9]G\s+[0-9]K\s+[0-9]R\b', line):
+            continue
+
+        branch_match = re.match(r'^([A-Z]{2})\s+([A-Za-z\s\.\-]+?)\s+(\d.*)$', line)
+        if branch_match and current_college_code:
+            branch_name = branch_match.group(2).strip()
+            ranks_part = branch_match.group(3)
+            if i + 1 < len(lines):
+                next_line = lines[i + 1].strip()
+                if next_line and not re.search(r'\d', next_line) and len(next_line) < 50:
+                    branch_name += " " + next_line
+                    lines[i + 1] = ''
+
+            rank_parts = re.findall(r'--|-|\d+', ranks_part)
+            categories = ['1G', '1K', '1R', '2AG', '2AK', '2AR', '2BG', '2BK', '2BR', '3AG', '3AK', '3AR', '3BG', '3BK', '3BR', '4G', '4K', '4R', 'STG', 'STK', 'STR']
+            for idx, cat_code in enumerate(categories):
+                rank_value = None
+                if idx < len(rank_parts):
+                    part = rank_parts[idx]
+                    if part and part not in ['-', '--']:
+                        rank_value = part
+                parsed_rows.append({
+                    'college_code': current_college_code,
+                    'college_name': current_college_name,
+                    'branch_name': branch_name,
+                    'category_code': cat_code,
+                    'category_description': CATEGORY_DESCRIPTIONS.get(cat_code, cat_code),
+                    'cutoff_rank': rank_value,
+                    'page_num': 0
+                })
+
+    college_codes = set(re.findall(r'E\d{3}', text))
+    return parsed_rows, college_codes
+
+
+def current_parse_text(text):
+    parser = PDFParser(None)
+    rows = parser._parse_text(text)
+    return rows, None
+
+
+def bench(name, func, text, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows, _ = func(text)
+        best = min(best, time.perf_counter() - start)
+    lines = text.count('\n') + 1
+    print(f'{name:<10} {best * 1000:8.1f} ms  {lines / best:12,.0f} lines/s  {len(rows):7} rows')
+    return rows
+
+
+def main():
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else 'media/uploads/KCET-Round-2-Cutoff.pdf'
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    print(f'Extracting text from {pdf_path} ...')
+    with pdfplumber.open(pdf_path) as pdf:
+        text = ''.join((page.extract_text() or '') + '\n' for page in pdf.pages)
+    print(f'{text.count(chr(10)) + 1} lines, best of {repeat} runs\n')
+
+    before = bench('before', legacy_parse_text, text, repeat)
+    after = bench('after', current_parse_text, text, repeat)
+    # Parser version 2 keeps leading '--' ranks out of branch names, so those rows differ by design
+    changed = sum(a != {k: v for k, v in b.items() if k != 'branch_code'} for a, b in zip(before, after))
+    print(f'\nSame row count: {len(before) == len(after)}, rows changed since the legacy classifier: {changed}')
+
+
+if __name__ == '__main__':
+    main()
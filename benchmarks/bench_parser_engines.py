@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""Speed and accuracy of the two PDFParser engines
+
+Parses each cutoff PDF with the ``text`` engine (``extract_text()`` and
+line regexes) and the ``words`` engine (word coordinates and header
+columns), then reports pages per second and how the outputs compare:
+branch lines found, ranks with more than six digits (cells glued together
+and shifted into the wrong category) and, for branch lines both engines
+found, how many cells agree position by position.
+
+Usage: python benchmarks/bench_parser_engines.py [pdf_path ...] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kcet_project.settings')
+
+import django
+django.setup()
+
+from cutoff.utils.pdf_parser import PARSER_ENGINES, PDFParser
+
+# No KCET rank has more than six digits; longer values are adjacent cells run together
+MAX_RANK_DIGITS = 6
+
+
+def branch_lines(rows):
+    """``(college_code, branch_code, branch_name) -> [rank, ...]`` in column order"""
+    lines = OrderedDict()
+    for row in rows:
+        lines.setdefault((row['college_code'], row['branch_code'], row['branch_name']), []).append(row['cutoff_rank'])
+    return lines
+
+
+def run(path, engine, workers):
+    parser = PDFParser(path, workers=workers, engine=engine)
+    start = time.perf_counter()
+    rows = list(parser.iter_rows())
+    elapsed = time.perf_counter() - start
+    lines = branch_lines(rows)
+    glued = sum(1 for row in rows if row['cutoff_rank'] and len(row['cutoff_rank']) > MAX_RANK_DIGITS)
+    print(f'{engine:<6} {elapsed:7.1f} s  {parser.pages_total / elapsed:6.1f} pages/s  '
+          f'{len(rows):7} rows  {len(lines):5} branch lines  {glued:5} glued ranks')
+    return lines
+
+
+def compare(text_lines, word_lines):
+    shared = [key for key in text_lines if key in word_lines]
+    cells = agree = differing_lines = 0
+    for key in shared:
+        pairs = list(zip(text_lines[key], word_lines[key]))
+        matches = sum(a == b for a, b in pairs)
+        cells += len(pairs)
+        agree += matches
+        differing_lines += matches < len(pairs)
+    print(f'\nBranch lines found by both: {len(shared)} '
+          f'(text only: {len(text_lines) - len(shared)}, words only: {len(word_lines) - len(shared)})')
+    if cells:
+        print(f'Cells agreeing by position: {agree}/{cells} ({agree / cells:.1%}), '
+              f'lines with a difference: {differing_lines}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('paths', nargs='*', default=['media/uploads/KCET-Round-2-Cutoff.pdf'])
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    for path in args.paths:
+        print(f'{path}  (workers={args.workers})')
+        results = {engine: run(path, engine, args.workers) for engine in PARSER_ENGINES}
+        compare(results['text'], results['words'])
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""Benchmark rank-range queries on Cutoff
+
+Builds a throwaway test database holding one synthetic year/round of
+cutoffs, then compares "every branch whose closing rank is at or above R"
+on the string ``cutoff_rank`` column against the indexed numeric
+``closing_rank`` column. Prints timings and SQLite's query plans.
+
+Usage: python benchmarks/bench_rank_queries.py [colleges] [branches_per_college]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kcet_project.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from cutoff.models import College, Branch, Category, Year, Round, Cutoff
+from cutoff.utils.pdf_parser import CATEGORY_CODES, CATEGORY_DESCRIPTIONS
+
+
+def populate(colleges, branches_per_college):
+    year = Year.objects.create(year=2023)
+    round_obj = Round.objects.create(name='Round 2', round_number=2)
+    College.objects.bulk_create([College(name=f'College {i}', city='Bench') for i in range(colleges)])
+    college_ids = list(College.objects.values_list('id', flat=True))
+    Branch.objects.bulk_create([Branch(code=f'B{b}', name=f'Branch {b}') for b in range(branches_per_college)])
+    branch_ids = list(Branch.objects.values_list('id', flat=True))
+    Category.objects.bulk_create([Category(code=c, description=CATEGORY_DESCRIPTIONS[c]) for c in CATEGORY_CODES])
+    category_ids = list(Category.objects.values_list('id', flat=True))
+
+    rng = random.Random(42)
+    batch = []
+    for college_id, branch_id in ((c, b) for c in college_ids for b in branch_ids):
+        for category_id in category_ids:
+            rank = rng.randint(1, 250000) if rng.random() > 0.3 else None
+            batch.append(Cutoff(
+                college_id=college_id, branch_id=branch_id, category_id=category_id,
+                year=year, round=round_obj, cutoff_rank=None if rank is None else str(rank), closing_rank=rank,
+            ))
+            if len(batch) >= 5000:
+                Cutoff.objects.bulk_create(batch)
+                batch = []
+    Cutoff.objects.bulk_create(batch)
+    return year, round_obj, category_ids[0]
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def run_sql(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def bench(name, sql, params, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = run_sql(sql, params)
+        best = min(best, time.perf_counter() - start)
+    print(f'\n{name}: {best * 1000:.2f} ms, {len(rows)} rows')
+    for line in explain(sql, params):
+        print(f'    {line}')
+    return rows
+
+
+def main():
+    colleges = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    branches = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f'Populating {colleges} colleges x {branches} branches x {len(CATEGORY_CODES)} categories ...')
+        year, round_obj, category_id = populate(colleges, branches)
+        print(f'{Cutoff.objects.count()} cutoffs')
+
+        my_rank = 50000
+        params = [year.id, round_obj.id, category_id, my_rank]
+
+        # Before: no index on (year, round, category) and only the string column,
+        # which has to be cast per row and sorts lexicographically
+        before = bench(
+            'before: cutoff_rank CharField, table scan',
+            'SELECT college_id, branch_id, cutoff_rank FROM cutoff_cutoff NOT INDEXED '
+            'WHERE year_id = %s AND round_id = %s AND category_id = %s '
+            'AND CAST(cutoff_rank AS INTEGER) >= %s ORDER BY cutoff_rank',
+            params,
+        )
+
+        queryset = Cutoff.objects.filter(
+            year=year, round=round_obj, category_id=category_id, closing_rank__gte=my_rank
+        ).order_by('closing_rank').values_list('college_id', 'branch_id', 'closing_rank')
+        sql, orm_params = queryset.query.sql_with_params()
+        after = bench('after: closing_rank via cutoff_rank_range_idx', sql, list(orm_params))
+
+        print('\nSame rows:', sorted((c, b, int(r)) for c, b, r in before) == sorted(after))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
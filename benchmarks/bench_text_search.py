@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""Benchmark college/branch typeahead search
+
+Builds a throwaway test database with synthetic colleges offering branches
+from a shared catalogue, then times ``name__icontains`` queries against lookups in the
+in-memory trigram ``SearchIndex``.
+
+Usage: python benchmarks/bench_text_search.py [colleges] [branches_per_college]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kcet_project.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from cutoff.models import College, Branch, Category, Year, Round, Cutoff
+from cutoff.utils.text_search import SearchIndex
+
+
+CITIES = ['Bangalore', 'Mysore', 'Mangalore', 'Hubli', 'Belgaum', 'Tumkur', 'Davangere', 'Shimoga', 'Hassan', 'Mandya']
+COLLEGE_WORDS = ['Institute', 'College', 'Engineering', 'Technology', 'Management', 'Science', 'Rural', 'Global',
+                 'National', 'City', 'Sri', 'Vidya', 'Sagar', 'Memorial', 'Academy', 'Research']
+BRANCHES = ['Computer Science', 'Comp. Sc. Engg', 'Information Science', 'Electronics and Communication',
+            'Electrical & Electronics', 'Mechanical', 'Civil', 'Artificial Intelligence', 'Data Science',
+            'Aeronautical Engg', 'Automobile', 'Bio Technology', 'Chemical', 'Industrial Engg', 'Robotics',
+            'Cyber Security', 'Instrumentation', 'Mining', 'Textile', 'Architecture']
+QUERIES = ['comp', 'computer sci', 'bangalore', 'vidya inst', 'mech', 'artificial intel', 'cyber', 'xyzzy']
+
+
+def populate(colleges, branches_per_college):
+    rng = random.Random(7)
+    names = set()
+    while len(names) < colleges:
+        initials = ' '.join(rng.choice('ABCDEKMNPRSV') for _ in range(rng.randint(0, 3)))
+        words = ' '.join(rng.sample(COLLEGE_WORDS, 3))
+        names.add(f'{initials} {words} {rng.randint(1, 999)}'.strip())
+    College.objects.bulk_create([College(name=n, city=rng.choice(CITIES)) for n in names])
+    Branch.objects.bulk_create([
+        Branch(code=f'{i:02d}', name=f'{b}{"" if i < len(BRANCHES) else f" {i}"}')
+        for i, b in enumerate(BRANCHES * 3)
+    ])
+    year = Year.objects.create(year=2023)
+    round_obj = Round.objects.create(name='Round 2', round_number=2)
+    category = Category.objects.create(code='GM', description='General Merit')
+    branch_ids = list(Branch.objects.values_list('id', flat=True))
+    Cutoff.objects.bulk_create([
+        Cutoff(college_id=c, branch_id=b, category=category, year=year, round=round_obj)
+        for c in College.objects.values_list('id', flat=True)
+        for b in rng.sample(branch_ids, min(branches_per_college, len(branch_ids)))
+    ], batch_size=5000)
+
+
+def best_of(func, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    colleges = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    branches = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        populate(colleges, branches)
+        print(f'{College.objects.count()} colleges, {Branch.objects.count()} branches, '
+              f'{Cutoff.objects.count()} college/branch pairs')
+        build_ms, index = best_of(SearchIndex.build, repeat=3)
+        print(f'index build: {build_ms:.1f} ms, {len(index.keys)} distinct texts\n')
+
+        print(f'{"query":<20}{"icontains":>12}{"index":>10}  top hit')
+        for query in QUERIES:
+            icontains_ms, _ = best_of(lambda: (
+                list(College.objects.filter(Q(name__icontains=query) | Q(city__icontains=query))[:10]),
+                list(Cutoff.objects.filter(branch__name__icontains=query).values('college__name', 'branch__name')
+                     .distinct()[:10]),
+            ))
+            index_ms, results = best_of(lambda: index.search(query, limit=10))
+            top = results[0]['name'] if results else '-'
+            print(f'{query:<20}{icontains_ms:>10.2f}ms{index_ms:>8.2f}ms  {top}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
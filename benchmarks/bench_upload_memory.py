@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""Peak memory of parsing an upload from memory versus from its file on disk
+
+Builds a large cutoff PDF by repeating the pages of a sample one (about
+the 50 MB upload limit by default), then parses its first pages in fresh
+processes, once handing PDFParser the bytes (how uploads used to be
+handled: ``read()`` into ``BytesIO``) and once the path of the file on
+disk. Reports the peak RSS of each run, including pool workers. Workers
+extract their whole slice of pages, so use fewer ``--copies`` with
+``--workers``.
+
+Usage: python benchmarks/bench_upload_memory.py [pdf_path] [--copies N] [--pages N] [--workers N]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kcet_project.settings')
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process and of its largest child, in MB (ru_maxrss is KB on Linux)"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / 1024, children / 1024
+
+
+def child(mode: str, path: str, pages: int, workers: int):
+    import django
+    django.setup()
+
+    from cutoff.utils.pdf_parser import PDFParser
+
+    if mode == 'bytes':
+        with open(path, 'rb') as f:
+            pdf_file = BytesIO(f.read())
+    else:
+        pdf_file = path
+    parser = PDFParser(pdf_file, workers=workers)
+    page_iter = parser.iter_pages()
+    for page_num, _ in page_iter:
+        if page_num >= pages:
+            break
+    page_iter.close()
+    own, children = peak_rss_mb()
+    print(f'{own:.1f} {children:.1f}')
+
+
+def build_pdf(source: str, copies: int) -> str:
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for _ in range(copies):
+        writer.append(PdfReader(source))
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    with os.fdopen(fd, 'wb') as f:
+        writer.write(f)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('pdf', nargs='?', default=os.path.join(ROOT, 'media/uploads/KCET-Round-2-Cutoff.pdf'))
+    parser.add_argument('--copies', type=int, default=68, help='Times the sample is repeated')
+    parser.add_argument('--pages', type=int, default=3, help='Pages parsed per run')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--child', choices=['bytes', 'path'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.pdf, args.pages, args.workers)
+        return
+
+    print(f'Building a PDF from {args.copies} copies of {args.pdf} ...')
+    path = build_pdf(args.pdf, args.copies)
+    try:
+        print(f'{os.path.getsize(path) / (1024 * 1024):.1f} MB, parsing {args.pages} page(s) with {args.workers} worker(s)\n')
+        for mode in ('bytes', 'path'):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), path, '--child', mode,
+                 '--pages', str(args.pages), '--workers', str(args.workers)],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            own, children = float(out[-2]), float(out[-1])
+            workers = f'  worker peak {children:7.1f} MB' if args.workers > 1 else ''
+            print(f'{mode:<6} peak RSS {own:7.1f} MB{workers}')
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
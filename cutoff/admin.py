@@ -1,19 +1,29 @@
 from django.contrib import admin
-from .models import College, Branch, Category, Year, Round, Cutoff, PYQ, CutoffUploadLog
+from .models import College, Branch, BranchAlias, Category, Year, Round, Cutoff, PYQ, CutoffUploadLog
+from .utils import stats
+from .utils.data_version import bump_on_commit
 
 
 @admin.register(College)
 class CollegeAdmin(admin.ModelAdmin):
-    list_display = ['name', 'city', 'created_at']
-    search_fields = ['name', 'city']
+    list_display = ['code', 'name', 'city', 'created_at']
+    search_fields = ['code', 'name', 'city']
     ordering = ['name']
 
 
+class BranchAliasInline(admin.TabularInline):
+    model = BranchAlias
+    fields = ['name', 'key']
+    readonly_fields = ['key']
+    extra = 0
+
+
 @admin.register(Branch)
 class BranchAdmin(admin.ModelAdmin):
     list_display = ['name', 'code', 'created_at']
-    search_fields = ['name', 'code']
+    search_fields = ['name', 'code', 'aliases__name']
     ordering = ['name']
+    inlines = [BranchAliasInline]
 
 
 @admin.register(Category)
@@ -41,9 +51,19 @@ class CutoffAdmin(admin.ModelAdmin):
     list_display = ['college', 'branch', 'category', 'year', 'round', 'cutoff_rank']
     list_filter = ['year', 'round', 'college', 'category']
     search_fields = ['college__name', 'branch__name', 'category__code']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['closing_rank', 'created_at', 'updated_at']
     ordering = ['-year', 'college', 'branch']
 
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_on_commit()
+        stats.recompute_on_commit()
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        bump_on_commit()
+        stats.recompute_on_commit()
+
 
 @admin.register(PYQ)
 class PYQAdmin(admin.ModelAdmin):
@@ -56,8 +76,8 @@ class PYQAdmin(admin.ModelAdmin):
 
 @admin.register(CutoffUploadLog)
 class CutoffUploadLogAdmin(admin.ModelAdmin):
-    list_display = ['id', 'status', 'total_rows', 'inserted_count', 'updated_count', 'uploaded_by', 'created_at']
-    list_filter = ['status', 'created_at']
-    search_fields = ['uploaded_by__username']
-    readonly_fields = ['uploaded_file', 'status', 'total_rows', 'inserted_count', 'updated_count', 'error_message', 'uploaded_by', 'created_at']
+    list_display = ['id', 'status', 'state', 'mode', 'year', 'round', 'total_rows', 'inserted_count', 'updated_count', 'unchanged_count', 'deleted_count', 'metrics_summary', 'uploaded_by', 'created_at']
+    list_filter = ['status', 'state', 'mode', 'created_at']
+    search_fields = ['uploaded_by__username', 'content_hash']
+    readonly_fields = ['uploaded_file', 'content_hash', 'year', 'round', 'status', 'state', 'pages_total', 'pages_done', 'rows_written', 'total_rows', 'inserted_count', 'updated_count', 'mode', 'delete_missing', 'unchanged_count', 'deleted_count', 'change_set', 'metrics', 'error_message', 'uploaded_by', 'created_at', 'started_at', 'finished_at']
     ordering = ['-created_at']
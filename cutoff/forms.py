@@ -1,5 +1,5 @@
 from django import forms
-from .models import PYQ
+from .models import PYQ, CutoffUploadLog
 
 
 class PDFUploadForm(forms.Form):
@@ -12,6 +12,16 @@ class PDFUploadForm(forms.Form):
             'required': 'required'
         })
     )
+    mode = forms.ChoiceField(
+        choices=CutoffUploadLog.MODE_CHOICES,
+        initial='upsert',
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    delete_missing = forms.BooleanField(
+        label='Delete cutoffs the PDF no longer lists (changes-only mode)',
+        required=False
+    )
 
     def clean_pdf_file(self):
         file = self.cleaned_data['pdf_file']
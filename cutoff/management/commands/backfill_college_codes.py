@@ -0,0 +1,80 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cutoff.models import College, CutoffUploadLog
+from cutoff.utils import parse_cache
+from cutoff.utils.data_version import bump_on_commit
+from cutoff.utils.pdf_parser import PDFParser
+
+
+class Command(BaseCommand):
+    help = (
+        'Attach E-codes to colleges saved before codes were stored, by re-parsing stored uploads '
+        '(parse cache first) and matching colleges by name'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without saving')
+
+    def handle(self, *args, **options):
+        pending = dict(College.objects.filter(code='').values_list('name', 'id'))
+        if not pending:
+            self.stdout.write('Every college already has a code')
+            return
+
+        codes_by_name = {}
+        for code, name in self.uploaded_colleges():
+            codes_by_name.setdefault(name, set()).add(code)
+
+        taken = set(College.objects.exclude(code='').values_list('code', flat=True))
+        updates = []
+        for name, pk in sorted(pending.items()):
+            codes = sorted(codes_by_name.get(name, set()) - taken)
+            if not codes:
+                continue
+            if len(codes) > 1:
+                # Older ingests merged these codes into one college; the others get their own on next ingest
+                self.stdout.write(self.style.WARNING(f'{name}: listed as {", ".join(codes)}; using {codes[0]}'))
+            taken.add(codes[0])
+            updates.append(College(id=pk, code=codes[0]))
+
+        if not options['dry_run'] and updates:
+            with transaction.atomic():
+                College.objects.bulk_update(updates, ['code'], batch_size=500)
+                bump_on_commit()
+        verb = 'Would attach' if options['dry_run'] else 'Attached'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} codes to {len(updates)} of {len(pending)} colleges without one'
+        ))
+
+    def uploaded_colleges(self):
+        """``(code, name)`` pairs from every distinct stored upload"""
+        seen = set()
+        for log in CutoffUploadLog.objects.exclude(uploaded_file='').exclude(status='failed').order_by('created_at'):
+            key = log.content_hash or log.uploaded_file.name
+            if key in seen:
+                continue
+            seen.add(key)
+
+            cached = parse_cache.load(log.content_hash)
+            if cached is not None:
+                yield from cached.rows.colleges.values
+                continue
+            if not log.uploaded_file.storage.exists(log.uploaded_file.name):
+                self.stdout.write(self.style.WARNING(f'Upload #{log.id}: {log.uploaded_file.name} is missing'))
+                continue
+
+            self.stdout.write(f'Parsing upload #{log.id} ({log.uploaded_file.name}) ...')
+            with log.uploaded_file.open('rb') as f:
+                parser = PDFParser(f)
+                success, result = parser.parse()
+            if not success:
+                self.stdout.write(self.style.WARNING(f'Upload #{log.id}: {"; ".join(result["errors"])}'))
+                continue
+            rows = result['extracted_data']
+            if log.content_hash:
+                try:
+                    parse_cache.store(log.content_hash, rows, parser.colleges_found, parser.pages_total)
+                except OSError:
+                    pass
+            yield from rows.colleges.values
@@ -0,0 +1,59 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cutoff.utils.export import EXPORT_CHUNK_SIZE, FORMATS, WRITERS, export_rows
+
+
+class Command(BaseCommand):
+    help = 'Export cutoffs (joined with college/branch/category/year/round) to CSV, XLSX or Parquet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='File to write; the format is taken from its extension unless --format is given')
+        parser.add_argument('--format', choices=sorted(FORMATS), help='Output format')
+        parser.add_argument('--year', type=int, help='Only this year (e.g. 2023)')
+        parser.add_argument('--round', type=int, dest='round_number', help='Only this round number')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        export_format = options['format'] or os.path.splitext(output)[1].lstrip('.').lower()
+        if export_format not in FORMATS:
+            raise CommandError(f'Unknown format "{export_format}"; use --format {"/".join(sorted(FORMATS))}')
+
+        filters = {}
+        if options['year']:
+            filters['year__year'] = options['year']
+        if options['round_number']:
+            filters['round__round_number'] = options['round_number']
+
+        counted = _Counter(export_rows(filters, chunk_size=options['chunk_size']))
+        start = time.perf_counter()
+        try:
+            if export_format == 'csv':
+                with open(output, 'w', newline='', encoding='utf-8') as f:
+                    WRITERS['csv'](counted, f)
+            else:
+                with open(output, 'wb') as f:
+                    WRITERS[export_format](counted, f)
+        except ImportError as e:
+            raise CommandError(f'{export_format} export needs an optional dependency: {e}')
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {counted.count} cutoffs to {output} in {elapsed:.1f}s'
+        ))
+
+
+class _Counter:
+    """Iterator wrapper that counts the rows passing through it"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.count += 1
+            yield row
@@ -0,0 +1,132 @@
+import fnmatch
+import glob
+import os
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cutoff.models import Year, Round
+from cutoff.utils.bulk_import import import_pdfs
+
+
+DEFAULT_PATTERN = r'(?P<year>(?:19|20)\d{2}).*?round[-_ ]*(?P<round>\d+)'
+
+
+class Command(BaseCommand):
+    help = 'Parse a directory (or glob) of cutoff PDFs in parallel and save them with a single writer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='PDF files, directories or glob patterns')
+        parser.add_argument('--year', type=int, help='Year for files not matched by --map/--pattern')
+        parser.add_argument('--round', type=int, dest='round_number', help='Round number for files not matched by --map/--pattern')
+        parser.add_argument(
+            '--map', action='append', default=[], metavar='GLOB=YEAR:ROUND',
+            help='Year/round for file names matching GLOB (repeatable), e.g. "*2019*r1*=2019:1"'
+        )
+        parser.add_argument(
+            '--pattern', default=DEFAULT_PATTERN,
+            help='Regex with "year" and "round" groups matched against file names (case-insensitive)'
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parser processes')
+        parser.add_argument('--force', action='store_true', help='Re-import files already imported for their year/round')
+        parser.add_argument('--diff', action='store_true', help='Write only cutoffs that are new or whose rank changed')
+        parser.add_argument(
+            '--delete-missing', action='store_true',
+            help='With --diff, delete cutoffs of the imported colleges that a file no longer lists'
+        )
+
+    def handle(self, *args, **options):
+        files = self.collect_files(options['paths'])
+        if not files:
+            raise CommandError('No PDF files found')
+
+        mappings = [self.parse_mapping(value) for value in options['map']]
+        pattern = re.compile(options['pattern'], re.IGNORECASE) if options['pattern'] else None
+
+        entries, unmapped = [], []
+        for path in files:
+            year_round = self.year_round_for(path, mappings, pattern, options['year'], options['round_number'])
+            if year_round is None:
+                unmapped.append(path)
+            else:
+                entries.append((path, *year_round))
+        for path in unmapped:
+            self.stdout.write(self.style.WARNING(f'Skipping {path}: no year/round (use --map or --year/--round)'))
+        if not entries:
+            raise CommandError('No files could be mapped to a year/round')
+        if options['delete_missing'] and not options['diff']:
+            raise CommandError('--delete-missing needs --diff')
+
+        self.stdout.write(f'Importing {len(entries)} file(s) with {options["workers"]} worker(s)...')
+        start = time.perf_counter()
+        results = import_pdfs(
+            self.resolve(entries), workers=options['workers'], force=options['force'], on_result=self.report,
+            diff=options['diff'], delete_missing=options['delete_missing'],
+        )
+        elapsed = time.perf_counter() - start
+
+        pages = sum(r.pages for r in results if r.log.status != 'skipped')
+        rows = sum(r.log.rows_written for r in results if r.log.status != 'skipped')
+        failed = sum(1 for r in results if r.log.status == 'failed')
+        summary = (
+            f'\n{len(results)} file(s), {pages} pages, {rows} rows in {elapsed:.1f}s '
+            f'({pages / elapsed if elapsed else 0:.1f} pages/s, {rows / elapsed if elapsed else 0:.0f} rows/s)'
+        )
+        self.stdout.write(self.style.SUCCESS(summary) if not failed else self.style.WARNING(f'{summary}, {failed} failed'))
+
+    def report(self, result):
+        log = result.log
+        style = self.style.SUCCESS if log.status == 'success' else self.style.WARNING
+        source = ' (cached parse)' if result.cached else (f' parsed in {result.parse_seconds:.1f}s' if result.pages else '')
+        detail = log.error_message if log.status in ('failed', 'skipped') else (
+            f'{log.pages_total} pages, inserted {log.inserted_count}, updated {log.updated_count}'
+            + (f', unchanged {log.unchanged_count}, deleted {log.deleted_count}' if log.mode == 'diff' else '')
+            + source
+        )
+        self.stdout.write(style(f'{os.path.basename(result.path)} -> {log.year}/{log.round}: {log.status} - {detail}'))
+
+    @staticmethod
+    def collect_files(paths):
+        files = []
+        for value in paths:
+            if os.path.isdir(value):
+                matches = glob.glob(os.path.join(value, '**', '*.pdf'), recursive=True)
+                matches += glob.glob(os.path.join(value, '**', '*.PDF'), recursive=True)
+            else:
+                matches = glob.glob(value) or ([value] if os.path.isfile(value) else [])
+            files.extend(os.path.abspath(m) for m in matches)
+        return sorted(set(files))
+
+    @staticmethod
+    def parse_mapping(value):
+        match = re.fullmatch(r'(.+)=(\d{4}):(\d+)', value)
+        if not match:
+            raise CommandError(f'Invalid --map "{value}", expected GLOB=YEAR:ROUND')
+        return match.group(1), int(match.group(2)), int(match.group(3))
+
+    @staticmethod
+    def year_round_for(path, mappings, pattern, default_year, default_round):
+        name = os.path.basename(path)
+        for file_glob, year, round_number in mappings:
+            if fnmatch.fnmatch(name.lower(), file_glob.lower()):
+                return year, round_number
+        if pattern is not None:
+            match = pattern.search(name)
+            if match:
+                return int(match.group('year')), int(match.group('round'))
+        if default_year and default_round:
+            return default_year, default_round
+        return None
+
+    @staticmethod
+    def resolve(entries):
+        """Swap year/round numbers for model instances, creating missing ones"""
+        years, rounds = {}, {}
+        for path, year, round_number in entries:
+            if year not in years:
+                years[year], _ = Year.objects.get_or_create(year=year)
+            if round_number not in rounds:
+                rounds[round_number] = Round.objects.filter(round_number=round_number).first() or \
+                    Round.objects.get_or_create(name=f'Round {round_number}', defaults={'round_number': round_number})[0]
+            yield path, years[year], rounds[round_number]
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cutoff.utils.page_cache import PageCache
+from cutoff.utils.pdf_parser import PARSER_VERSION
+
+
+def _mb(size: int) -> str:
+    return f'{size / (1024 * 1024):.1f} MB'
+
+
+class Command(BaseCommand):
+    help = 'Show the size of the page-level parse cache, or prune / clear it'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Drop pages of old parser versions, then least recently used pages down to the size bound'
+        )
+        parser.add_argument('--max-mb', type=float, help='Size bound for --prune (default CUTOFF_PAGE_CACHE_MAX_BYTES)')
+        parser.add_argument('--clear', action='store_true', help='Remove every cached page')
+
+    def handle(self, *args, **options):
+        cache = PageCache.from_settings()
+        if cache is None:
+            raise CommandError('The page cache is disabled (CUTOFF_PAGE_CACHE = False)')
+
+        if options['clear']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS('Page cache cleared'))
+            return
+
+        if options['prune']:
+            max_bytes = int(options['max_mb'] * 1024 * 1024) if options['max_mb'] is not None else None
+            removed, freed = cache.prune(max_bytes)
+            self.stdout.write(self.style.SUCCESS(f'Removed {removed} page(s), freed {_mb(freed)}'))
+
+        stats = cache.stats()
+        if not stats:
+            self.stdout.write(f'Page cache at {cache.root} is empty')
+            return
+        self.stdout.write(f'Page cache at {cache.root} (bound {_mb(cache.max_bytes)}):')
+        for generation, bucket in sorted(stats.items()):
+            stale = '' if generation.endswith(f'-v{PARSER_VERSION}') else '  (stale)'
+            self.stdout.write(f'  {generation:<12} {bucket["pages"]:7} pages  {_mb(bucket["bytes"]):>10}{stale}')
+        total = sum(bucket['bytes'] for bucket in stats.values())
+        self.stdout.write(f'  {"total":<12} {sum(b["pages"] for b in stats.values()):7} pages  {_mb(total):>10}')
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from cutoff.utils.jobs import fail_stale_jobs, process_next_job
+
+
+class Command(BaseCommand):
+    help = 'Run the background worker that parses and saves queued cutoff PDF uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue and exit instead of polling')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to wait between polls when idle')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Upload worker started'))
+        try:
+            while True:
+                # Every poll, so jobs of a worker that dies while this one runs are recovered too
+                stale = fail_stale_jobs()
+                if stale:
+                    self.stdout.write(self.style.WARNING(f'Failed {stale} upload(s) abandoned by a stopped worker'))
+                log = process_next_job()
+                if log is not None:
+                    style = self.style.SUCCESS if log.status == 'success' else self.style.WARNING
+                    self.stdout.write(style(
+                        f'Upload #{log.id}: {log.status} - rows {log.total_rows}, '
+                        f'inserted {log.inserted_count}, updated {log.updated_count}'
+                    ))
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write('Upload worker stopped')
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from cutoff.utils.stats import recompute
+from cutoff.utils.trends import refresh_all_trends
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the dashboard statistics and branch trend aggregates from the database (repairs any drift)'
+
+    def handle(self, *args, **options):
+        stats = recompute()
+        self.stdout.write(self.style.SUCCESS(
+            f'Stats rebuilt: {stats.total_colleges} colleges, {stats.total_branches} branches, '
+            f'{stats.total_categories} categories, {stats.total_cutoffs} cutoffs, {stats.total_pyqs} PYQs'
+        ))
+        trends = refresh_all_trends()
+        self.stdout.write(self.style.SUCCESS(f'Trend aggregates rebuilt: {trends} rows'))
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cutoff', '0002_alter_cutoff_unique_together_branch_college_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='pages_done',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='pages_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='round',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_logs', to='cutoff.round'),
+        ),
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='rows_written',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='state',
+            field=models.CharField(choices=[('queued', 'Queued'), ('parsing', 'Parsing'), ('saving', 'Saving'), ('done', 'Done')], db_index=True, default='done', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='year',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_logs', to='cutoff.year'),
+        ),
+        migrations.AlterField(
+            model_name='cutoffuploadlog',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('success', 'Success'), ('partial', 'Partial'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
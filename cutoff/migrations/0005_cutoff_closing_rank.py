@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-18 13:48
+
+from django.db import migrations, models
+
+
+def backfill_closing_rank(apps, schema_editor):
+    Cutoff = apps.get_model('cutoff', 'Cutoff')
+    batch = []
+    for pk, text in Cutoff.objects.exclude(cutoff_rank=None).values_list('id', 'cutoff_rank').iterator(chunk_size=5000):
+        text = text.strip()
+        if text.isdigit() and len(text) <= 18:
+            batch.append(Cutoff(id=pk, closing_rank=int(text)))
+        if len(batch) >= 5000:
+            Cutoff.objects.bulk_update(batch, ['closing_rank'])
+            batch = []
+    if batch:
+        Cutoff.objects.bulk_update(batch, ['closing_rank'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cutoff', '0004_upload_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cutoff',
+            name='closing_rank',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_closing_rank, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='cutoff',
+            index=models.Index(fields=['year', 'round', 'category', 'closing_rank'], name='cutoff_rank_range_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cutoff',
+            index=models.Index(fields=['college', 'branch', 'year', 'round'], name='cutoff_college_branch_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cutoff', '0005_cutoff_closing_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_colleges', models.IntegerField(default=0)),
+                ('total_branches', models.IntegerField(default=0)),
+                ('total_categories', models.IntegerField(default=0)),
+                ('total_cutoffs', models.IntegerField(default=0)),
+                ('total_pyqs', models.IntegerField(default=0)),
+                ('cutoffs_by_year_round', models.JSONField(blank=True, default=list)),
+                ('colleges_by_city', models.JSONField(blank=True, default=dict)),
+                ('last_ingest_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Dashboard stats',
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:03
+
+from statistics import median
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_branch_trends(apps, schema_editor):
+    Cutoff = apps.get_model('cutoff', 'Cutoff')
+    BranchTrend = apps.get_model('cutoff', 'BranchTrend')
+    groups = {}
+    rows = Cutoff.objects.exclude(closing_rank=None).order_by().values_list(
+        'branch__name', 'category_id', 'year_id', 'round_id', 'college_id', 'closing_rank'
+    )
+    for branch_name, category_id, year_id, round_id, college_id, rank in rows.iterator(chunk_size=5000):
+        ranks, colleges = groups.setdefault((branch_name, category_id, year_id, round_id), ([], set()))
+        ranks.append(rank)
+        colleges.add(college_id)
+    BranchTrend.objects.bulk_create(
+        [
+            BranchTrend(
+                branch_name=branch_name, category_id=category_id, year_id=year_id, round_id=round_id,
+                colleges=len(colleges), min_rank=min(ranks), median_rank=float(median(ranks)), max_rank=max(ranks),
+            )
+            for (branch_name, category_id, year_id, round_id), (ranks, colleges) in groups.items()
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cutoff', '0006_dashboard_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BranchTrend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('branch_name', models.CharField(max_length=255)),
+                ('colleges', models.IntegerField(default=0)),
+                ('min_rank', models.BigIntegerField()),
+                ('median_rank', models.FloatField()),
+                ('max_rank', models.BigIntegerField()),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='branch_trends', to='cutoff.category')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='branch_trends', to='cutoff.round')),
+                ('year', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='branch_trends', to='cutoff.year')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='branchtrend',
+            constraint=models.UniqueConstraint(fields=('branch_name', 'category', 'year', 'round'), name='unique_branch_trend'),
+        ),
+        migrations.RunPython(backfill_branch_trends, migrations.RunPython.noop),
+    ]
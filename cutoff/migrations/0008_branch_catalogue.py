@@ -0,0 +1,203 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:08
+
+from collections import Counter
+import re
+from statistics import median
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+CHUNK = 500
+
+# Frozen copy of cutoff.utils.branch_names as it was when this migration was
+# written, so later changes to the live table do not change what it does
+
+# Stand-alone '-'/'--' tokens are rank placeholders; parser version 1 glued
+# them onto branch names ("Civil -- -- --")
+DASH_TOKEN_RE = re.compile(r'(?:^|\s)--?(?=\s|$)')
+WHITESPACE_RE = re.compile(r'\s+')
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+# Abbreviations the PDFs use interchangeably with the full word
+ABBREVIATIONS = {
+    'engg': 'engineering', 'eng': 'engineering', 'sc': 'science', 'sci': 'science',
+    'comp': 'computer', 'tech': 'technology', 'mgmt': 'management', 'info': 'information',
+}
+
+# code -> (canonical name, other spellings seen in cutoff PDFs)
+KNOWN_BRANCHES = {
+    'AD': ('Artificial Intelligence and Data Science', ('Artificial Intel, Data Sc',)),
+    'AE': ('Aeronautical Engineering', ('Aeronaut.Engg',)),
+    'AI': ('Artificial Intelligence', ()),
+    'AT': ('Automotive Engineering', ('Automotive Engg.',)),
+    'AU': ('Automobile Engineering', ('Automobile',)),
+    'BM': ('Bio Medical Engineering', ('Bio Medical',)),
+    'BT': ('Bio Technology', ('Biotechnology',)),
+    'CB': ('Computer Science and Business Systems', ('Comp. Sc. and Bus Sys.',)),
+    'CD': ('Computer Science and Design', ('Computer Sc. and Design',)),
+    'CE': ('Civil Engineering', ('Civil',)),
+    'CH': ('Chemical Engineering', ('Chemical',)),
+    'CO': ('Computer Engineering', ()),
+    'CS': ('Computer Science and Engineering', ('Computers', 'Computer Science')),
+    'CV': ('Civil Environment Engineering', ('Civil Environment Engg',)),
+    'CY': ('Computer Science and Engineering (Cyber Security)', ('CS- Cyber Security', 'Cyber Security')),
+    'DS': ('Computer Science and Engineering (Data Science)', ('Comp. Sc. Engg- Data Sc.',)),
+    'EA': ('Agriculture Engineering', ()),
+    'EC': ('Electronics and Communication Engineering', ('Electronics',)),
+    'EE': ('Electrical and Electronics Engineering', ('Electrical',)),
+    'EI': ('Electronics and Instrumentation Engineering', ('Elec. Inst. Engg',)),
+    'ES': ('Electronics and Computer Engineering', ('Electronics and Computer',)),
+    'ET': ('Electronics and Telecommunication Engineering', ('Elec. Telecommn. Engg.',)),
+    'IE': ('Information Science and Engineering', ('Info.Science', 'Information Science')),
+    'IM': ('Industrial Engineering and Management', ('Ind. Engg. Mgmt.',)),
+    'IO': ('Computer Science and Engineering (Internet of Things)', ('CS- Internet of Things',)),
+    'IP': ('Industrial and Production Engineering', ('Ind.Prodn.',)),
+    'MD': ('Medical Electronics', ('Med.Elect.',)),
+    'ME': ('Mechanical Engineering', ('Mechanical',)),
+    'MT': ('Mechatronics', ()),
+    'RA': ('Robotics and Automation', ()),
+    'RI': ('Robotics and Artificial Intelligence', ('Robotics and AI',)),
+    'SE': ('Aerospace Engineering', ('Aero Space Engg.',)),
+    'TX': ('Textile Technology', ('Textiles',)),
+}
+
+
+def clean_branch_name(name):
+    """Display form of a printed branch name: rank placeholders dropped, whitespace collapsed"""
+    return WHITESPACE_RE.sub(' ', DASH_TOKEN_RE.sub(' ', name)).strip()
+
+
+def branch_key(name):
+    """Lookup key for a branch name: case, punctuation and common abbreviations folded"""
+    text = _NON_ALNUM_RE.sub(' ', clean_branch_name(name).lower().replace('&', ' and '))
+    return ' '.join(ABBREVIATIONS.get(word, word) for word in text.split())
+
+
+def seed_aliases():
+    """``branch_key`` -> code for every name in ``KNOWN_BRANCHES``; keys shared by two codes are left out"""
+    aliases = {}
+    ambiguous = set()
+    for code, (name, spellings) in KNOWN_BRANCHES.items():
+        for spelling in (name,) + spellings:
+            key = branch_key(spelling)
+            if aliases.get(key, code) != code:
+                ambiguous.add(key)
+            aliases[key] = code
+    for key in ambiguous:
+        del aliases[key]
+    return aliases
+
+
+def chunks(values):
+    values = list(values)
+    for i in range(0, len(values), CHUNK):
+        yield values[i:i + CHUNK]
+
+
+def merge_branches(apps, schema_editor):
+    """Collapse the per-college Branch rows into one catalogue row per code (or normalised name)
+
+    Cutoffs are repointed with one UPDATE per catalogue branch. Where a
+    college had the same branch under two spellings, only its most recently
+    updated cutoff per category/year/round is kept.
+    """
+    Branch = apps.get_model('cutoff', 'Branch')
+    BranchAlias = apps.get_model('cutoff', 'BranchAlias')
+    Cutoff = apps.get_model('cutoff', 'Cutoff')
+    seeds = seed_aliases()
+
+    groups = {}
+    for pk, college_id, code, name in Branch.objects.values_list('id', 'college_id', 'code', 'name'):
+        name = clean_branch_name(name)
+        key = branch_key(name)
+        code = code.strip().upper() or seeds.get(key, '')
+        group = groups.setdefault(code or key, {'code': code, 'names': Counter(), 'ids': {}})
+        group['names'][name] += 1
+        group['ids'].setdefault(college_id, []).append(pk)
+    if not groups:
+        return
+
+    aliases = {}
+    for group in groups.values():
+        code = group['code']
+        name = KNOWN_BRANCHES[code][0] if code in KNOWN_BRANCHES else group['names'].most_common(1)[0][0]
+        branch = Branch.objects.create(college=None, code=code, name=name)
+        old_ids = [pk for ids in group['ids'].values() for pk in ids]
+
+        # Same college, two old branches: drop all but one cutoff per key before repointing
+        shared = [pk for ids in group['ids'].values() if len(ids) > 1 for pk in ids]
+        seen, stale = set(), []
+        for ids in chunks(shared):
+            rows = Cutoff.objects.filter(branch_id__in=ids).order_by('-updated_at', '-id').values_list(
+                'id', 'college_id', 'category_id', 'year_id', 'round_id'
+            )
+            for pk, *key in rows:
+                if tuple(key) in seen:
+                    stale.append(pk)
+                seen.add(tuple(key))
+        for ids in chunks(stale):
+            Cutoff.objects.filter(id__in=ids).delete()
+        for ids in chunks(old_ids):
+            Cutoff.objects.filter(branch_id__in=ids).update(branch_id=branch.id)
+        for ids in chunks(old_ids):
+            Branch.objects.filter(id__in=ids).delete()
+
+        for spelling in [name] + list(group['names']):
+            aliases.setdefault(branch_key(spelling), BranchAlias(branch=branch, key=branch_key(spelling), name=spelling))
+
+    BranchAlias.objects.bulk_create([a for key, a in aliases.items() if key], batch_size=2000)
+
+    # Trend aggregates are keyed by branch name, which just changed
+    BranchTrend = apps.get_model('cutoff', 'BranchTrend')
+    BranchTrend.objects.all().delete()
+    backfill_branch_trends(apps, schema_editor)
+
+
+def backfill_branch_trends(apps, schema_editor):
+    """Copy of 0007's backfill: one trend row per branch name/category/year/round"""
+    Cutoff = apps.get_model('cutoff', 'Cutoff')
+    BranchTrend = apps.get_model('cutoff', 'BranchTrend')
+    groups = {}
+    rows = Cutoff.objects.exclude(closing_rank=None).order_by().values_list(
+        'branch__name', 'category_id', 'year_id', 'round_id', 'college_id', 'closing_rank'
+    )
+    for branch_name, category_id, year_id, round_id, college_id, rank in rows.iterator(chunk_size=5000):
+        ranks, colleges = groups.setdefault((branch_name, category_id, year_id, round_id), ([], set()))
+        ranks.append(rank)
+        colleges.add(college_id)
+    BranchTrend.objects.bulk_create(
+        [
+            BranchTrend(
+                branch_name=branch_name, category_id=category_id, year_id=year_id, round_id=round_id,
+                colleges=len(colleges), min_rank=min(ranks), median_rank=float(median(ranks)), max_rank=max(ranks),
+            )
+            for (branch_name, category_id, year_id, round_id), (ranks, colleges) in groups.items()
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cutoff', '0007_branch_trend'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BranchAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(editable=False, max_length=255, unique=True)),
+                ('name', models.CharField(max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='cutoff.branch')),
+            ],
+            options={
+                'verbose_name_plural': 'Branch aliases',
+                'ordering': ['key'],
+            },
+        ),
+        migrations.RunPython(merge_branches, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cutoff', '0008_branch_catalogue'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='branch',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='branch',
+            constraint=models.UniqueConstraint(condition=models.Q(('code', ''), _negated=True), fields=('code',), name='unique_branch_code'),
+        ),
+        migrations.RemoveField(
+            model_name='branch',
+            name='college',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cutoff', '0010_college_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='change_set',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='delete_missing',
+            field=models.BooleanField(default=False, help_text='Diff mode: delete cutoffs of the uploaded colleges that the PDF no longer lists'),
+        ),
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='deleted_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='mode',
+            field=models.CharField(choices=[('upsert', 'Write every row'), ('diff', 'Write changes only')], default='upsert', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='unchanged_count',
+            field=models.IntegerField(default=0),
+        ),
+    ]
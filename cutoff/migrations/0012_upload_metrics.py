@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cutoff', '0011_upload_change_set'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-18 16:02
+
+from statistics import median
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def clear_branch_trends(apps, schema_editor):
+    apps.get_model('cutoff', 'BranchTrend').objects.all().delete()
+
+
+def backfill_branch_trends(apps, schema_editor):
+    Cutoff = apps.get_model('cutoff', 'Cutoff')
+    BranchTrend = apps.get_model('cutoff', 'BranchTrend')
+    groups = {}
+    rows = Cutoff.objects.exclude(closing_rank=None).order_by().values_list(
+        'branch_id', 'category_id', 'year_id', 'round_id', 'college_id', 'closing_rank'
+    )
+    for branch_id, category_id, year_id, round_id, college_id, rank in rows.iterator(chunk_size=5000):
+        ranks, colleges = groups.setdefault((branch_id, category_id, year_id, round_id), ([], set()))
+        ranks.append(rank)
+        colleges.add(college_id)
+    BranchTrend.objects.bulk_create(
+        [
+            BranchTrend(
+                branch_id=branch_id, category_id=category_id, year_id=year_id, round_id=round_id,
+                colleges=len(colleges), min_rank=min(ranks), median_rank=float(median(ranks)), max_rank=max(ranks),
+            )
+            for (branch_id, category_id, year_id, round_id), (ranks, colleges) in groups.items()
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cutoff', '0012_upload_metrics'),
+    ]
+
+    operations = [
+        # Aggregates by name merge distinct catalogue branches; rebuilt per branch below
+        migrations.RunPython(clear_branch_trends, clear_branch_trends),
+        migrations.RemoveConstraint(
+            model_name='branchtrend',
+            name='unique_branch_trend',
+        ),
+        migrations.RemoveField(
+            model_name='branchtrend',
+            name='branch_name',
+        ),
+        migrations.AddField(
+            model_name='branchtrend',
+            name='branch',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='trends', to='cutoff.branch'),
+        ),
+        migrations.AlterField(
+            model_name='branchtrend',
+            name='branch',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trends', to='cutoff.branch'),
+        ),
+        migrations.AddConstraint(
+            model_name='branchtrend',
+            constraint=models.UniqueConstraint(fields=('branch', 'category', 'year', 'round'), name='unique_branch_trend'),
+        ),
+        migrations.RunPython(backfill_branch_trends, clear_branch_trends),
+    ]
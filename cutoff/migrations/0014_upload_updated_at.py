@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-18 17:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cutoff', '0013_branch_trend_by_branch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cutoffuploadlog',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+            preserve_default=False,
+        ),
+    ]
@@ -1,33 +1,70 @@
 from django.db import models
 from django.core.validators import FileExtensionValidator
 
+from .utils.branch_names import branch_key
+
 
 class College(models.Model):
-    name = models.CharField(max_length=255, unique=True)
+    """A college as KEA lists it, keyed by its ``E\\d{3}`` code.
+
+    Names are not unique: some institutions are listed under more than one
+    code with the same printed name.
+    """
+    code = models.CharField(max_length=10, blank=True)
+    name = models.CharField(max_length=255, db_index=True)
     city = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['code'], condition=~models.Q(code=''), name='unique_college_code'),
+        ]
 
     def __str__(self):
-        return self.name
+        return f"{self.code} - {self.name}" if self.code else self.name
 
 
 class Branch(models.Model):
-    college = models.ForeignKey(College, on_delete=models.CASCADE, related_name='branches', null=True, blank=True)
+    """A course in the canonical catalogue, shared by every college that offers it.
+
+    Keyed by the two-letter code the cutoff PDFs print before the name
+    (``CS``, ``EC``...); branches only ever seen without a code have a blank
+    ``code``. Which colleges offer a branch follows from their cutoffs.
+    """
     name = models.CharField(max_length=255)
     code = models.CharField(max_length=50, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = [['college', 'name']]
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['code'], condition=~models.Q(code=''), name='unique_branch_code'),
+        ]
+
+    def __str__(self):
+        return f"{self.code} - {self.name}" if self.code else self.name
+
+
+class BranchAlias(models.Model):
+    """A spelling of a branch name, stored under its ``branch_key``, that resolves to a catalogue branch"""
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='aliases')
+    key = models.CharField(max_length=255, unique=True, editable=False)
+    name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['key']
+        verbose_name_plural = 'Branch aliases'
 
     def __str__(self):
-        return f"{self.college} - {self.name}"
+        return f"{self.name} -> {self.branch}"
+
+    def save(self, *args, **kwargs):
+        self.key = branch_key(self.name)
+        super().save(*args, **kwargs)
 
 
 class Category(models.Model):
@@ -69,6 +106,16 @@ class Round(models.Model):
         return self.name
 
 
+def parse_rank(value):
+    """Numeric value of a cutoff rank string, or None for blanks, '-'/'--' and garbage"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value.isdigit() or len(value) > 18:
+        return None
+    return int(value)
+
+
 class Cutoff(models.Model):
     college = models.ForeignKey(College, on_delete=models.CASCADE, related_name='cutoffs')
     branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='cutoffs')
@@ -76,6 +123,7 @@ class Cutoff(models.Model):
     year = models.ForeignKey(Year, on_delete=models.CASCADE, related_name='cutoffs')
     round = models.ForeignKey(Round, on_delete=models.CASCADE, related_name='cutoffs')
     cutoff_rank = models.CharField(max_length=50, null=True, blank=True)
+    closing_rank = models.BigIntegerField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -86,11 +134,19 @@ class Cutoff(models.Model):
                 name='unique_cutoff'
             )
         ]
+        indexes = [
+            models.Index(fields=['year', 'round', 'category', 'closing_rank'], name='cutoff_rank_range_idx'),
+            models.Index(fields=['college', 'branch', 'year', 'round'], name='cutoff_college_branch_idx'),
+        ]
         ordering = ['-year', 'college', 'branch']
 
     def __str__(self):
         return f"{self.college} - {self.branch} ({self.category}) - {self.year} - {self.round}"
 
+    def save(self, *args, **kwargs):
+        self.closing_rank = parse_rank(self.cutoff_rank)
+        super().save(*args, **kwargs)
+
 
 class PYQ(models.Model):
     subject = models.CharField(max_length=255)
@@ -112,16 +168,47 @@ class PYQ(models.Model):
 
 class CutoffUploadLog(models.Model):
     STATUS_CHOICES = [
+        ('pending', 'Pending'),
         ('success', 'Success'),
         ('partial', 'Partial'),
         ('failed', 'Failed'),
+        ('skipped', 'Skipped'),
+    ]
+
+    STATE_CHOICES = [
+        ('queued', 'Queued'),
+        ('parsing', 'Parsing'),
+        ('saving', 'Saving'),
+        ('done', 'Done'),
+    ]
+
+    MODE_CHOICES = [
+        ('upsert', 'Write every row'),
+        ('diff', 'Write changes only'),
     ]
 
     uploaded_file = models.FileField(upload_to='uploads/')
-    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    year = models.ForeignKey(Year, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_logs')
+    round = models.ForeignKey(Round, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_logs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='done', db_index=True)
+    pages_total = models.IntegerField(default=0)
+    pages_done = models.IntegerField(default=0)
+    rows_written = models.IntegerField(default=0)
     total_rows = models.IntegerField(default=0)
     inserted_count = models.IntegerField(default=0)
     updated_count = models.IntegerField(default=0)
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default='upsert')
+    delete_missing = models.BooleanField(
+        default=False, help_text='Diff mode: delete cutoffs of the uploaded colleges that the PDF no longer lists'
+    )
+    unchanged_count = models.IntegerField(default=0)
+    deleted_count = models.IntegerField(default=0)
+    # Diff mode: {'counts': {...}, 'truncated': bool, 'inserted'/'updated'/'deleted': [{college, branch, category, old, new}]}
+    change_set = models.JSONField(default=dict, blank=True)
+    # IngestMetrics.as_dict(): {'stages': {'read'|'extract'|'parse'|'resolve'|'write': {wall, cpu, queries}}, 'total', ...}
+    metrics = models.JSONField(default=dict, blank=True)
     error_message = models.TextField(blank=True)
     uploaded_by = models.ForeignKey(
         'auth.User',
@@ -129,6 +216,10 @@ class CutoffUploadLog(models.Model):
         null=True
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Heartbeat: bumped by every progress update of a running job, so dead workers' jobs can be told apart
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
@@ -136,3 +227,73 @@ class CutoffUploadLog(models.Model):
     def __str__(self):
         return f"Upload {self.id} - {self.status}"
 
+    @property
+    def is_active(self):
+        return self.state != 'done'
+
+    @property
+    def metrics_summary(self):
+        """One-line digest of ``metrics``, e.g. ``extract 5.1s · parse 0.3s · 7.9 pages/s · peak 180 MB · 412 queries``"""
+        if not self.metrics:
+            return ''
+        parts = [f"{name} {stage['wall']:.1f}s" for name, stage in self.metrics.get('stages', {}).items()]
+        if self.metrics.get('pages_per_second'):
+            parts.append(f"{self.metrics['pages_per_second']} pages/s")
+        if self.metrics.get('rows_per_second'):
+            parts.append(f"{self.metrics['rows_per_second']:.0f} rows/s")
+        if self.metrics.get('peak_rss_mb') is not None:
+            parts.append(f"peak {self.metrics['peak_rss_mb']:.0f} MB")
+        parts.append(f"{self.metrics.get('total', {}).get('queries', 0)} queries")
+        return ' · '.join(parts)
+
+
+class DashboardStats(models.Model):
+    """Denormalised totals for the dashboard (a single row, id=1).
+
+    Kept up to date incrementally by ingest, PYQ uploads and model signals;
+    ``python manage.py recompute_stats`` rebuilds it from scratch.
+    """
+    total_colleges = models.IntegerField(default=0)
+    total_branches = models.IntegerField(default=0)
+    total_categories = models.IntegerField(default=0)
+    total_cutoffs = models.IntegerField(default=0)
+    total_pyqs = models.IntegerField(default=0)
+    # [{"year": 2023, "round": "Round 2", "count": 27363}, ...]
+    cutoffs_by_year_round = models.JSONField(default=list, blank=True)
+    # {"Bengaluru": 80, ...}
+    colleges_by_city = models.JSONField(default=dict, blank=True)
+    last_ingest_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Dashboard stats'
+
+    def __str__(self):
+        return f"Dashboard stats ({self.updated_at})"
+
+
+class BranchTrend(models.Model):
+    """Closing-rank aggregates for a catalogue branch (across colleges) per category/year/round.
+
+    Refreshed for the affected year/round after every ingest so trend
+    requests never aggregate the raw ``Cutoff`` table.
+    """
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='trends')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='branch_trends')
+    year = models.ForeignKey(Year, on_delete=models.CASCADE, related_name='branch_trends')
+    round = models.ForeignKey(Round, on_delete=models.CASCADE, related_name='branch_trends')
+    colleges = models.IntegerField(default=0)
+    min_rank = models.BigIntegerField()
+    median_rank = models.FloatField()
+    max_rank = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['branch', 'category', 'year', 'round'],
+                name='unique_branch_trend'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.branch} ({self.category}) - {self.year} - {self.round}"
@@ -0,0 +1,55 @@
+from django.db.models.signals import post_delete, post_save
+
+from .models import College, Branch, Category, Year, Round, Cutoff, PYQ
+from .utils import stats
+from .utils.data_version import bump_on_commit
+
+
+REFERENCE_MODELS = (College, Branch, Category, Year, Round)
+
+
+def bump_data_version(sender, using=None, **kwargs):
+    bump_on_commit(using=using)
+
+
+# ---- dashboard stats (bulk ingest updates them itself; these cover single saves) ----
+
+def count_created(sender, instance, created, using=None, **kwargs):
+    if sender is College:
+        # A city edit moves a college between buckets; the college table is small
+        stats.recompute_on_commit(using=using)
+    elif sender is Cutoff:
+        if created:
+            stats.record_cutoff_added(instance)
+    elif sender is PYQ:
+        if created:
+            stats.record_pyqs(1)
+    elif created:
+        field = {Branch: 'total_branches', Category: 'total_categories'}.get(sender)
+        if field:
+            stats.adjust_totals({field: 1})
+    elif sender in (Year, Round):
+        # Renamed year/round: breakdown labels change
+        stats.recompute_on_commit(using=using)
+
+
+def count_deleted(sender, using=None, **kwargs):
+    if sender is PYQ:
+        stats.record_pyqs(-1)
+    else:
+        # Deletes cascade to cutoffs, which send no signals of their own
+        stats.recompute_on_commit(using=using)
+
+
+def connect():
+    for model in REFERENCE_MODELS:
+        post_save.connect(bump_data_version, sender=model, dispatch_uid=f'cutoff_version_save_{model.__name__}')
+        post_delete.connect(bump_data_version, sender=model, dispatch_uid=f'cutoff_version_delete_{model.__name__}')
+    # No post_delete receiver for Cutoff: it would stop Django from fast-deleting
+    # cutoffs when a college/year is removed (that delete bumps via the parent)
+    post_save.connect(bump_data_version, sender=Cutoff, dispatch_uid='cutoff_version_save_Cutoff')
+
+    for model in REFERENCE_MODELS + (Cutoff, PYQ):
+        post_save.connect(count_created, sender=model, dispatch_uid=f'cutoff_stats_save_{model.__name__}')
+    for model in REFERENCE_MODELS + (PYQ,):
+        post_delete.connect(count_deleted, sender=model, dispatch_uid=f'cutoff_stats_delete_{model.__name__}')
@@ -1,3 +1,1232 @@
-from django.test import TestCase
+import csv
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import partial
+from glob import glob
+from multiprocessing import get_context
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import pdfplumber
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import College, Branch, BranchAlias, Category, Year, Round, Cutoff, CutoffUploadLog, DashboardStats
+from .utils import parse_cache
+from .utils.page_cache import PageCache
+from .utils.bulk_import import import_pdfs
+from .utils.branches import BranchCatalogue
+from .utils.ingest import CutoffBulkWriter
+from .utils import instrumentation
+from .utils.instrumentation import IngestMetrics
+from .utils.jobs import claim_next_job, enqueue_upload, process_next_job
+from .utils.parsed_rows import NO_RANK, ParsedRows
+from .utils.data_version import current_version
+from .utils.export import export_rows, write_xlsx
+from .utils.predictor import get_index
+from .utils.stats import get_stats, recompute
+from .utils import pdf_parser
+from .utils.pdf_parser import PDFParser, save_cutoff_data
+
+
+SAMPLE_PDFS = sorted(glob(os.path.join(settings.BASE_DIR, 'media', 'uploads', '*.pdf')))
+
+
+def unique_sample_pdfs():
+    """Sample PDFs with byte-identical copies removed"""
+    seen = set()
+    for path in SAMPLE_PDFS:
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if digest not in seen:
+            seen.add(digest)
+            yield path
+
+
+def make_rows(college_code, college_name, branches, categories=('1G', '1K', '1R')):
+    rows = []
+    for branch_name in branches:
+        for idx, code in enumerate(categories):
+            rows.append({
+                'college_code': college_code,
+                'college_name': college_name,
+                'branch_code': '',
+                'branch_name': branch_name,
+                'category_code': code,
+                'category_description': f'Desc {code}',
+                'cutoff_rank': str(1000 + idx),
+                'page_num': 0,
+            })
+    return rows
+
+
+class MediaRootMixin:
+    """Give every test its own empty MEDIA_ROOT"""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_override = override_settings(MEDIA_ROOT=media_root)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+
+
+class SaveCutoffDataTests(TestCase):
+
+    def setUp(self):
+        self.year = Year.objects.create(year=2023)
+        self.round = Round.objects.create(name='Round 2', round_number=2)
+
+    def test_inserts_then_updates(self):
+        rows = make_rows('E001', 'College One', ['Civil', 'Computers']) + \
+            make_rows('E002', 'College Two', ['Civil'])
+
+        inserted, updated, errors = save_cutoff_data(rows, self.year, self.round)
+        self.assertEqual((inserted, updated, errors), (9, 0, []))
+        self.assertEqual(College.objects.count(), 2)
+        self.assertEqual(Branch.objects.count(), 2)
+        self.assertEqual(Category.objects.count(), 3)
+        self.assertEqual(Cutoff.objects.count(), 9)
+
+        rows[0]['cutoff_rank'] = '42'
+        inserted, updated, errors = save_cutoff_data(rows, self.year, self.round)
+        self.assertEqual((inserted, updated, errors), (0, 9, []))
+        self.assertEqual(Cutoff.objects.count(), 9)
+        self.assertEqual(
+            Cutoff.objects.get(college__name='College One', branch__code='CE', category__code='1G').cutoff_rank,
+            '42'
+        )
+
+    def test_numeric_rank_is_kept_in_sync(self):
+        rows = make_rows('E001', 'College One', ['Civil'])
+        rows[1]['cutoff_rank'] = None
+        save_cutoff_data(rows, self.year, self.round)
+        ranks = dict(Cutoff.objects.values_list('category__code', 'closing_rank'))
+        self.assertEqual(ranks, {'1G': 1000, '1K': None, '1R': 1002})
+
+        cutoff = Cutoff.objects.get(category__code='1G')
+        cutoff.cutoff_rank = '77'
+        cutoff.save()
+        cutoff.refresh_from_db()
+        self.assertEqual(cutoff.closing_rank, 77)
+
+    def test_duplicate_rows_count_as_updates(self):
+        rows = make_rows('E001', 'College One', ['Civil'])
+        inserted, updated, errors = save_cutoff_data(rows + rows, self.year, self.round)
+        self.assertEqual((inserted, updated, errors), (3, 3, []))
+
+    def test_query_count_is_independent_of_row_count(self):
+        rows = make_rows('E001', 'College One', [f'Branch {i}' for i in range(300)])
+        with CaptureQueriesContext(connection) as ctx:
+            save_cutoff_data(rows, self.year, self.round)
+        self.assertLess(len(ctx.captured_queries), len(rows) // 20)
+
+    def test_bad_rows_are_reported(self):
+        rows = make_rows('E001', 'College One', ['Civil'])
+        del rows[0]['branch_name']
+        inserted, updated, errors = save_cutoff_data(rows, self.year, self.round)
+        self.assertEqual((inserted, updated), (2, 0))
+        self.assertEqual(errors, ["'branch_name'"])
+
+
+class BranchCatalogueTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.year = Year.objects.create(year=2023)
+        self.round = Round.objects.create(name='Round 2', round_number=2)
+
+    def rows(self, college_code, branch_code, branch_name):
+        rows = make_rows(college_code, f'College {college_code}', [branch_name])
+        for row in rows:
+            row['branch_code'] = branch_code
+        return rows
+
+    def test_one_branch_per_code_across_colleges(self):
+        rows = self.rows('E001', 'CS', 'Computers') + self.rows('E002', 'CS', 'Computers') + \
+            self.rows('E002', 'ZZ', 'Smart Agritech')
+        save_cutoff_data(rows, self.year, self.round)
+        self.assertEqual(
+            list(Branch.objects.order_by('code').values_list('code', 'name')),
+            [('CS', 'Computer Science and Engineering'), ('ZZ', 'Smart Agritech')],
+        )
+        self.assertEqual(Cutoff.objects.filter(branch__code='CS').count(), 6)
+
+    def test_uncoded_names_resolve_through_aliases(self):
+        save_cutoff_data(self.rows('E001', 'CE', 'Civil'), self.year, self.round)
+        # Older uploads: no code, rank placeholders glued onto the name
+        save_cutoff_data(self.rows('E002', '', 'Civil -- -- --'), self.year, self.round)
+        save_cutoff_data(self.rows('E003', '', 'Mining Engg.') + self.rows('E004', '', 'MINING ENGINEERING'),
+                         self.year, self.round)
+        self.assertEqual(
+            list(Branch.objects.order_by('name').values_list('code', 'name')),
+            [('CE', 'Civil Engineering'), ('', 'Mining Engg.')],
+        )
+        self.assertEqual(BranchAlias.objects.get(key='mining engineering').branch.name, 'Mining Engg.')
+
+    def test_codes_adopt_uncoded_branch_of_the_same_name(self):
+        # Left by migration 0008, which can only code the names in KNOWN_BRANCHES
+        save_cutoff_data(self.rows('E001', '', 'Silk Tech.') + self.rows('E002', '', 'B Tech in CS'),
+                         self.year, self.round)
+        rows = self.rows('E001', 'ST', 'Silk Tech.') + self.rows('E002', 'BW', 'B Tech in CS') + \
+            self.rows('E003', 'LG', 'B Tech in CS')
+        save_cutoff_data(rows, self.year, self.round)
+        self.assertEqual(
+            list(Branch.objects.order_by('code').values_list('code', 'name')),
+            [('BW', 'B Tech in CS'), ('LG', 'B Tech in CS'), ('ST', 'Silk Tech.')],
+        )
+        self.assertEqual(Cutoff.objects.count(), 9)
+
+    def test_codes_added_by_another_writer_are_not_counted(self):
+        catalogue = BranchCatalogue.load()
+        Branch.objects.create(code='CS', name='Computer Science and Engineering')
+        ids = catalogue.resolve([('CS', 'Computers'), ('ZZ', 'Smart Agritech')])
+        self.assertEqual(catalogue.created, 1)
+        self.assertEqual(ids[('CS', 'Computers')], Branch.objects.get(code='CS').id)
+
+    def test_branch_trend_accepts_printed_names(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            save_cutoff_data(self.rows('E001', 'CE', 'Civil'), self.year, self.round)
+        self.client.force_login(User.objects.create_user('student', password='pw'))
+        response = self.client.get(reverse('cutoff:api_branch_trend'), {
+            'branch': 'civil', 'category_id': Category.objects.get(code='1G').id,
+        })
+        self.assertEqual(response.json()['branch'], 'Civil Engineering')
+        self.assertEqual(len(response.json()['trend']), 1)
+
+
+class ParsedRowsTests(SimpleTestCase):
+
+    def test_dict_view_round_trips(self):
+        rows = make_rows('E001', 'College One', ['Civil', 'Computers'])
+        rows[0]['cutoff_rank'] = None
+        rows[1]['cutoff_rank'] = '139206152045172963145187188634170285'  # glued cells overflow int64
+        rows[2]['cutoff_rank'] = '0042'
+
+        parsed = ParsedRows.from_rows(rows)
+        self.assertEqual(len(parsed), 6)
+        self.assertEqual(parsed, rows)
+        self.assertEqual(parsed[-1], rows[-1])
+        self.assertEqual(parsed.ranks[0], NO_RANK)
+        self.assertEqual(len(parsed.branches), 2)
+        self.assertEqual(len(parsed.colleges), 1)
+
+        restored = ParsedRows.from_payload(parsed.to_payload())
+        self.assertEqual(restored, rows)
+
+    def test_records_skip_dict_construction(self):
+        rows = ParsedRows.from_rows(make_rows('E001', 'College One', ['Civil']))
+        records = list(rows.iter_records())
+        self.assertEqual(records[0], ('E001', 'College One', '', 'Civil', '1G', 'Desc 1G', '1000'))
+
+
+class StreamingParserTests(SimpleTestCase):
+
+    class PagedParser(PDFParser):
+        def __init__(self, pages):
+            super().__init__(None)
+            self.pages = pages
+
+        def iter_pages(self, progress=None):
+            for page_num, text in enumerate(self.pages, 1):
+                yield page_num, text
+
+    PAGE_1 = (
+        "ENGINEERING CUTOFF RANK OF CET-2023\n"
+        "1 E001 Some College of Engineering Bangalore ( PUBLIC UNIV. )\n"
+        "1G 1K 1R 2AG 2AK 2AR\n"
+        "CS Computers 5809 -- -- 5052\n"
+        "AI Artificial 10087 18087 --"
+    )
+    PAGE_2 = (
+        "Intelligence\n"
+        "EC Electronics 15177 -- 18548"
+    )
+
+    def test_rows_stream_across_page_boundaries(self):
+        parser = self.PagedParser([self.PAGE_1, self.PAGE_2])
+        rows = parser.iter_rows()
+        first = next(rows)
+        self.assertEqual((first['college_code'], first['branch_name'], first['cutoff_rank']), ('E001', 'Computers', '5809'))
+
+        rows = [first] + list(rows)
+        self.assertEqual(len(rows), 3 * 21)
+        branches = [r['branch_name'] for r in rows[::21]]
+        self.assertEqual(branches, ['Computers', 'Artificial Intelligence', 'Electronics'])
+        self.assertEqual([r['page_num'] for r in rows[::21]], [1, 1, 2])
+        self.assertEqual(parser.colleges_found, {'E001'})
+
+    def test_leading_dashes_stay_with_the_ranks(self):
+        parser = self.PagedParser([self.PAGE_1.split("\n1G")[0] + "\nCE Civil -- -- 4012"])
+        rows = list(parser.iter_rows())
+        self.assertEqual((rows[0]['branch_code'], rows[0]['branch_name']), ('CE', 'Civil'))
+        self.assertEqual([r['cutoff_rank'] for r in rows[:3]], [None, None, '4012'])
+
+    def test_streaming_matches_whole_text_parse(self):
+        parser = self.PagedParser([self.PAGE_1, self.PAGE_2])
+        streamed = [dict(r, page_num=0) for r in parser.iter_rows()]
+        self.assertEqual(streamed, parser._parse_text(self.PAGE_1 + "\n" + self.PAGE_2 + "\n"))
+
+
+def word_line(*cells, x=100, width=6):
+    """A line of words for the word engine: ``(x, text)`` pairs or plain strings placed one after another"""
+    words = []
+    for cell in cells:
+        if isinstance(cell, tuple):
+            x, cell = cell
+        x1 = x + width * len(cell)
+        centres = tuple(x + width * (i + 0.5) for i in range(len(cell))) if cell.isdigit() else ()
+        words.append((x, x1, cell, centres))
+        x = x1 + width
+    return words
+
+
+class WordEngineTests(SimpleTestCase):
+
+    class PagedParser(PDFParser):
+        def __init__(self, pages):
+            super().__init__(None, engine='words')
+            self.pages = pages
+
+        def iter_pages(self, progress=None):
+            yield from enumerate(self.pages, 1)
+
+    # Category columns centred at x = 206, 242, 278 and 314
+    HEADER = word_line((200, '1G'), (236, '1K'), (272, '1R'), (308, '2AG'), width=4)
+    COLLEGE = word_line('1', 'E001', 'Some', 'College', '(', 'PUBLIC', ')')
+
+    def test_ranks_are_placed_by_column(self):
+        page = [
+            self.COLLEGE,
+            self.HEADER,
+            word_line('CS', 'Computers', (194, '5809'), (302, '5052'), width=5),  # 1K and 1R printed empty
+            word_line('CE', 'Civil', (193, '123025'), (266, '14095193796'), width=5),  # 1R and 2AG glued together
+        ]
+        rows = list(self.PagedParser([page]).iter_rows())
+        self.assertEqual([r['category_code'] for r in rows[:4]], ['1G', '1K', '1R', '2AG'])
+        self.assertEqual([r['cutoff_rank'] for r in rows], [
+            '5809', None, None, '5052',
+            '123025', None, '140951', '93796',
+        ])
+
+    def test_layout_is_reused_across_pages(self):
+        page_1 = [self.COLLEGE, self.HEADER, word_line('AI', 'Artificial', (194, '10087'), (276, '--'))]
+        page_2 = [
+            word_line('Intelligence'),
+            self.HEADER,
+            word_line('EC', 'Electronics', (236, '--'), (302, '15177')),
+        ]
+        parser = self.PagedParser([page_1, page_2])
+        rows = list(parser.iter_rows())
+        self.assertEqual([r['branch_name'] for r in rows[::4]], ['Artificial Intelligence', 'Electronics'])
+        self.assertEqual([r['page_num'] for r in rows[::4]], [1, 2])
+        self.assertEqual(rows[7]['cutoff_rank'], '15177')
+        self.assertEqual(parser.colleges_found, {'E001'})
+
+    def test_unknown_engine_is_rejected(self):
+        with self.assertRaises(ValueError):
+            PDFParser(None, engine='ocr')
+
+
+class FakeParser:
+    """Stands in for PDFParser and returns canned rows"""
+    rows = []
+    calls = 0
+
+    def __init__(self, pdf_file, **kwargs):
+        self.colleges_found = {'E001'}
+        self.pages_total = 1
+
+    def iter_rows(self, progress=None):
+        FakeParser.calls += 1
+        progress(1, 1)
+        yield from self.rows
+
+
+class DiffIngestTests(TestCase):
+
+    def setUp(self):
+        self.year = Year.objects.create(year=2023)
+        self.round = Round.objects.create(name='Round 2', round_number=2)
+        self.rows = make_rows('E001', 'College One', ['Civil', 'Computers']) + \
+            make_rows('E002', 'College Two', ['Civil'])
+        save_cutoff_data(self.rows, self.year, self.round)
+        Cutoff.objects.update(updated_at=timezone.now() - timedelta(days=1))
+
+    def test_only_changes_are_written(self):
+        before = dict(Cutoff.objects.values_list('id', 'updated_at'))
+        rows = [dict(row) for row in self.rows]
+        rows[0]['cutoff_rank'] = '42'
+        rows += make_rows('E002', 'College Two', ['Mechanical'], categories=('1G',))
+
+        writer = CutoffBulkWriter(self.year, self.round, diff=True)
+        writer.write(rows)
+        self.assertEqual((writer.inserted, writer.updated, writer.unchanged, writer.errors), (1, 1, 8, []))
+
+        changed = Cutoff.objects.get(college__code='E001', branch__code='CE', category__code='1G')
+        self.assertEqual(changed.cutoff_rank, '42')
+        self.assertEqual(
+            {pk for pk, updated_at in Cutoff.objects.values_list('id', 'updated_at') if updated_at != before.get(pk)},
+            {changed.id, Cutoff.objects.get(branch__code='ME').id},
+        )
+        self.assertEqual(writer.change_set['counts'], {'inserted': 1, 'updated': 1, 'deleted': 0, 'unchanged': 8})
+        self.assertEqual(
+            writer.change_set['updated'],
+            [{'college': 'E001', 'branch': 'Civil', 'category': '1G', 'old': '1000', 'new': '42'}],
+        )
+
+    def test_identical_upload_writes_nothing(self):
+        writer = CutoffBulkWriter(self.year, self.round, diff=True)
+        with CaptureQueriesContext(connection) as ctx:
+            writer.write(self.rows)
+        self.assertEqual((writer.rows_written, writer.unchanged), (0, 9))
+        self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE'))
+                          and '"cutoff_cutoff"' in q['sql']])
+
+    def test_delete_missing_only_touches_uploaded_colleges(self):
+        rows = [row for row in self.rows if not (row['college_code'] == 'E001' and row['branch_name'] == 'Computers')]
+        rows = [row for row in rows if row['college_code'] == 'E001']
+
+        writer = CutoffBulkWriter(self.year, self.round, diff=True, delete_missing=True)
+        writer.write(rows)
+        self.assertEqual((writer.deleted, writer.unchanged), (3, 3))
+        self.assertFalse(Cutoff.objects.filter(college__code='E001', branch__code='CS').exists())
+        self.assertEqual(Cutoff.objects.filter(college__code='E002').count(), 3)
+        self.assertEqual(get_stats().total_cutoffs, 6)
+        self.assertEqual({c['category'] for c in writer.change_set['deleted']}, {'1G', '1K', '1R'})
+
+    def test_missing_rows_are_kept_without_delete_missing(self):
+        writer = CutoffBulkWriter(self.year, self.round, diff=True)
+        writer.write(self.rows[:3])
+        self.assertEqual(writer.deleted, 0)
+        self.assertEqual(Cutoff.objects.count(), 9)
+
+
+class UploadJobTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.year = Year.objects.create(year=2023)
+        self.round = Round.objects.create(name='Round 2', round_number=2)
+        self.user = User.objects.create_user('staff', password='pw', is_staff=True)
+        FakeParser.rows = make_rows('E001', 'College One', ['Civil'])
+        FakeParser.calls = 0
+
+    def enqueue(self, content=b'%PDF-1.4 test', year=None, **kwargs):
+        pdf = SimpleUploadedFile('cutoff.pdf', content, content_type='application/pdf')
+        return enqueue_upload(pdf, year or self.year, self.round, self.user, **kwargs)
+
+    def test_jobs_are_claimed_once(self):
+        log = self.enqueue()
+        self.assertEqual(log.state, 'queued')
+        claimed = claim_next_job()
+        self.assertEqual(claimed.id, log.id)
+        self.assertEqual(claimed.state, 'parsing')
+        self.assertIsNone(claim_next_job())
+
+    def test_worker_start_fails_abandoned_jobs(self):
+        abandoned, running = self.enqueue(), self.enqueue(b'%PDF-1.4 other')
+        claim_next_job(), claim_next_job()
+        # Started long ago but still reporting progress: alive
+        CutoffUploadLog.objects.filter(id=running.id).update(started_at=timezone.now() - timedelta(hours=2))
+        CutoffUploadLog.objects.filter(id=abandoned.id).update(updated_at=timezone.now() - timedelta(hours=2))
+
+        out = io.StringIO()
+        call_command('process_uploads', '--once', stdout=out)
+        self.assertIn('Failed 1 upload(s)', out.getvalue())
+        abandoned.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual((abandoned.state, abandoned.status), ('done', 'failed'))
+        self.assertEqual(running.state, 'parsing')
+
+    def test_worker_stops_a_job_failed_as_stale(self):
+        log = self.enqueue()
+
+        def fail_midway(pdf_file, **kwargs):
+            CutoffUploadLog.objects.filter(id=log.id).update(state='done', status='failed')
+            return FakeParser(pdf_file, **kwargs)
+
+        with mock.patch('cutoff.utils.jobs.PDFParser', fail_midway):
+            process_next_job()
+        log.refresh_from_db()
+        self.assertEqual((log.state, log.status), ('done', 'failed'))
+        self.assertEqual(Cutoff.objects.count(), 0)
+
+    def test_failed_write_leaves_no_partial_round(self):
+        log = self.enqueue()
+        with mock.patch('cutoff.utils.jobs.PDFParser', FakeParser), \
+                mock.patch.object(CutoffBulkWriter, '_after_write', side_effect=RuntimeError('boom')):
+            process_next_job()
+        log.refresh_from_db()
+        self.assertEqual((log.state, log.status), ('done', 'failed'))
+        self.assertIn('boom', log.error_message)
+        self.assertEqual(Cutoff.objects.count(), 0)
+
+    def test_run_job_saves_rows_and_records_progress(self):
+        log = self.enqueue()
+        with mock.patch('cutoff.utils.jobs.PDFParser', FakeParser):
+            process_next_job()
+
+        log.refresh_from_db()
+        self.assertEqual((log.state, log.status), ('done', 'success'))
+        self.assertEqual((log.pages_done, log.pages_total), (1, 1))
+        self.assertEqual((log.total_rows, log.inserted_count, log.rows_written), (3, 3, 3))
+        # 'other' holds the progress updates made between stages
+        self.assertEqual(list(log.metrics['stages']), ['read', 'resolve', 'write', 'other'])
+        self.assertGreater(log.metrics['stages']['write']['queries'], 0)
+        self.assertEqual(log.metrics['rows'], 3)
+        self.assertIn('write', log.metrics_summary)
+
+    def test_identical_uploads_share_file_and_parse(self):
+        first = self.enqueue()
+        with mock.patch('cutoff.utils.jobs.PDFParser', FakeParser):
+            process_next_job()
+
+        other_year = Year.objects.create(year=2024)
+        second = self.enqueue(year=other_year)
+        self.assertEqual(second.uploaded_file.name, first.uploaded_file.name)
+        self.assertEqual(second.content_hash, first.content_hash)
+
+        with mock.patch('cutoff.utils.jobs.PDFParser', FakeParser):
+            process_next_job()
+        second.refresh_from_db()
+        self.assertEqual(FakeParser.calls, 1)
+        self.assertEqual((second.status, second.inserted_count), ('success', 3))
+        self.assertEqual(Cutoff.objects.filter(year=other_year).count(), 3)
+
+    def test_parse_cache_is_not_shared_across_fast_path_setting(self):
+        self.enqueue()
+        with mock.patch('cutoff.utils.jobs.PDFParser', FakeParser):
+            process_next_job()
+
+        other_year = Year.objects.create(year=2024)
+        with override_settings(CUTOFF_PARSER_FAST_TEXT=False):
+            self.enqueue(year=other_year)
+            with mock.patch('cutoff.utils.jobs.PDFParser', FakeParser):
+                process_next_job()
+        self.assertEqual(FakeParser.calls, 2)
+
+    def test_reupload_for_same_year_round_is_skipped(self):
+        self.enqueue()
+        with mock.patch('cutoff.utils.jobs.PDFParser', FakeParser):
+            process_next_job()
+
+        again = self.enqueue()
+        self.assertEqual((again.status, again.state), ('skipped', 'done'))
+        self.assertIsNone(claim_next_job())
+
+    def test_diff_upload_records_change_set(self):
+        self.enqueue()
+        with mock.patch('cutoff.utils.jobs.PDFParser', FakeParser):
+            process_next_job()
+
+        FakeParser.rows = make_rows('E001', 'College One', ['Civil'], categories=('1G', '1K'))
+        FakeParser.rows[1]['cutoff_rank'] = '5'
+        log = self.enqueue(b'%PDF-1.4 corrected', mode='diff', delete_missing=True)
+        with mock.patch('cutoff.utils.jobs.PDFParser', FakeParser):
+            process_next_job()
+
+        log.refresh_from_db()
+        self.assertEqual(log.status, 'success')
+        self.assertEqual(
+            (log.inserted_count, log.updated_count, log.unchanged_count, log.deleted_count), (0, 1, 1, 1)
+        )
+        self.assertEqual(log.change_set['counts'], {'inserted': 0, 'updated': 1, 'deleted': 1, 'unchanged': 1})
+        self.assertEqual(log.change_set['deleted'][0]['category'], '1R')
+        self.assertEqual(Cutoff.objects.count(), 2)
+
+    def test_unparseable_pdf_fails_job(self):
+        log = self.enqueue()
+        process_next_job()
+        log.refresh_from_db()
+        self.assertEqual((log.state, log.status), ('done', 'failed'))
+        self.assertTrue(log.error_message)
+
+    def test_upload_view_enqueues_and_status_endpoint_reports(self):
+        self.client.force_login(self.user)
+        pdf = SimpleUploadedFile('cutoff.pdf', b'%PDF-1.4 test', content_type='application/pdf')
+        response = self.client.post(
+            reverse('cutoff:upload_pdf'),
+            {'pdf_file': pdf, 'year': self.year.id, 'round': self.round.id},
+            HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 202)
+        job_id = response.json()['id']
+
+        response = self.client.get(reverse('cutoff:api_upload_status', args=[job_id]))
+        self.assertEqual(response.json()['state'], 'queued')
+
+
+class CutoffSearchTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='pw')
+        self.client.force_login(self.user)
+        self.year = Year.objects.create(year=2023)
+        self.round = Round.objects.create(name='Round 2', round_number=2)
+        rows = make_rows('E001', 'College One', [f'Branch {i}' for i in range(4)]) + \
+            make_rows('E002', 'College Two', ['Civil'])
+        save_cutoff_data(rows, self.year, self.round)
+
+    def test_keyset_pages_cover_every_row_once(self):
+        url = reverse('cutoff:api_search_cutoffs')
+        seen, cursor = [], None
+        while True:
+            params = {'year_id': self.year.id, 'page_size': 4}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(url, params).json()
+            self.assertLessEqual(len(data['results']), 4)
+            seen.extend(row['id'] for row in data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(Cutoff.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_bad_input_is_rejected(self):
+        url = reverse('cutoff:api_search_cutoffs')
+        self.assertEqual(self.client.get(url, {'year_id': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'year_id': self.year.id, 'cursor': 'nope'}).status_code, 400)
+
+    def test_html_view_renders_one_page(self):
+        response = self.client.get(reverse('cutoff:cutoff_search'), {'year_id': self.year.id})
+        self.assertEqual(len(response.context['results']), 15)
+        self.assertIsNone(response.context['next_cursor'])
+        self.assertContains(response, 'College Two')
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('analyst', password='pw')
+        self.client.force_login(self.user)
+        self.year = Year.objects.create(year=2023)
+        self.round = Round.objects.create(name='Round 2', round_number=2)
+        save_cutoff_data(make_rows('E001', 'College One', ['Civil', 'Computers']), self.year, self.round)
+
+    def test_csv_is_streamed(self):
+        response = self.client.get(reverse('cutoff:export_cutoffs'), {'year_id': self.year.id})
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:3], ['college', 'city', 'branch'])
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1][-2:], ['1000', '1000'])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse('cutoff:export_cutoffs'), {'format': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_writes_csv_and_xlsx(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        call_command('export_cutoffs', os.path.join(tmp, 'out.csv'), year=2023, stdout=io.StringIO())
+        with open(os.path.join(tmp, 'out.csv'), newline='') as f:
+            self.assertEqual(len(list(csv.reader(f))), 7)
+
+        try:
+            import openpyxl
+        except ImportError:
+            self.skipTest('openpyxl not installed')
+        call_command('export_cutoffs', os.path.join(tmp, 'out.xlsx'), stdout=io.StringIO())
+        sheet = openpyxl.load_workbook(os.path.join(tmp, 'out.xlsx'), read_only=True).active
+        self.assertEqual(len(list(sheet.iter_rows(values_only=True))), 7)
+
+    def test_xlsx_continues_on_new_sheets_past_the_row_limit(self):
+        try:
+            import openpyxl
+        except ImportError:
+            self.skipTest('openpyxl not installed')
+        out = io.BytesIO()
+        write_xlsx(export_rows({}), out, max_rows=4)
+        workbook = openpyxl.load_workbook(out, read_only=True)
+        self.assertEqual(workbook.sheetnames, ['Cutoffs', 'Cutoffs 2'])
+        sizes = [len(list(workbook[name].iter_rows(values_only=True))) for name in workbook.sheetnames]
+        self.assertEqual(sizes, [4, 4])
+        self.assertEqual(next(workbook['Cutoffs 2'].iter_rows(values_only=True))[0], 'college')
+
+
+class ReferenceCacheTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.user = User.objects.create_user('student', password='pw')
+        self.client.force_login(self.user)
+        Year.objects.create(year=2023)
+        Round.objects.create(name='Round 2', round_number=2)
+        save_cutoff_data(make_rows('E001', 'College One', ['Civil']), Year.objects.get(), Round.objects.get())
+
+    def test_warm_search_page_skips_reference_queries(self):
+        url = reverse('cutoff:cutoff_search')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertContains(response, 'College One')
+        cutoff_queries = [q['sql'] for q in ctx.captured_queries if 'cutoff_' in q['sql']]
+        self.assertEqual(cutoff_queries, [])
+
+    def test_reference_writes_invalidate_cache(self):
+        url = reverse('cutoff:cutoff_search')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            College.objects.create(name='College Two', city='Mysuru')
+        self.assertContains(self.client.get(url), 'College Two')
+
+
+class DropdownApiTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+        self.client.force_login(self.user)
+        self.year = Year.objects.create(year=2023)
+        self.round = Round.objects.create(name='Round 2', round_number=2)
+        rows = make_rows('E001', 'College One', ['Civil'], categories=('1G', '1K')) + \
+            make_rows('E001', 'College One', ['Computers'], categories=('GM',))
+        with self.captureOnCommitCallbacks(execute=True):
+            save_cutoff_data(rows, self.year, self.round)
+        self.college = College.objects.get()
+        self.civil = Branch.objects.get(code='CE')
+
+    def test_branches_and_categories_come_from_maps(self):
+        self.client.get(reverse('cutoff:api_get_branches'), {'college_id': self.college.id})
+        with CaptureQueriesContext(connection) as ctx:
+            branches = self.client.get(reverse('cutoff:api_get_branches'), {'college_id': self.college.id}).json()
+            categories = self.client.get(
+                reverse('cutoff:api_get_categories'), {'college_id': self.college.id, 'branch_id': self.civil.id}
+            ).json()
+        self.assertEqual([b['name'] for b in branches['branches']], ['Civil Engineering', 'Computer Science and Engineering'])
+        self.assertEqual([c['code'] for c in categories['categories']], ['1G', '1K'])
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'cutoff_' in q['sql']])
+
+        everything = self.client.get(reverse('cutoff:api_get_categories'), {'college_id': self.college.id}).json()
+        self.assertEqual([c['code'] for c in everything['categories']], ['1G', '1K', 'GM'])
+
+    def test_etag_round_trip(self):
+        url = reverse('cutoff:api_get_categories')
+        response = self.client.get(url, {'branch_id': self.civil.id})
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertEqual(self.client.get(url, {'branch_id': self.civil.id}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            save_cutoff_data(make_rows('E002', 'College Two', ['Civil']), self.year, self.round)
+        response = self.client.get(url, {'branch_id': self.civil.id}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_only_successful_responses_are_cacheable(self):
+        response = self.client.get(reverse('cutoff:api_get_branches'), {'college_id': self.college.id})
+        self.assertEqual(set(response['Cache-Control'].split(', ')), {'public', 'no-cache'})
+
+        response = self.client.get(reverse('cutoff:api_get_branches'), {'college_id': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertNotIn('public', response.get('Cache-Control', ''))
+
+
+class CollegeCodeTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.year = Year.objects.create(year=2023)
+        self.round = Round.objects.create(name='Round 2', round_number=2)
+
+    def ingest(self, rows):
+        with self.captureOnCommitCallbacks(execute=True):
+            return save_cutoff_data(rows, self.year, self.round)
+
+    def test_colleges_are_keyed_by_code(self):
+        self.ingest(make_rows('E001', 'College One', ['Civil']) + make_rows('E002', 'College One', ['Civil']))
+        # A different spelling of the name under a known code is the same college
+        inserted, updated, _ = self.ingest(make_rows('E001', 'College One Bangalore', ['Civil']))
+        self.assertEqual((inserted, updated), (0, 3))
+        self.assertEqual(list(College.objects.order_by('code').values_list('code', 'name')),
+                         [('E001', 'College One'), ('E002', 'College One')])
+
+    def test_college_without_code_is_adopted_by_name(self):
+        College.objects.create(name='College One', city='Mysuru')
+        self.ingest(make_rows('E001', 'College One', ['Civil']))
+        self.assertEqual(list(College.objects.values_list('code', 'city')), [('E001', 'Mysuru')])
+
+    def test_apis_accept_college_code(self):
+        self.ingest(make_rows('E001', 'College One', ['Civil']) + make_rows('E002', 'College Two', ['Computers']))
+        self.client.force_login(User.objects.create_user('student', password='pw'))
+        branches = self.client.get(reverse('cutoff:api_get_branches'), {'college_code': 'e002'}).json()['branches']
+        self.assertEqual([b['code'] for b in branches], ['CS'])
+        results = self.client.get(reverse('cutoff:api_search_cutoffs'), {'college_code': 'E001'}).json()['results']
+        self.assertEqual({r['college_code'] for r in results}, {'E001'})
+        self.assertEqual(self.client.get(reverse('cutoff:api_search_cutoffs'), {'college_code': 'E999'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('cutoff:api_get_categories'), {'college_code': 'E999'}).status_code, 400)
+
+    def test_backfill_reads_stored_uploads(self):
+        College.objects.create(name='College One', city='Mysuru')
+        College.objects.create(name='College Nine', city='Mysuru')
+        CutoffUploadLog.objects.create(uploaded_file='uploads/round2.pdf', content_hash='abc', status='success')
+        parse_cache.store('abc', ParsedRows.from_rows(make_rows('E007', 'College One', ['Civil'])), {'E007'}, 1)
+        out = io.StringIO()
+        call_command('backfill_college_codes', stdout=out)
+        self.assertEqual(dict(College.objects.values_list('name', 'code')), {'College One': 'E007', 'College Nine': ''})
+        self.assertIn('Attached codes to 1 of 2', out.getvalue())
+
+
+class DashboardStatsTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.year = Year.objects.create(year=2023)
+        self.round = Round.objects.create(name='Round 2', round_number=2)
+        get_stats()
+
+    def assertMatchesRecompute(self):
+        incremental = DashboardStats.objects.values().get()
+        rebuilt = DashboardStats.objects.filter(id=recompute().id).values().get()
+        for field in ('total_colleges', 'total_branches', 'total_categories', 'total_cutoffs',
+                      'total_pyqs', 'cutoffs_by_year_round', 'colleges_by_city'):
+            self.assertEqual(incremental[field], rebuilt[field], field)
+
+    def test_ingest_updates_stats_incrementally(self):
+        save_cutoff_data(make_rows('E001', 'College One', ['Civil', 'Computers']), self.year, self.round)
+        save_cutoff_data(make_rows('E001', 'College One', ['Civil', 'Mining']), self.year, self.round)
+        stats = get_stats()
+        self.assertEqual((stats.total_colleges, stats.total_branches, stats.total_cutoffs), (1, 3, 9))
+        self.assertEqual(stats.cutoffs_by_year_round, [{'year': 2023, 'round': 'Round 2', 'count': 9}])
+        self.assertIsNotNone(stats.last_ingest_at)
+        self.assertMatchesRecompute()
+
+    def test_single_saves_are_counted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            college = College.objects.create(name='College One', city='Mysuru')
+        branch = Branch.objects.create(name='Civil')
+        category = Category.objects.create(code='GM', description='General Merit')
+        Cutoff.objects.create(college=college, branch=branch, category=category, year=self.year,
+                              round=self.round, cutoff_rank='10')
+        self.assertEqual(get_stats().total_cutoffs, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            college.city = 'Mandya'
+            college.save()
+        self.assertEqual(get_stats().colleges_by_city, {'Mandya': 1})
+        self.assertMatchesRecompute()
+
+    def test_bulk_deletes_recompute_once(self):
+        save_cutoff_data(
+            make_rows('E001', 'College One', ['Civil']) + make_rows('E002', 'College Two', ['Civil']),
+            self.year, self.round,
+        )
+        with CaptureQueriesContext(connection) as ctx, self.captureOnCommitCallbacks(execute=True):
+            College.objects.all().delete()
+        recomputes = [q['sql'] for q in ctx.captured_queries if 'GROUP BY' in q['sql'] and 'cutoff_cutoff' in q['sql']]
+        self.assertEqual(len(recomputes), 1)
+        self.assertEqual((get_stats().total_colleges, get_stats().total_cutoffs), (0, 0))
+
+    def test_dashboard_reads_one_row(self):
+        save_cutoff_data(make_rows('E001', 'College One', ['Civil']), self.year, self.round)
+        user = User.objects.create_user('student', password='pw')
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('cutoff:dashboard'))
+        self.assertEqual(response.context['total_cutoffs'], 3)
+        self.assertEqual([q['sql'] for q in ctx.captured_queries if 'COUNT(' in q['sql']], [])
+
+
+class TrendTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+        self.client.force_login(self.user)
+        self.round = Round.objects.create(name='Round 2', round_number=2)
+        for year, ranks in ((2022, ('800', '2000')), (2023, ('1000', '3001'))):
+            year_obj = Year.objects.create(year=year)
+            rows = make_rows('E001', 'College One', ['Civil'], categories=('GM',)) + \
+                make_rows('E002', 'College Two', ['Civil'], categories=('GM',))
+            for row, rank in zip(rows, ranks):
+                row['cutoff_rank'] = rank
+            with self.captureOnCommitCallbacks(execute=True):
+                save_cutoff_data(rows, year_obj, self.round)
+        self.category = Category.objects.get(code='GM')
+
+    def test_series_for_one_college_branch(self):
+        cutoff = Cutoff.objects.filter(college__name='College One').first()
+        response = self.client.get(reverse('cutoff:api_cutoff_trend'), {
+            'college_id': cutoff.college_id, 'branch_id': cutoff.branch_id, 'category_id': self.category.id,
+        })
+        self.assertEqual([(p['year'], p['closing_rank']) for p in response.json()['series']], [(2022, 800), (2023, 1000)])
+
+    def test_branch_aggregates_come_from_trend_table(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('cutoff:api_branch_trend'), {
+                'branch': 'Civil', 'category_id': self.category.id,
+            })
+        trend = response.json()['trend']
+        self.assertEqual(
+            [(p['year'], p['colleges'], p['min_rank'], p['median_rank'], p['max_rank']) for p in trend],
+            [(2022, 2, 800, 1400.0, 2000), (2023, 2, 1000, 2000.5, 3001)],
+        )
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'cutoff_cutoff' in q['sql']])
+
+    def test_branches_sharing_a_printed_name_keep_separate_trends(self):
+        rows = make_rows('E001', 'College One', ['B Tech in CS'], categories=('GM',)) + \
+            make_rows('E002', 'College Two', ['B Tech in CS'], categories=('GM',))
+        for row, code, rank in zip(rows, ('BW', 'LG'), ('100', '900')):
+            row['branch_code'], row['cutoff_rank'] = code, rank
+        with self.captureOnCommitCallbacks(execute=True):
+            save_cutoff_data(rows, Year.objects.get(year=2023), self.round)
+
+        for code, rank in (('BW', 100), ('LG', 900)):
+            response = self.client.get(reverse('cutoff:api_branch_trend'), {
+                'branch_id': Branch.objects.get(code=code).id, 'category_id': self.category.id,
+            })
+            self.assertEqual([(p['colleges'], p['min_rank'], p['max_rank']) for p in response.json()['trend']],
+                             [(1, rank, rank)])
+
+    def test_missing_parameters(self):
+        self.assertEqual(self.client.get(reverse('cutoff:api_cutoff_trend')).status_code, 400)
+        self.assertEqual(self.client.get(reverse('cutoff:api_branch_trend'), {'category_id': 1}).status_code, 400)
+
+
+class TextSearchTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+        self.client.force_login(self.user)
+        year = Year.objects.create(year=2023)
+        round_obj = Round.objects.create(name='Round 2', round_number=2)
+        rows = make_rows('E001', 'R. V. College of Engineering', ['Computer Science', 'Civil']) + \
+            make_rows('E002', 'Ghousia College', ['Computer Science'])
+        with self.captureOnCommitCallbacks(execute=True):
+            save_cutoff_data(rows, year, round_obj)
+            College.objects.filter(name='Ghousia College').update(city='Ramanagara')
+
+    def search(self, **params):
+        return self.client.get(reverse('cutoff:api_search'), params).json()['results']
+
+    def test_ranked_fuzzy_matches(self):
+        self.assertEqual(self.search(q='rv coll')[0]['name'], 'R. V. College of Engineering')
+        self.assertEqual(self.search(q='ramanag')[0]['name'], 'Ghousia College')
+        branches = self.search(q='comp sci', type='branch')
+        self.assertEqual({(b['name'], b['college']) for b in branches}, {
+            ('Computer Science and Engineering', 'R. V. College of Engineering'),
+            ('Computer Science and Engineering', 'Ghousia College'),
+        })
+        self.assertEqual(self.search(q='xyzzy'), [])
+
+    def test_index_follows_ingest(self):
+        self.assertEqual(self.search(q='mining'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            save_cutoff_data(make_rows('E001', 'R. V. College of Engineering', ['Mining']),
+                             Year.objects.get(), Round.objects.get())
+        self.assertEqual(self.search(q='mining')[0]['name'], 'Mining')
+
+
+class PredictorTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('student', password='pw')
+        self.year = Year.objects.create(year=2023)
+        self.round = Round.objects.create(name='Round 2', round_number=2)
+        rows = make_rows('E001', 'College One', ['Civil', 'Computers'], categories=('GM',)) + \
+            make_rows('E002', 'College Two', ['Civil'], categories=('GM', '1G'))
+        ranks = ['5000', '900', '3000', '2500']
+        for row, rank in zip(rows, ranks):
+            row['cutoff_rank'] = rank
+        with self.captureOnCommitCallbacks(execute=True):
+            save_cutoff_data(rows, self.year, self.round)
+        College.objects.filter(name='College Two').update(city='Mysuru')
+
+    def predict(self, **params):
+        self.client.force_login(self.user)
+        return self.client.get(reverse('cutoff:api_predict'), params)
+
+    def test_eligible_pairs_sorted_by_closing_rank(self):
+        response = self.predict(rank=1000, category='gm')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(
+            [(r['college'], r['branch'], r['closing_rank']) for r in results],
+            [('College Two', 'Civil Engineering', 3000), ('College One', 'Civil Engineering', 5000)],
+        )
+        self.assertEqual((results[0]['year'], results[0]['round']), (2023, 'Round 2'))
+
+    def test_filters_and_limit(self):
+        self.assertEqual(self.predict(rank=1, category='GM', city='mysuru').json()['count'], 1)
+        self.assertEqual(self.predict(rank=1, category='GM', limit=2).json()['count'], 2)
+        self.assertEqual(self.predict(rank=1, category='GM', round_id=self.round.id + 1).json()['count'], 0)
+
+    def test_invalid_input(self):
+        self.assertEqual(self.predict(category='GM').status_code, 400)
+        self.assertEqual(self.predict(rank=10, category='XX').status_code, 400)
+
+    def test_index_rebuilds_after_ingest(self):
+        before = get_index()
+        self.assertIs(get_index(), before)
+        rows = make_rows('E003', 'College Three', ['Civil'], categories=('GM',))
+        version = current_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            save_cutoff_data(rows, self.year, self.round)
+        self.assertNotEqual(current_version(), version)
+        self.assertIsNot(get_index(), before)
+        self.assertEqual(self.predict(rank=1, category='GM').json()['count'], 4)
+
+
+class IngestCommandTests(MediaRootMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.source = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source, ignore_errors=True)
+        for name, content in [('kcet_2023_round_2.pdf', b'%PDF a'), ('spot.pdf', b'%PDF b'), ('notes.pdf', b'%PDF c')]:
+            with open(os.path.join(self.source, name), 'wb') as f:
+                f.write(content)
+
+    def fake_parse(self, path):
+        rows = ParsedRows.from_rows(make_rows('E001', 'College One', [os.path.basename(path)]))
+        return rows, {'E001'}, 2, 0.1, IngestMetrics()
+
+    def ingest(self, *args):
+        out = io.StringIO()
+        with mock.patch('cutoff.utils.bulk_import.parse_pdf_file', self.fake_parse):
+            call_command('ingest_cutoffs', self.source, '--workers', '1', '--map', 'spot*=2022:4', *args, stdout=out)
+        return out.getvalue()
+
+    def test_files_are_mapped_saved_and_logged(self):
+        output = self.ingest()
+        self.assertIn('Skipping', output)
+        self.assertIn('pages/s', output)
+        logs = CutoffUploadLog.objects.order_by('year__year')
+        self.assertEqual(
+            [(log.year.year, log.round.round_number, log.status, log.inserted_count) for log in logs],
+            [(2022, 4, 'success', 3), (2023, 2, 'success', 3)],
+        )
+        self.assertEqual(Cutoff.objects.count(), 6)
+
+    def test_rerun_skips_imported_files(self):
+        self.ingest()
+        self.ingest()
+        self.assertEqual(CutoffUploadLog.objects.filter(status='skipped').count(), 2)
+        self.assertEqual(Cutoff.objects.count(), 6)
+
+    def test_pool_workers_start_under_spawn(self):
+        # spawn (the default on Windows and macOS) starts workers without Django set up
+        spawn_pool = partial(ProcessPoolExecutor, mp_context=get_context('spawn'))
+        year, round_obj = Year.objects.create(year=2023), Round.objects.create(name='Round 2', round_number=2)
+        files = [(os.path.join(self.source, name), year, round_obj) for name in ('spot.pdf', 'notes.pdf')]
+        with mock.patch('cutoff.utils.bulk_import.ProcessPoolExecutor', spawn_pool):
+            results = import_pdfs(files, workers=2)
+
+        for result in results:
+            self.assertEqual(result.log.status, 'failed')
+            self.assertNotIn('process pool', result.log.error_message)
+
+
+@skipUnless(SAMPLE_PDFS, 'sample cutoff PDFs not available')
+class ParallelParseTests(SimpleTestCase):
+
+    def test_parallel_output_matches_serial(self):
+        for path in unique_sample_pdfs():
+            with self.subTest(pdf=os.path.basename(path)):
+                serial_ok, serial = PDFParser(path, workers=1).parse()
+                parallel_parser = PDFParser(path, workers=3)
+                parallel_ok, parallel = parallel_parser.parse()
+
+                self.assertTrue(serial_ok)
+                self.assertEqual(parallel_ok, serial_ok)
+                self.assertEqual(parallel['extracted_data'], serial['extracted_data'])
+                self.assertEqual(sorted(parallel['colleges_found']), sorted(serial['colleges_found']))
+                # Extraction overlaps across workers: its wall time is waited time, not a sum
+                metrics = parallel_parser.metrics.as_dict()
+                self.assertLessEqual(metrics['stages']['extract']['wall'], metrics['total']['wall'])
+
+
+class PDFSourceTests(SimpleTestCase):
+
+    def test_files_on_disk_are_opened_by_path(self):
+        upload = TemporaryUploadedFile('cutoff.pdf', 'application/pdf', 4, None)
+        self.addCleanup(upload.close)
+        self.assertEqual(pdf_parser._pdf_path(upload), upload.temporary_file_path())
+        self.assertEqual(pdf_parser._pdf_path(upload.temporary_file_path()), upload.temporary_file_path())
+        with open(upload.temporary_file_path(), 'rb') as f:
+            self.assertEqual(pdf_parser._pdf_path(f), upload.temporary_file_path())
+
+    def test_in_memory_uploads_are_read(self):
+        upload = SimpleUploadedFile('cutoff.pdf', b'%PDF-1.4 test', content_type='application/pdf')
+        self.assertIsNone(pdf_parser._pdf_path(upload))
+        self.assertEqual(pdf_parser._pdf_source(upload), b'%PDF-1.4 test')
+
+
+class FastTextTests(SimpleTestCase):
+
+    HEADER = "1G 1K 1R 2AG"
+
+    def test_structural_checks(self):
+        self.assertTrue(pdf_parser._fast_text_ok(f"1 E001 College\n{self.HEADER}\nCS Computers 5809 -- -- 5052"))
+        self.assertTrue(pdf_parser._fast_text_ok(f"{self.HEADER}\nCE Civil 123025 -- 14095193796"))
+        self.assertFalse(pdf_parser._fast_text_ok("CS Computers 5809 -- -- 5052"))
+        self.assertFalse(pdf_parser._fast_text_ok(f"{self.HEADER}\nCS Computers 5809 -- -- 5052 7296"))
+        self.assertFalse(pdf_parser._fast_text_ok(f"{self.HEADER}\nCS Computers 5809"))
+        self.assertFalse(pdf_parser._fast_text_ok(self.HEADER))
+
+    @skipUnless(SAMPLE_PDFS, 'sample cutoff PDFs not available')
+    def test_rejected_pages_fall_back_to_pdfplumber(self):
+        fast_page_text = pdf_parser._fast_page_text
+        with mock.patch.object(
+            pdf_parser, '_fast_page_text', lambda reader, index: None if index == 1 else fast_page_text(reader, index)
+        ):
+            success, result = PDFParser(SAMPLE_PDFS[0], fast_text=True).parse()
+        self.assertTrue(success)
+        self.assertEqual([page['backend'] for page in result['pages'][:3]], ['pypdf', 'pdfplumber', 'pypdf'])
+        self.assertEqual(result['backends']['pdfplumber'], 1)
+        self.assertEqual(sum(result['backends'].values()), len(result['pages']))
+
+
+class PageCacheTests(MediaRootMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = PageCache.from_settings('text', fast_text=False)
+
+    def test_pages_round_trip(self):
+        self.assertIsNone(self.cache.load('ab12'))
+        self.cache.store('ab12', "1G 1K 1R\nCS Computers 5809")
+        self.assertEqual(self.cache.load('ab12'), "1G 1K 1R\nCS Computers 5809")
+        self.assertEqual(self.cache.stats()[f'text-v{pdf_parser.PARSER_VERSION}']['pages'], 1)
+
+    def test_fast_path_pages_are_kept_apart(self):
+        fast = PageCache.from_settings('text', fast_text=True)
+        fast.store('ab12', 'pypdf text')
+        self.assertIsNone(self.cache.load('ab12'))
+        self.assertEqual(fast.load('ab12'), 'pypdf text')
+        # The word engine has no fast path
+        self.assertEqual(PageCache.from_settings('words', fast_text=True).variant, 'words')
+
+    def test_key_covers_page_resources(self):
+        # Both pages run the same content stream, through Form XObjects that draw different text
+        def form(text):
+            stream = f'BT /F1 12 Tf 10 100 Td ({text}) Tj ET'.encode()
+            return (b'<< /Type /XObject /Subtype /Form /BBox [0 0 200 200] /Resources << /Font << /F1 8 0 R >> >> '
+                    b'/Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+
+        page = b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 200] /Contents 5 0 R /Resources << /XObject << /X0 %d 0 R >> >> >>'
+        objects = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            b'<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 >>',
+            page % 6,
+            page % 7,
+            b'<< /Length 6 >>\nstream\n/X0 Do\nendstream',
+            form('Alpha'),
+            form('Bravo'),
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        ]
+        pdf = io.BytesIO()
+        pdf.write(b'%PDF-1.4\n')
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(pdf.tell())
+            pdf.write(b'%d 0 obj\n%s\nendobj\n' % (number, body))
+        xref = pdf.tell()
+        pdf.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+        pdf.write(b''.join(b'%010d 00000 n \n' % offset for offset in offsets))
+        pdf.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+        pdf.seek(0)
+
+        with pdfplumber.open(pdf) as document:
+            first, second = document.pages
+            self.assertEqual((first.extract_text(), second.extract_text()), ('Alpha', 'Bravo'))
+            self.assertNotEqual(self.cache.key(first), self.cache.key(second))
+
+    def test_prune_evicts_least_recently_used_and_stale_pages(self):
+        for key in ('aa01', 'bb02', 'cc03'):
+            self.cache.store(key, 'x' * 100)
+        for age, key in enumerate(('cc03', 'aa01', 'bb02')):
+            os.utime(self.cache.path(key), (1000 + age, 1000 + age))
+        old = PageCache(self.cache.root, 'text')
+        old.directory = os.path.join(self.cache.root, 'text-v1')
+        old.store('dd04', 'old parser output')
+
+        size = os.path.getsize(self.cache.path('aa01'))
+        removed, _ = self.cache.prune(max_bytes=2 * size)
+        self.assertEqual(removed, 2)
+        self.assertIsNone(self.cache.load('cc03'))
+        self.assertIsNone(old.load('dd04'))
+        self.assertIsNotNone(self.cache.load('aa01'))
+
+    @skipUnless(SAMPLE_PDFS, 'sample cutoff PDFs not available')
+    def test_unchanged_pages_come_from_the_cache(self):
+        first = PDFParser(SAMPLE_PDFS[0], page_cache=True)
+        rows = list(first.iter_rows())
+        self.assertNotIn('cache', first.backend_counts())
+
+        again = PDFParser(SAMPLE_PDFS[0], page_cache=True)
+        self.assertEqual(list(again.iter_rows()), rows)
+        self.assertEqual(again.backend_counts(), {'cache': again.pages_total})
+
+    def test_command_reports_and_prunes(self):
+        self.cache.store('aa01', 'x' * 100)
+        out = io.StringIO()
+        call_command('page_cache', stdout=out)
+        self.assertIn('1 pages', out.getvalue())
+        call_command('page_cache', '--prune', '--max-mb', '0', stdout=out)
+        self.assertIn('Removed 1 page(s)', out.getvalue())
+        self.assertEqual(self.cache.stats(), {})
+
+
+class IngestMetricsTests(TestCase):
+
+    def test_stages_time_work_and_count_queries(self):
+        metrics = IngestMetrics()
+        with metrics.count_queries():
+            with metrics.stage('write'):
+                list(College.objects.all())
+            list(Year.objects.all())
+        self.assertEqual(metrics.stages['write']['queries'], 1)
+        self.assertEqual(metrics.stages['other']['queries'], 1)
+
+        self.assertEqual(list(metrics.timed(iter([1, 2]), 'parse')), [1, 2])
+        metrics.add_pages([
+            {'page': 1, 'backend': 'pypdf', 'seconds': 0.5, 'cpu': 0.4},
+            {'page': 2, 'backend': 'cache', 'seconds': 0.1},
+        ])
+        result = metrics.as_dict(pages=2, rows=10)
+        self.assertEqual(list(result['stages']), ['extract', 'parse', 'write', 'other'])
+        self.assertEqual(result['stages']['extract']['wall'], 0.6)
+        self.assertEqual(result['total']['queries'], 2)
+        self.assertEqual(result['backends']['pypdf'], {'pages': 1, 'seconds': 0.5})
+        self.assertEqual(result['slowest_pages'][0]['page'], 1)
+
+    def test_pool_extraction_is_charged_elapsed_time(self):
+        metrics = IngestMetrics()
+        metrics.add_pages([{'page': 1, 'backend': 'pypdf', 'seconds': 2.0, 'cpu': 2.0}] * 3, wall=2.5)
+        self.assertEqual(metrics.stages['extract'], {'wall': 2.5, 'cpu': 6.0, 'queries': 0})
+
+    @skipUnless(os.path.exists('/proc/self/clear_refs'), 'needs Linux /proc')
+    def test_peak_memory_is_per_ingest(self):
+        ballast = bytearray(64 * 1024 * 1024)
+        before = instrumentation.peak_rss_mb()
+        del ballast
+        self.assertLess(IngestMetrics().peak_rss_mb(), before)
+
+    def test_pickling_keeps_elapsed_time(self):
+        import pickle
+
+        metrics = IngestMetrics()
+        metrics._wall -= 5
+        metrics.add('extract', 4.0, 3.0)
+        copy = pickle.loads(pickle.dumps(metrics))
+        self.assertEqual(copy.stages['extract']['wall'], 4.0)
+        self.assertGreaterEqual(copy.as_dict()['total']['wall'], 5)
@@ -21,10 +21,17 @@ urlpatterns = [
     
     # Cutoff Search
     path('cutoff-search/', views.cutoff_search, name='cutoff_search'),
+    path('cutoff-search/export/', views.export_cutoffs, name='export_cutoffs'),
     
     # API Endpoints
     path('api/get-branches/', views.api_get_branches, name='api_get_branches'),
     path('api/get-categories/', views.api_get_categories, name='api_get_categories'),
+    path('api/search/', views.api_search, name='api_search'),
+    path('api/cutoffs/', views.api_search_cutoffs, name='api_search_cutoffs'),
+    path('api/trends/', views.api_cutoff_trend, name='api_cutoff_trend'),
+    path('api/trends/branch/', views.api_branch_trend, name='api_branch_trend'),
+    path('api/predict/', views.api_predict, name='api_predict'),
+    path('api/upload-status/<int:log_id>/', views.api_upload_status, name='api_upload_status'),
     
     # PYQ Management
     path('pyqs/', views.pyq_list, name='pyq_list'),
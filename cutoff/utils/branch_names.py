@@ -0,0 +1,83 @@
+"""Branch name normalisation and the seed catalogue of KEA branch codes.
+
+Migration 0008 keeps its own frozen copy of the table and normaliser, so
+changes here do not alter what it did.
+"""
+import re
+from typing import Dict
+
+
+# Stand-alone '-'/'--' tokens are rank placeholders; parser version 1 glued
+# them onto branch names ("Civil -- -- --")
+DASH_TOKEN_RE = re.compile(r'(?:^|\s)--?(?=\s|$)')
+WHITESPACE_RE = re.compile(r'\s+')
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+# Abbreviations the PDFs use interchangeably with the full word
+ABBREVIATIONS = {
+    'engg': 'engineering', 'eng': 'engineering', 'sc': 'science', 'sci': 'science',
+    'comp': 'computer', 'tech': 'technology', 'mgmt': 'management', 'info': 'information',
+}
+
+# code -> (canonical name, other spellings seen in cutoff PDFs)
+KNOWN_BRANCHES = {
+    'AD': ('Artificial Intelligence and Data Science', ('Artificial Intel, Data Sc',)),
+    'AE': ('Aeronautical Engineering', ('Aeronaut.Engg',)),
+    'AI': ('Artificial Intelligence', ()),
+    'AT': ('Automotive Engineering', ('Automotive Engg.',)),
+    'AU': ('Automobile Engineering', ('Automobile',)),
+    'BM': ('Bio Medical Engineering', ('Bio Medical',)),
+    'BT': ('Bio Technology', ('Biotechnology',)),
+    'CB': ('Computer Science and Business Systems', ('Comp. Sc. and Bus Sys.',)),
+    'CD': ('Computer Science and Design', ('Computer Sc. and Design',)),
+    'CE': ('Civil Engineering', ('Civil',)),
+    'CH': ('Chemical Engineering', ('Chemical',)),
+    'CO': ('Computer Engineering', ()),
+    'CS': ('Computer Science and Engineering', ('Computers', 'Computer Science')),
+    'CV': ('Civil Environment Engineering', ('Civil Environment Engg',)),
+    'CY': ('Computer Science and Engineering (Cyber Security)', ('CS- Cyber Security', 'Cyber Security')),
+    'DS': ('Computer Science and Engineering (Data Science)', ('Comp. Sc. Engg- Data Sc.',)),
+    'EA': ('Agriculture Engineering', ()),
+    'EC': ('Electronics and Communication Engineering', ('Electronics',)),
+    'EE': ('Electrical and Electronics Engineering', ('Electrical',)),
+    'EI': ('Electronics and Instrumentation Engineering', ('Elec. Inst. Engg',)),
+    'ES': ('Electronics and Computer Engineering', ('Electronics and Computer',)),
+    'ET': ('Electronics and Telecommunication Engineering', ('Elec. Telecommn. Engg.',)),
+    'IE': ('Information Science and Engineering', ('Info.Science', 'Information Science')),
+    'IM': ('Industrial Engineering and Management', ('Ind. Engg. Mgmt.',)),
+    'IO': ('Computer Science and Engineering (Internet of Things)', ('CS- Internet of Things',)),
+    'IP': ('Industrial and Production Engineering', ('Ind.Prodn.',)),
+    'MD': ('Medical Electronics', ('Med.Elect.',)),
+    'ME': ('Mechanical Engineering', ('Mechanical',)),
+    'MT': ('Mechatronics', ()),
+    'RA': ('Robotics and Automation', ()),
+    'RI': ('Robotics and Artificial Intelligence', ('Robotics and AI',)),
+    'SE': ('Aerospace Engineering', ('Aero Space Engg.',)),
+    'TX': ('Textile Technology', ('Textiles',)),
+}
+
+
+def clean_branch_name(name: str) -> str:
+    """Display form of a printed branch name: rank placeholders dropped, whitespace collapsed"""
+    return WHITESPACE_RE.sub(' ', DASH_TOKEN_RE.sub(' ', name)).strip()
+
+
+def branch_key(name: str) -> str:
+    """Lookup key for a branch name: case, punctuation and common abbreviations folded"""
+    text = _NON_ALNUM_RE.sub(' ', clean_branch_name(name).lower().replace('&', ' and '))
+    return ' '.join(ABBREVIATIONS.get(word, word) for word in text.split())
+
+
+def seed_aliases() -> Dict[str, str]:
+    """``branch_key`` -> code for every name in ``KNOWN_BRANCHES``; keys shared by two codes are left out"""
+    aliases: Dict[str, str] = {}
+    ambiguous = set()
+    for code, (name, spellings) in KNOWN_BRANCHES.items():
+        for spelling in (name,) + spellings:
+            key = branch_key(spelling)
+            if aliases.get(key, code) != code:
+                ambiguous.add(key)
+            aliases[key] = code
+    for key in ambiguous:
+        del aliases[key]
+    return aliases
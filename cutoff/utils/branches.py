@@ -0,0 +1,123 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+from ..models import Branch, BranchAlias
+from .branch_names import KNOWN_BRANCHES, branch_key, clean_branch_name, seed_aliases
+
+
+class BranchCatalogue:
+    """Resolves printed ``(code, name)`` pairs to catalogue ``Branch`` ids.
+
+    A pair with a code resolves by code; one without (older uploads, hand
+    entered rows) resolves through the alias table, then the seed aliases of
+    ``KNOWN_BRANCHES``. Branches that are still unknown are created, and
+    every new spelling is stored as an alias so later rows find it. A new
+    code whose name already resolves to a code-less branch takes that branch
+    over instead of creating a second one.
+    """
+
+    def __init__(self):
+        self.by_code: Dict[str, int] = {}
+        self.by_key: Dict[str, int] = {}
+        self.created = 0
+        self._seeds = seed_aliases()
+
+    @classmethod
+    def load(cls) -> 'BranchCatalogue':
+        catalogue = cls()
+        catalogue.by_code.update(Branch.objects.exclude(code='').values_list('code', 'id'))
+        catalogue.by_key.update(BranchAlias.objects.values_list('key', 'branch_id'))
+        return catalogue
+
+    def resolve(self, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """Ids for ``pairs``; where spellings disagree the first pair seen names a new branch"""
+        pairs = list(pairs)
+        codes = {}
+        for code, name in pairs:
+            key = branch_key(name)
+            # Stored aliases (which the admin can edit) win over the seed list
+            seed = '' if key in self.by_key else self._seeds.get(key, '')
+            codes[(code, name)] = code.strip().upper() or seed
+        self._create_codes({c for c in codes.values() if c and c not in self.by_code}, pairs, codes)
+        uncoded = {}
+        for code, name in pairs:
+            if not codes[(code, name)] and branch_key(name) not in self.by_key:
+                # The first spelling seen names the branch
+                uncoded.setdefault(branch_key(name), clean_branch_name(name))
+        self._create_uncoded(uncoded)
+
+        resolved = {}
+        new_aliases = {}
+        for code, name in pairs:
+            key = branch_key(name)
+            canonical = codes[(code, name)]
+            pk = self.by_code[canonical] if canonical else self.by_key[key]
+            resolved[(code, name)] = pk
+            if key and key not in self.by_key:
+                new_aliases[key] = BranchAlias(branch_id=pk, key=key, name=clean_branch_name(name))
+        if new_aliases:
+            BranchAlias.objects.bulk_create(list(new_aliases.values()), ignore_conflicts=True)
+            self.by_key.update(BranchAlias.objects.filter(key__in=new_aliases).values_list('key', 'branch_id'))
+        return resolved
+
+    def _create_codes(self, missing, pairs, codes):
+        """Give ``missing`` codes a branch: adopt a code-less branch of the same name, else create one"""
+        if not missing:
+            return
+        names = {}
+        candidates = {}
+        for code, name in pairs:
+            canonical = codes[(code, name)]
+            names.setdefault(canonical, clean_branch_name(name))
+            if canonical in missing and branch_key(name) in self.by_key:
+                candidates.setdefault(canonical, self.by_key[branch_key(name)])
+        # Branches stored before codes were (migration 0008 only knew KNOWN_BRANCHES) are adopted, once
+        uncoded = set(Branch.objects.filter(id__in=set(candidates.values()), code='').values_list('id', flat=True))
+        adopted = {}
+        for c, pk in candidates.items():
+            if pk in uncoded:
+                adopted[c] = pk
+                uncoded.discard(pk)
+        Branch.objects.bulk_update([Branch(id=pk, code=c) for c, pk in adopted.items()], ['code'])
+        to_create = missing - adopted.keys()
+        # Another writer may have added some of these codes since the catalogue loaded
+        existing = Branch.objects.filter(code__in=to_create).count()
+        Branch.objects.bulk_create(
+            [
+                Branch(code=c, name=KNOWN_BRANCHES[c][0] if c in KNOWN_BRANCHES else names[c] or c)
+                for c in to_create
+            ],
+            ignore_conflicts=True,
+        )
+        created = dict(Branch.objects.filter(code__in=to_create).values_list('code', 'id'))
+        self.created += len(created) - existing
+        self.by_code.update(adopted)
+        self.by_code.update(created)
+
+    def _create_uncoded(self, missing: Dict[str, str]):
+        if not missing:
+            return
+        names = set(missing.values())
+
+        def load():
+            return dict(Branch.objects.filter(code='', name__in=names).values_list('name', 'id'))
+
+        # Branches added by hand in the admin have no alias yet
+        ids = load()
+        to_create = names - ids.keys()
+        if to_create:
+            Branch.objects.bulk_create([Branch(name=name) for name in to_create])
+            self.created += len(to_create)
+            ids = load()
+        aliases = [BranchAlias(branch_id=ids[name], key=key, name=name) for key, name in missing.items()]
+        BranchAlias.objects.bulk_create(aliases)
+        self.by_key.update((a.key, a.branch_id) for a in aliases)
+
+
+def find_branch(name: str) -> Optional[Branch]:
+    """Catalogue branch for a printed or hand-typed branch name, or None when unknown"""
+    key = branch_key(name)
+    branch = Branch.objects.filter(aliases__key=key).first()
+    code = seed_aliases().get(key)
+    if branch is None and code:
+        branch = Branch.objects.filter(code=code).first()
+    return branch
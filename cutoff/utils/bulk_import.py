@@ -0,0 +1,191 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from django.core.files import File
+from django.utils import timezone
+
+from ..models import CutoffUploadLog
+from . import parse_cache
+from .ingest import CutoffBulkWriter
+from .instrumentation import IngestMetrics
+from .parse_cache import file_sha256
+from .pdf_parser import PDFParser
+from .workers import setup_django
+
+
+class ImportResult:
+    """Outcome of importing one PDF"""
+
+    def __init__(self, path: str, log: CutoffUploadLog, pages: int = 0, parse_seconds: float = 0.0,
+                 cached: bool = False):
+        self.path = path
+        self.log = log
+        self.pages = pages
+        self.parse_seconds = parse_seconds
+        self.cached = cached
+
+
+def parse_pdf_file(path: str):
+    """Parse one PDF in a pool worker; returns ``(rows, colleges_found, pages_total, seconds, metrics)``"""
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        parser = PDFParser(f, workers=1, page_cache=True)
+        success, result = parser.parse()
+    if not success:
+        raise ValueError('; '.join(result['errors']) or 'No cutoff data found')
+    return (
+        result['extracted_data'], parser.colleges_found, parser.pages_total, time.perf_counter() - start,
+        parser.metrics,
+    )
+
+
+def _file_hash(path: str) -> str:
+    with open(path, 'rb') as f:
+        return file_sha256(f)
+
+
+def _create_log(path: str, content_hash: str, year_obj, round_obj, user, mode: str = 'upsert',
+                delete_missing: bool = False) -> CutoffUploadLog:
+    """Log row for an imported file, reusing an already stored copy of the same content"""
+    previous = CutoffUploadLog.objects.filter(content_hash=content_hash).exclude(uploaded_file='')
+    stored = next(
+        (log.uploaded_file.name for log in previous[:5] if log.uploaded_file.storage.exists(log.uploaded_file.name)),
+        None
+    )
+    log = CutoffUploadLog(
+        content_hash=content_hash, year=year_obj, round=round_obj, status='pending', state='parsing',
+        mode=mode, delete_missing=delete_missing, uploaded_by=user, started_at=timezone.now(),
+    )
+    if stored:
+        log.uploaded_file.name = stored
+        log.save()
+    else:
+        with open(path, 'rb') as f:
+            log.uploaded_file.save(os.path.basename(path), File(f), save=True)
+    return log
+
+
+def _already_imported(content_hash: str, year_obj, round_obj) -> Optional[CutoffUploadLog]:
+    return CutoffUploadLog.objects.filter(
+        content_hash=content_hash, year=year_obj, round=round_obj
+    ).exclude(status__in=['failed', 'skipped']).order_by('created_at').first()
+
+
+def _save(log: CutoffUploadLog, rows, pages_total: int, metrics: Optional[IngestMetrics] = None) -> CutoffUploadLog:
+    metrics = metrics if metrics is not None else IngestMetrics()
+    writer = CutoffBulkWriter.for_log(log, metrics=metrics)
+    with metrics.count_queries():
+        _, _, errors = writer.write(rows)
+    if writer.total_rows:
+        log.status = 'success' if not errors else 'partial'
+        log.error_message = '; '.join(errors)
+    else:
+        log.status = 'failed'
+        log.error_message = '; '.join(errors) if errors else 'No cutoff data found'
+    log.state = 'done'
+    log.pages_total = log.pages_done = pages_total
+    for field, value in writer.log_fields().items():
+        setattr(log, field, value)
+    log.metrics = metrics.as_dict(pages_total, writer.total_rows)
+    log.finished_at = timezone.now()
+    log.save()
+    return log
+
+
+def _fail(log: CutoffUploadLog, message: str) -> CutoffUploadLog:
+    log.status = 'failed'
+    log.state = 'done'
+    log.error_message = message
+    log.finished_at = timezone.now()
+    log.save()
+    return log
+
+
+def import_pdfs(files: Iterable[Tuple[str, object, object]], workers: int = 1, user=None, force: bool = False,
+                on_result: Optional[Callable[[ImportResult], None]] = None, diff: bool = False,
+                delete_missing: bool = False) -> List[ImportResult]:
+    """Parse ``(path, year, round)`` entries in a process pool and save them from this process.
+
+    Parsing is spread over ``workers`` processes; every result is funnelled
+    back to a single writer here, which saves one file per transaction, so
+    there is never more than one process writing to the database. Files
+    already imported for the same year/round are skipped unless ``force``,
+    and content parsed before comes straight from the parse cache. With
+    ``diff`` only changed cutoffs are written (see ``CutoffBulkWriter``).
+    """
+    results = []
+
+    def finish(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    pending = []
+    for path, year_obj, round_obj in files:
+        content_hash = _file_hash(path)
+        done = None if force else _already_imported(content_hash, year_obj, round_obj)
+        if done is not None:
+            now = timezone.now()
+            log = CutoffUploadLog.objects.create(
+                uploaded_file=done.uploaded_file.name, content_hash=content_hash, year=year_obj, round=round_obj,
+                status='skipped', state='done', pages_total=done.pages_total, pages_done=done.pages_total,
+                total_rows=done.total_rows, uploaded_by=user, started_at=now, finished_at=now,
+                error_message=f'Identical PDF already imported for this year/round (Upload #{done.id})',
+            )
+            finish(ImportResult(path, log))
+            continue
+
+        log = _create_log(
+            path, content_hash, year_obj, round_obj, user,
+            mode='diff' if diff else 'upsert', delete_missing=diff and delete_missing,
+        )
+        metrics = IngestMetrics()
+        with metrics.stage('read'):
+            cached = parse_cache.load(content_hash)
+        if cached is not None:
+            finish(ImportResult(
+                path, _save(log, cached.rows, cached.pages_total, metrics), cached.pages_total, cached=True
+            ))
+        else:
+            pending.append((path, log))
+
+    if not pending:
+        return results
+
+    if workers <= 1 or len(pending) == 1:
+        outcomes = ((path, log, _call(parse_pdf_file, path)) for path, log in pending)
+        for path, log, outcome in outcomes:
+            finish(_store_outcome(path, log, outcome))
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=setup_django) as pool:
+        futures = {pool.submit(parse_pdf_file, path): (path, log) for path, log in pending}
+        for future in as_completed(futures):
+            path, log = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = e
+            finish(_store_outcome(path, log, outcome))
+    return results
+
+
+def _call(func, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        return e
+
+
+def _store_outcome(path: str, log: CutoffUploadLog, outcome) -> ImportResult:
+    if isinstance(outcome, Exception):
+        return ImportResult(path, _fail(log, f'PDF error: {outcome}'))
+    rows, colleges_found, pages_total, seconds, metrics = outcome
+    if len(rows):
+        try:
+            parse_cache.store(log.content_hash, rows, colleges_found, pages_total)
+        except OSError:
+            pass
+    return ImportResult(path, _save(log, rows, pages_total, metrics), pages_total, seconds)
@@ -0,0 +1,62 @@
+import threading
+from typing import Dict, Optional
+
+from ..models import College
+from .data_version import current_version
+
+
+def normalize_code(code: str) -> str:
+    return (code or '').strip().upper()
+
+
+class CollegeCodes:
+    """College code (``E001``) -> id for every college that has a code"""
+
+    def __init__(self, version: str = '0'):
+        self.version = version
+        self.ids: Dict[str, int] = {}
+
+    @classmethod
+    def build(cls, version: str = '0') -> 'CollegeCodes':
+        codes = cls(version)
+        codes.ids.update(College.objects.exclude(code='').values_list('code', 'id'))
+        return codes
+
+    def get(self, code: str) -> Optional[int]:
+        return self.ids.get(normalize_code(code))
+
+
+_lock = threading.Lock()
+_codes: Optional[CollegeCodes] = None
+
+
+def get_college_codes() -> CollegeCodes:
+    """The process-wide map, rebuilt whenever the data version moves on"""
+    global _codes
+    version = current_version()
+    codes = _codes
+    if codes is not None and codes.version == version:
+        return codes
+    with _lock:
+        if _codes is None or _codes.version != version:
+            _codes = CollegeCodes.build(version)
+        return _codes
+
+
+def college_id_from(params) -> Optional[int]:
+    """``college_id`` from request data, or the id for ``college_code`` (``E001``); None if neither is given
+
+    Raises ValueError for a non-integer id or an unknown code.
+    """
+    if params.get('college_id'):
+        try:
+            return int(params['college_id'])
+        except ValueError:
+            raise ValueError('college_id must be an integer')
+    code = params.get('college_code')
+    if not code:
+        return None
+    college_id = get_college_codes().get(code)
+    if college_id is None:
+        raise ValueError(f'unknown college_code {code!r}')
+    return college_id
@@ -0,0 +1,59 @@
+import os
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+
+
+VERSION_FILE_NAME = '.data_version'
+
+_lock = threading.Lock()
+_cached = {'key': None, 'version': '0'}
+
+
+def _version_path() -> str:
+    return os.path.join(settings.MEDIA_ROOT, VERSION_FILE_NAME)
+
+
+def current_version() -> str:
+    """Token that changes whenever cutoff/reference data is written.
+
+    The token lives in a small file so every process (web workers, the
+    upload worker, management commands) sees the same value without a DB
+    query; reads are a single ``stat`` unless the file changed.
+    """
+    path = _version_path()
+    try:
+        st = os.stat(path)
+    except OSError:
+        return '0'
+    key = (path, st.st_ino, st.st_mtime_ns, st.st_size)
+    if _cached['key'] == key:
+        return _cached['version']
+    try:
+        with open(path) as f:
+            version = f.read().strip() or '0'
+    except OSError:
+        return '0'
+    with _lock:
+        _cached['key'] = key
+        _cached['version'] = version
+    return version
+
+
+def bump_version() -> str:
+    """Publish a new data version (atomic rename, safe across processes)"""
+    version = uuid.uuid4().hex
+    path = _version_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, path)
+    return version
+
+
+def bump_on_commit(using=None):
+    """Bump the version once the current transaction commits (immediately in autocommit)"""
+    transaction.on_commit(bump_version, using=using)
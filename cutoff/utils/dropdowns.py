@@ -0,0 +1,63 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from ..models import Branch, Category, Cutoff
+from .data_version import current_version
+
+
+class DropdownMaps:
+    """Precomputed answers for the branch/category dropdown APIs.
+
+    ``branches[college_id]`` lists the branches a college has cutoffs for and
+    ``categories[(college_id, branch_id)]`` the categories that have cutoffs
+    for that pair (either id may be None, meaning "any"), so the endpoints
+    never join through ``Cutoff`` at request time.
+    """
+
+    def __init__(self, version: str = '0'):
+        self.version = version
+        self.branches: Dict[int, List[Dict]] = {}
+        self.categories: Dict[Tuple[Optional[int], Optional[int]], List[Dict]] = {}
+
+    @classmethod
+    def build(cls, version: str = '0') -> 'DropdownMaps':
+        maps = cls(version)
+        all_branches = list(Branch.objects.order_by('name').values('id', 'name', 'code'))
+        all_categories = list(Category.objects.order_by('code').values('id', 'code', 'description'))
+        branch_ids = {}
+        category_ids = {}
+        pairs = Cutoff.objects.order_by().values_list('college_id', 'branch_id', 'category_id').distinct()
+        for college_id, branch_id, category_id in pairs.iterator(chunk_size=5000):
+            branch_ids.setdefault(college_id, set()).add(branch_id)
+            for key in ((college_id, branch_id), (college_id, None), (None, branch_id)):
+                category_ids.setdefault(key, set()).add(category_id)
+
+        for college_id, ids in branch_ids.items():
+            maps.branches[college_id] = [b for b in all_branches if b['id'] in ids]
+        maps.categories[(None, None)] = all_categories
+        for key, ids in category_ids.items():
+            maps.categories[key] = [c for c in all_categories if c['id'] in ids]
+        return maps
+
+    def branches_for(self, college_id: int) -> List[Dict]:
+        return self.branches.get(college_id, [])
+
+    def categories_for(self, college_id: Optional[int], branch_id: Optional[int]) -> List[Dict]:
+        return self.categories.get((college_id, branch_id), [])
+
+
+_lock = threading.Lock()
+_maps: Optional[DropdownMaps] = None
+
+
+def get_maps() -> DropdownMaps:
+    """The process-wide maps, rebuilt whenever the data version moves on"""
+    global _maps
+    version = current_version()
+    maps = _maps
+    if maps is not None and maps.version == version:
+        return maps
+    with _lock:
+        if _maps is None or _maps.version != version:
+            _maps = DropdownMaps.build(version)
+        return _maps
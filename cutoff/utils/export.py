@@ -0,0 +1,116 @@
+import csv
+from typing import Dict, Iterable, Iterator, Tuple
+
+from ..models import Cutoff
+from .search import KEYSET_FIELDS
+
+
+EXPORT_CHUNK_SIZE = 5000
+
+# Rows per worksheet allowed by the XLSX format (Excel won't open larger sheets)
+XLSX_MAX_ROWS = 1048576
+
+# (header, queryset column)
+EXPORT_COLUMNS = (
+    ('college', 'college__name'),
+    ('city', 'college__city'),
+    ('branch', 'branch__name'),
+    ('category', 'category__code'),
+    ('category_description', 'category__description'),
+    ('year', 'year__year'),
+    ('round', 'round__name'),
+    ('round_number', 'round__round_number'),
+    ('cutoff_rank', 'cutoff_rank'),
+    ('closing_rank', 'closing_rank'),
+)
+
+EXPORT_HEADERS = [header for header, _ in EXPORT_COLUMNS]
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def export_rows(filters: Dict, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Tuple]:
+    """Joined cutoff rows as tuples, fetched through a server-side cursor ``chunk_size`` at a time"""
+    queryset = Cutoff.objects.filter(**filters).order_by(*KEYSET_FIELDS)
+    return queryset.values_list(*(column for _, column in EXPORT_COLUMNS)).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """File-like object whose ``write`` just hands the value back (for streaming csv.writer output)"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows: Iterable[Tuple]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADERS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_csv(rows: Iterable[Tuple], f):
+    writer = csv.writer(f)
+    writer.writerow(EXPORT_HEADERS)
+    writer.writerows(rows)
+
+
+def write_xlsx(rows: Iterable[Tuple], f, max_rows: int = XLSX_MAX_ROWS):
+    """Write with openpyxl's write-only workbook, which streams rows to disk
+
+    A sheet holds at most ``max_rows`` rows including its header, so larger
+    exports continue on ``Cutoffs 2``, ``Cutoffs 3``, ...
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows = None, max_rows
+    for row in rows:
+        if sheet_rows >= max_rows:
+            sheet = workbook.create_sheet('Cutoffs' if sheet is None else f'Cutoffs {len(workbook.worksheets) + 1}')
+            sheet.append(EXPORT_HEADERS)
+            sheet_rows = 1
+        sheet.append(row)
+        sheet_rows += 1
+    if sheet is None:
+        workbook.create_sheet('Cutoffs').append(EXPORT_HEADERS)
+    workbook.save(f)
+
+
+def write_parquet(rows: Iterable[Tuple], f, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Write one Parquet row group per ``chunk_size`` rows via pandas/pyarrow"""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('college', pa.string()),
+        ('city', pa.string()),
+        ('branch', pa.string()),
+        ('category', pa.string()),
+        ('category_description', pa.string()),
+        ('year', pa.int32()),
+        ('round', pa.string()),
+        ('round_number', pa.int32()),
+        ('cutoff_rank', pa.string()),
+        ('closing_rank', pa.int64()),
+    ])
+    rows = iter(rows)
+    with pq.ParquetWriter(f, schema) as writer:
+        while True:
+            chunk = [row for _, row in zip(range(chunk_size), rows)]
+            if not chunk:
+                break
+            frame = pd.DataFrame.from_records(chunk, columns=EXPORT_HEADERS)
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+
+
+WRITERS = {
+    'csv': write_csv,
+    'xlsx': write_xlsx,
+    'parquet': write_parquet,
+}
@@ -0,0 +1,399 @@
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+
+from ..models import College, Category, Cutoff, parse_rank
+from .branches import BranchCatalogue
+from .colleges import CollegeCodes, normalize_code
+from .data_version import bump_on_commit
+from .instrumentation import IngestMetrics
+from .parsed_rows import ParsedRows
+from . import stats
+from .trends import refresh_trends_on_commit
+
+
+BULK_BATCH_SIZE = 2000
+
+# Entries kept per kind in ``CutoffBulkWriter.change_set`` (counts are always exact)
+CHANGE_SET_LIMIT = 500
+
+_MISSING = object()
+
+CUTOFF_UNIQUE_FIELDS = ['college', 'branch', 'category', 'year', 'round']
+
+
+def chunked(iterable: Iterable, size: int):
+    """Yield lists of at most ``size`` items from ``iterable``"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class CutoffBulkWriter:
+    """Set-based upsert of parsed cutoff rows.
+
+    References (colleges by code, branches, categories) are resolved with a
+    handful of queries into in-memory maps, missing ones are created with
+    ``bulk_create`` (branches go through the ``BranchCatalogue``, so the
+    same course at two colleges is one row) and cutoffs are upserted on the
+    ``unique_cutoff`` constraint, one batch at a time inside a single
+    transaction.
+
+    With ``diff=True`` (for re-published PDFs) the year/round's existing
+    ranks are loaded in one query and only new or changed cutoffs are
+    written; identical rows are counted as ``unchanged`` and left alone.
+    ``delete_missing`` then also deletes cutoffs of the colleges in the
+    upload that the upload no longer lists. Changes are collected in
+    ``change_set``.
+
+    Rows may come from any iterable (e.g. ``PDFParser.iter_rows()``); only one
+    batch is materialised at a time. Reference resolution and cutoff writes are timed as the ``resolve`` and ``write`` stages of
+    ``metrics``.
+    """
+
+    def __init__(self, year_obj, round_obj, batch_size: int = BULK_BATCH_SIZE,
+                 diff: bool = False, delete_missing: bool = False, metrics: Optional[IngestMetrics] = None):
+        self.year = year_obj
+        self.round = round_obj
+        self.batch_size = batch_size
+        self.diff = diff
+        self.delete_missing = diff and delete_missing
+        self.metrics = metrics if metrics is not None else IngestMetrics()
+
+        self.total_rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.changes: Dict[str, List[Dict]] = {'inserted': [], 'updated': [], 'deleted': []}
+        self.errors: List[str] = []
+        self.colleges_created = 0
+        self.branches_created = 0
+        self.categories_created = 0
+
+        self._college_names: Dict[str, str] = {}       # college_code -> name
+        self._college_ids: Optional[Dict[str, int]] = None   # college_code -> id, loaded on first use
+        self._failed_colleges = set()
+        self._branches: Optional[BranchCatalogue] = None
+        self._branch_ids: Dict[Tuple[str, str], int] = {}   # (branch_code, branch_name) -> id
+        self._category_ids: Dict[str, int] = {}
+        self._loaded_colleges = set()
+        self._seen_keys = set()
+        self._existing: Optional[Dict[Tuple[int, int, int], Tuple[Optional[int], Optional[str]]]] = None
+
+    @classmethod
+    def for_log(cls, log, **kwargs) -> 'CutoffBulkWriter':
+        """Writer for an upload log's year/round, in the mode the upload asked for"""
+        return cls(log.year, log.round, diff=log.mode == 'diff', delete_missing=log.delete_missing, **kwargs)
+
+    def log_fields(self) -> Dict:
+        """Counts (and the diff-mode change set) to store on a ``CutoffUploadLog``"""
+        return {
+            'total_rows': self.total_rows,
+            'rows_written': self.rows_written,
+            'inserted_count': self.inserted,
+            'updated_count': self.updated,
+            'unchanged_count': self.unchanged,
+            'deleted_count': self.deleted,
+            'change_set': self.change_set if self.diff else {},
+        }
+
+    def write(self, parsed_data: Iterable[Dict]) -> Tuple[int, int, List[str]]:
+        """Upsert ``parsed_data`` in one transaction.
+
+        Once the rows are committed the data version is bumped (so in-memory
+        indexes such as the predictor rebuild) and the year/round's trend
+        aggregates are refreshed.
+        """
+        with transaction.atomic():
+            self._write_batches(parsed_data)
+            self._delete_missing()
+            self._after_write()
+        return self.inserted, self.updated, self.errors
+
+    def _after_write(self):
+        bump_on_commit()
+        if self.rows_written or self.deleted:
+            refresh_trends_on_commit(self.year, self.round)
+
+    @property
+    def rows_written(self) -> int:
+        return self.inserted + self.updated
+
+    @property
+    def change_set(self) -> Dict:
+        """Exact counts plus up to ``CHANGE_SET_LIMIT`` entries per kind"""
+        counts = {'inserted': self.inserted, 'updated': self.updated, 'deleted': self.deleted}
+        return {
+            'counts': dict(counts, unchanged=self.unchanged),
+            'truncated': any(len(self.changes[kind]) < n for kind, n in counts.items()),
+            **self.changes,
+        }
+
+    def _record_change(self, kind: str, college: str, branch: str, category: str, old, new):
+        entries = self.changes[kind]
+        if len(entries) < CHANGE_SET_LIMIT:
+            entries.append({'college': college, 'branch': branch, 'category': category, 'old': old, 'new': new})
+
+    def _write_batches(self, parsed_data: Iterable[Dict]):
+        if isinstance(parsed_data, ParsedRows):
+            records = parsed_data.iter_records()
+        else:
+            records = self._records_from_dicts(parsed_data)
+        for batch in chunked(records, self.batch_size):
+            self.total_rows += len(batch)
+            with transaction.atomic():
+                before = (self.inserted, self.colleges_created, self.branches_created, self.categories_created)
+                self._write_batch(batch)
+                with self.metrics.stage('write'):
+                    self._record_stats(before)
+
+    def _record_stats(self, before):
+        """Apply this batch's counts to the dashboard stats in the batch's transaction"""
+        inserted, colleges, branches, categories = (
+            now - then for now, then in zip(
+                (self.inserted, self.colleges_created, self.branches_created, self.categories_created), before
+            )
+        )
+        stats.record_ingest(
+            self.year, self.round, inserted=inserted,
+            colleges={'Not Specified': colleges} if colleges else None,
+            branches=branches, categories=categories,
+        )
+
+    def _records_from_dicts(self, rows: Iterable[Dict]) -> Iterator[Tuple]:
+        """Turn row dicts into record tuples, reporting (and dropping) malformed rows"""
+        for row in rows:
+            try:
+                col_code = row['college_code']
+                yield (
+                    col_code,
+                    row.get('college_name') or col_code,
+                    row.get('branch_code', ''),
+                    row['branch_name'],
+                    row['category_code'],
+                    row['category_description'],
+                    row['cutoff_rank'],
+                )
+            except Exception as e:
+                self.total_rows += 1
+                self.errors.append(str(e))
+
+    # ---- reference resolution ----
+
+    def _resolve_colleges(self, colleges: Dict[str, str]):
+        """Map ``{code: name}`` to ids: by code, else adopt a code-less college of that name, else create it"""
+        if self._college_ids is None:
+            # Loaded per write rather than shared: ingest has to see its own uncommitted colleges
+            self._college_ids = CollegeCodes.build().ids
+        missing = {
+            code: name for code, name in colleges.items()
+            if code not in self._college_ids and code not in self._failed_colleges
+        }
+        if not missing:
+            return
+        adopted = {}
+        try:
+            with transaction.atomic():
+                # Colleges saved before codes were stored are matched by name, once
+                legacy = {}
+                for pk, name in College.objects.filter(code='', name__in=set(missing.values())).values_list('id', 'name'):
+                    legacy.setdefault(name, pk)
+                for code, name in missing.items():
+                    if name in legacy:
+                        adopted[code] = legacy.pop(name)
+                College.objects.bulk_update([College(id=pk, code=code) for code, pk in adopted.items()], ['code'])
+                to_create = [code for code in missing if code not in adopted]
+                College.objects.bulk_create(
+                    [College(code=code, name=missing[code], city='Not Specified') for code in to_create]
+                )
+        except Exception as e:
+            self.errors.append(str(e))
+            self._failed_colleges.update(missing)
+            return
+        self._college_ids.update(adopted)
+        if to_create:
+            self.colleges_created += len(to_create)
+            self._college_ids.update(
+                College.objects.filter(code__in=to_create).values_list('code', 'id')
+            )
+
+    def _resolve_branches(self, pairs):
+        missing = [p for p in pairs if p not in self._branch_ids]
+        if not missing:
+            return
+        if self._branches is None:
+            self._branches = BranchCatalogue.load()
+        created = self._branches.created
+        self._branch_ids.update(self._branches.resolve(missing))
+        self.branches_created += self._branches.created - created
+
+    def _resolve_categories(self, descriptions):
+        missing = [c for c in descriptions if c not in self._category_ids]
+        if not missing:
+            return
+        self._category_ids.update(
+            Category.objects.filter(code__in=missing).values_list('code', 'id')
+        )
+        to_create = [c for c in missing if c not in self._category_ids]
+        if to_create:
+            Category.objects.bulk_create(
+                [Category(code=c, description=descriptions[c]) for c in to_create]
+            )
+            self.categories_created += len(to_create)
+            self._category_ids.update(
+                Category.objects.filter(code__in=to_create).values_list('code', 'id')
+            )
+
+    def _load_existing_ranks(self):
+        """Diff mode: every cutoff of the year/round, ``key -> (id, cutoff_rank)``, in one query"""
+        if self._existing is not None:
+            return
+        rows = Cutoff.objects.filter(year=self.year, round=self.round).order_by().values_list(
+            'college_id', 'branch_id', 'category_id', 'id', 'cutoff_rank'
+        )
+        self._existing = {
+            (college_id, branch_id, category_id): (pk, rank)
+            for college_id, branch_id, category_id, pk, rank in rows.iterator(chunk_size=5000)
+        }
+
+    def _load_existing_keys(self, college_ids):
+        """Remember which cutoffs already exist so inserts and updates can be counted"""
+        pending = [c for c in college_ids if c not in self._loaded_colleges]
+        if not pending:
+            return
+        self._seen_keys.update(
+            Cutoff.objects.filter(
+                year=self.year, round=self.round, college_id__in=pending
+            ).order_by().values_list('college_id', 'branch_id', 'category_id')
+        )
+        self._loaded_colleges.update(pending)
+
+    # ---- writing ----
+
+    def _write_batch(self, batch: List[Tuple]):
+        with self.metrics.stage('resolve'):
+            rows = self._resolve_batch(batch)
+        if rows:
+            with self.metrics.stage('write'):
+                self._write_cutoffs(rows)
+
+    def _resolve_batch(self, batch: List[Tuple]) -> Optional[List[Tuple]]:
+        """Resolve the batch's references; ``(college_code, branch, category_code, description, rank)`` rows"""
+        rows = []
+        for col_code, col_name, branch_code, branch_name, cat_code, cat_desc, rank in batch:
+            col_code = normalize_code(col_code)
+            # The first name seen for a college code wins
+            self._college_names.setdefault(col_code, col_name)
+            rows.append((col_code, (branch_code, branch_name), cat_code, cat_desc, rank))
+
+        self._resolve_colleges({r[0]: self._college_names[r[0]] for r in rows})
+        rows = [r for r in rows if r[0] in self._college_ids]
+        created = (self.branches_created, self.categories_created)
+        try:
+            with transaction.atomic():
+                self._resolve_branches(dict.fromkeys(r[1] for r in rows))
+                self._resolve_categories({r[2]: r[3] for r in rows})
+        except Exception as e:
+            # Rolled back, so nothing was created and the catalogue's ids may be stale
+            self.branches_created, self.categories_created = created
+            self._branches = None
+            self._branch_ids = {}
+            self.errors.append(str(e))
+            return None
+
+        if self.diff:
+            self._load_existing_ranks()
+        else:
+            self._load_existing_keys({self._college_ids[r[0]] for r in rows})
+        return rows
+
+    def _write_cutoffs(self, rows: List[Tuple]):
+        cutoffs = {}
+        changes = []
+        inserted = updated = unchanged = 0
+        seen_in_batch = set()
+        for col_code, branch, cat_code, _, rank in rows:
+            college_id = self._college_ids[col_code]
+            key = (college_id, self._branch_ids[branch], self._category_ids[cat_code])
+            if self.diff:
+                seen_in_batch.add(key)
+                pk, old = self._existing.get(key, (None, _MISSING))
+                if old == rank:
+                    unchanged += 1
+                    continue
+                # The map tracks the table as it will be once this batch commits
+                self._existing[key] = (pk, rank)
+                if old is _MISSING:
+                    inserted += 1
+                    changes.append(('inserted', col_code, branch[0] or branch[1], cat_code, None, rank))
+                else:
+                    updated += 1
+                    changes.append(('updated', col_code, branch[0] or branch[1], cat_code, old, rank))
+            elif key in self._seen_keys or key in seen_in_batch:
+                updated += 1
+            else:
+                inserted += 1
+                seen_in_batch.add(key)
+            cutoffs[key] = Cutoff(
+                college_id=key[0], branch_id=key[1], category_id=key[2],
+                year=self.year, round=self.round, cutoff_rank=rank, closing_rank=parse_rank(rank),
+            )
+
+        if not cutoffs:
+            self._seen_keys.update(seen_in_batch)
+            self.unchanged += unchanged
+            return
+        try:
+            with transaction.atomic():
+                Cutoff.objects.bulk_create(
+                    list(cutoffs.values()),
+                    update_conflicts=True,
+                    unique_fields=CUTOFF_UNIQUE_FIELDS,
+                    update_fields=['cutoff_rank', 'closing_rank', 'updated_at'],
+                )
+        except Exception as e:
+            self.errors.append(str(e))
+            # Rolled back: reload the ranks the table really holds
+            self._existing = None
+            return
+
+        self._seen_keys.update(seen_in_batch)
+        self.inserted += inserted
+        self.updated += updated
+        self.unchanged += unchanged
+        for change in changes:
+            self._record_change(*change)
+
+    def _delete_missing(self):
+        """Diff mode: delete cutoffs of the uploaded colleges that the upload no longer lists"""
+        if not self.delete_missing or self._existing is None:
+            return
+        with self.metrics.stage('write'):
+            self._delete_stale()
+
+    def _delete_stale(self):
+        if self.errors:
+            self.errors.append('Cutoffs missing from the upload were not deleted because of the errors above')
+            return
+        colleges = {key[0] for key in self._seen_keys}
+        stale = [
+            pk for key, (pk, _) in self._existing.items()
+            if pk is not None and key[0] in colleges and key not in self._seen_keys
+        ]
+        if not stale:
+            return
+        details = Cutoff.objects.filter(id__in=stale[:CHANGE_SET_LIMIT]).values_list(
+            'college__code', 'branch__code', 'branch__name', 'category__code', 'cutoff_rank'
+        )
+        with transaction.atomic():
+            for college, branch_code, branch_name, category, rank in details:
+                self._record_change('deleted', college, branch_code or branch_name, category, rank, None)
+            for ids in chunked(stale, 500):
+                Cutoff.objects.filter(id__in=ids).delete()
+            stats.record_ingest(self.year, self.round, deleted=len(stale))
+        self.deleted = len(stale)
@@ -0,0 +1,182 @@
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.db import connection
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Ingest stages in pipeline order; anything else (e.g. 'other') is listed after them
+STAGES = ('read', 'extract', 'parse', 'resolve', 'write')
+
+# Slowest pages kept in the stored metrics
+SLOWEST_PAGES = 5
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process (since the last ``reset_peak_rss``), or None if unknown"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def reset_peak_rss() -> bool:
+    """Restart the peak reported by ``peak_rss_mb`` from the current RSS (Linux only); True if it was reset"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+class IngestMetrics:
+    """Wall time, CPU time and query counts per ingest stage.
+
+    Stages are timed with ``stage()`` blocks, or with ``timed()`` for work
+    done lazily inside a generator (only the time spent producing items is
+    charged, not the time the consumer spends on them). ``count_queries()``
+    charges every query to the innermost open ``stage()``, or to ``other``.
+    Extraction is timed per page by the parser, in whichever process did
+    the work, and added with ``add_pages()``. ``as_dict()`` is what gets
+    stored on ``CutoffUploadLog.metrics``.
+
+    Instances pickle with the time elapsed so far, so a parser pool worker
+    can hand its metrics back to the process that writes the rows.
+
+    Peak memory is per ingest: creating an instance resets the process's
+    high-water mark where the OS allows it (Linux). Elsewhere the lifetime
+    peak is only reported when this ingest raised it, and is None otherwise.
+    A pickled instance keeps the peak of the process it came from, and
+    reports the larger one; page-extraction pool workers are not covered.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict] = {}
+        self.page_stats: List[Dict] = []
+        self._active: List[str] = []
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._peak_reset = reset_peak_rss()
+        self._peak_before = peak_rss_mb()
+        self._peak_carried: Optional[float] = None
+
+    def __getstate__(self):
+        # Clocks are per process: carry elapsed time across and rebase it on unpickling
+        state = dict(self.__dict__, _active=[])
+        state['_wall'] = time.perf_counter() - self._wall
+        state['_cpu'] = time.process_time() - self._cpu
+        state['_peak_carried'] = self.peak_rss_mb()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._wall = time.perf_counter() - state['_wall']
+        self._cpu = time.process_time() - state['_cpu']
+        self._peak_reset = reset_peak_rss()
+        self._peak_before = peak_rss_mb()
+
+    def _bucket(self, name: str) -> Dict:
+        return self.stages.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'queries': 0})
+
+    def add(self, name: str, wall: float, cpu: float = 0.0, queries: int = 0):
+        bucket = self._bucket(name)
+        bucket['wall'] += wall
+        bucket['cpu'] += cpu
+        bucket['queries'] += queries
+
+    @contextmanager
+    def stage(self, name: str):
+        self._active.append(name)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._active.pop()
+            self.add(name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def timed(self, iterable: Iterable, name: str) -> Iterator:
+        """Yield from ``iterable``, charging the time spent producing each item to ``name``"""
+        iterator = iter(iterable)
+        bucket = self._bucket(name)
+        while True:
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                bucket['wall'] += time.perf_counter() - wall
+                bucket['cpu'] += time.process_time() - cpu
+            yield item
+
+    def add_pages(self, page_stats: List[Dict], wall: Optional[float] = None):
+        """Charge per-page extraction (``PDFParser.page_stats``) to the ``extract`` stage
+
+        Pages extracted by pool workers overlap in time, so pass the elapsed
+        ``wall`` time spent waiting on them; by default the page times are
+        summed. CPU time is always summed over the processes that did the work.
+        """
+        self.page_stats.extend(page_stats)
+        if wall is None:
+            wall = sum(p['seconds'] for p in page_stats)
+        self.add('extract', wall, sum(p.get('cpu', 0.0) for p in page_stats))
+
+    def peak_rss_mb(self) -> Optional[float]:
+        """Peak RSS during the ingest, or None when it can't be told apart from earlier work"""
+        peak = peak_rss_mb()
+        if peak is not None and not self._peak_reset and self._peak_before is not None and peak <= self._peak_before:
+            peak = None
+        peaks = [p for p in (peak, self._peak_carried) if p is not None]
+        return max(peaks) if peaks else None
+
+    @contextmanager
+    def count_queries(self):
+        def count(execute, sql, params, many, context):
+            self._bucket(self._active[-1] if self._active else 'other')['queries'] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            yield
+
+    def as_dict(self, pages: int = 0, rows: int = 0) -> Dict:
+        wall = time.perf_counter() - self._wall
+        order = {name: i for i, name in enumerate(STAGES)}
+        backends = {}
+        for page in self.page_stats:
+            backend = backends.setdefault(page['backend'], {'pages': 0, 'seconds': 0.0})
+            backend['pages'] += 1
+            backend['seconds'] += page['seconds']
+        slowest = sorted(self.page_stats, key=lambda p: p['seconds'], reverse=True)[:SLOWEST_PAGES]
+        return {
+            'stages': {
+                name: {'wall': round(b['wall'], 3), 'cpu': round(b['cpu'], 3), 'queries': b['queries']}
+                for name, b in sorted(self.stages.items(), key=lambda item: order.get(item[0], len(STAGES)))
+            },
+            'total': {
+                'wall': round(wall, 3),
+                'cpu': round(time.process_time() - self._cpu, 3),
+                'queries': sum(b['queries'] for b in self.stages.values()),
+            },
+            'pages': pages,
+            'rows': rows,
+            'pages_per_second': round(pages / wall, 1) if wall and pages else 0,
+            'rows_per_second': round(rows / wall, 1) if wall and rows else 0,
+            'peak_rss_mb': self.peak_rss_mb(),
+            'backends': {name: dict(b, seconds=round(b['seconds'], 3)) for name, b in backends.items()},
+            'slowest_pages': [{'page': p['page'], 'backend': p['backend'], 'seconds': p['seconds']} for p in slowest],
+        }
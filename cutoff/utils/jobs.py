@@ -0,0 +1,226 @@
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import CutoffUploadLog
+from . import parse_cache
+from .ingest import CutoffBulkWriter
+from .instrumentation import IngestMetrics
+from .parse_cache import file_sha256
+from .parsed_rows import ParsedRows
+from .pdf_parser import EmptyPDFError, PDFParser
+
+
+def enqueue_upload(pdf_file, year_obj, round_obj, user, mode: str = 'upsert',
+                   delete_missing: bool = False) -> CutoffUploadLog:
+    """Store an uploaded PDF and queue it for the ingest worker
+
+    ``mode`` is ``'upsert'`` or ``'diff'`` (write only what changed, see
+    ``CutoffBulkWriter``); ``delete_missing`` only applies to diff mode.
+
+    Uploads are identified by the SHA-256 of their content. A file that was
+    uploaded before is not stored again; the new log points at the existing
+    copy. If the same content was already queued or processed for this
+    year/round the upload is recorded as skipped and never queued.
+    """
+    content_hash = file_sha256(pdf_file)
+    previous = CutoffUploadLog.objects.filter(content_hash=content_hash).exclude(uploaded_file='')
+
+    done = previous.filter(year=year_obj, round=round_obj).exclude(status='failed').order_by('created_at').first()
+    if done is not None:
+        now = timezone.now()
+        return CutoffUploadLog.objects.create(
+            uploaded_file=done.uploaded_file.name,
+            content_hash=content_hash,
+            year=year_obj,
+            round=round_obj,
+            status='skipped',
+            state='done',
+            pages_total=done.pages_total,
+            pages_done=done.pages_total,
+            total_rows=done.total_rows,
+            error_message=f'Identical PDF already uploaded for this year/round (Upload #{done.id})',
+            uploaded_by=user,
+            started_at=now,
+            finished_at=now,
+        )
+
+    stored = next(
+        (log.uploaded_file.name for log in previous[:5] if log.uploaded_file.storage.exists(log.uploaded_file.name)),
+        None
+    )
+    return CutoffUploadLog.objects.create(
+        uploaded_file=stored or pdf_file,
+        content_hash=content_hash,
+        year=year_obj,
+        round=round_obj,
+        status='pending',
+        state='queued',
+        mode=mode,
+        delete_missing=delete_missing,
+        uploaded_by=user,
+    )
+
+
+def claim_next_job() -> Optional[CutoffUploadLog]:
+    """Atomically move the oldest queued upload to ``parsing`` and return it.
+
+    The conditional UPDATE makes it safe to run several workers against the
+    same database: only one of them can win a given row.
+    """
+    queued = CutoffUploadLog.objects.filter(state='queued').order_by('created_at', 'id')
+    for job_id in queued.values_list('id', flat=True)[:5]:
+        now = timezone.now()
+        claimed = CutoffUploadLog.objects.filter(id=job_id, state='queued').update(
+            state='parsing', started_at=now, updated_at=now
+        )
+        if claimed:
+            return CutoffUploadLog.objects.select_related('year', 'round').get(id=job_id)
+    return None
+
+
+class JobAbandoned(Exception):
+    """The job was failed as stale (see ``fail_stale_jobs``) while this worker was still running it"""
+
+
+def fail_stale_jobs(timeout: Optional[float] = None) -> int:
+    """Fail uploads a dead worker left in ``parsing``/``saving``; returns how many
+
+    Running jobs bump ``updated_at`` with every parsed page, so a job is
+    stale once that heartbeat is more than ``timeout`` seconds old
+    (``settings.CUTOFF_UPLOAD_JOB_TIMEOUT`` by default). Such jobs are failed
+    rather than re-queued, since a PDF that killed the worker would kill it
+    again; re-uploading the same file is not skipped. A worker that was only
+    stalled finds its job gone at its next update and stops, rolling back
+    anything it had started writing.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'CUTOFF_UPLOAD_JOB_TIMEOUT', 15 * 60)
+    now = timezone.now()
+    return CutoffUploadLog.objects.filter(
+        state__in=['parsing', 'saving'], updated_at__lt=now - timedelta(seconds=timeout)
+    ).update(
+        state='done', status='failed', finished_at=now,
+        error_message='The upload worker stopped before finishing this upload; please upload the PDF again',
+    )
+
+
+def _update(log: CutoffUploadLog, **fields):
+    """Record progress on a running job (also its heartbeat); raises ``JobAbandoned`` if it was failed as stale"""
+    fields['updated_at'] = timezone.now()
+    for name, value in fields.items():
+        setattr(log, name, value)
+    if not CutoffUploadLog.objects.filter(id=log.id).exclude(state='done').update(**fields):
+        raise JobAbandoned(f'Upload #{log.id} was failed as stale by another worker')
+
+
+def run_job(log: CutoffUploadLog) -> CutoffUploadLog:
+    """Parse and save a claimed upload, recording progress on the log row
+
+    Page progress is committed while the PDF is parsed into a compact
+    ``ParsedRows``; the cutoffs and the final status are then written in one
+    transaction, so a job that fails (or is failed as stale) leaves no
+    partial round behind. Time, queries and memory per stage are stored in
+    ``log.metrics``.
+    """
+    metrics = IngestMetrics()
+    try:
+        if log.year is None or log.round is None:
+            raise ValueError('Upload has no year/round assigned')
+
+        def on_page(pages_done, pages_total):
+            fields = {'pages_done': pages_done, 'pages_total': pages_total}
+            if log.state == 'parsing' and pages_done == pages_total:
+                fields['state'] = 'saving'
+            _update(log, **fields)
+
+        writer = CutoffBulkWriter.for_log(log, metrics=metrics)
+        with metrics.count_queries():
+            rows, errors = _parse(log, metrics, on_page)
+            if not rows:
+                _update(
+                    log, status='failed', state='done', finished_at=timezone.now(),
+                    error_message='; '.join(errors) if errors else 'No cutoff data found',
+                    metrics=metrics.as_dict(log.pages_total),
+                )
+                return log
+
+            with transaction.atomic():
+                _, _, write_errors = writer.write(rows)
+                errors = errors + write_errors
+                _update(
+                    log,
+                    status='success' if not errors else 'partial',
+                    state='done',
+                    error_message='; '.join(errors) if errors else '',
+                    finished_at=timezone.now(),
+                    metrics=metrics.as_dict(log.pages_total, writer.total_rows),
+                    **writer.log_fields(),
+                )
+    except JobAbandoned:
+        log.refresh_from_db()
+    except Exception as e:
+        try:
+            _update(
+                log, status='failed', state='done', finished_at=timezone.now(),
+                error_message=f'PDF error: {str(e)}', metrics=metrics.as_dict(log.pages_total),
+            )
+        except JobAbandoned:
+            log.refresh_from_db()
+    return log
+
+
+def _parse(log: CutoffUploadLog, metrics: IngestMetrics, on_page) -> Tuple[ParsedRows, List[str]]:
+    """Parse the upload (from the parse cache when possible); returns its rows and errors"""
+    with metrics.stage('read'):
+        cached = parse_cache.load(log.content_hash)
+    if cached is not None:
+        # Same content was parsed before: skip pdfplumber entirely
+        on_page(cached.pages_total, cached.pages_total)
+        return cached.rows, []
+
+    with log.uploaded_file.open('rb') as pdf_file:
+        parser = PDFParser(pdf_file, page_cache=True, metrics=metrics)
+        try:
+            rows = ParsedRows.from_rows(parser.iter_rows(progress=on_page))
+        except EmptyPDFError as e:
+            return ParsedRows(), [str(e)]
+    if rows and log.content_hash:
+        try:
+            parse_cache.store(log.content_hash, rows, parser.colleges_found, parser.pages_total)
+        except OSError:
+            pass
+    return rows, []
+
+
+def process_next_job() -> Optional[CutoffUploadLog]:
+    """Claim and run one queued upload, returning it or None if the queue is empty"""
+    log = claim_next_job()
+    if log is not None:
+        run_job(log)
+    return log
+
+
+def job_progress(log: CutoffUploadLog) -> dict:
+    """JSON-serialisable snapshot of an upload job"""
+    return {
+        'id': log.id,
+        'state': log.state,
+        'status': log.status,
+        'pages_done': log.pages_done,
+        'pages_total': log.pages_total,
+        'rows_written': log.rows_written,
+        'total_rows': log.total_rows,
+        'inserted_count': log.inserted_count,
+        'updated_count': log.updated_count,
+        'mode': log.mode,
+        'unchanged_count': log.unchanged_count,
+        'deleted_count': log.deleted_count,
+        'error_message': log.error_message,
+        'metrics': log.metrics,
+        'started_at': log.started_at.isoformat() if log.started_at else None,
+        'finished_at': log.finished_at.isoformat() if log.finished_at else None,
+    }
@@ -0,0 +1,199 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from .pdf_parser import PARSER_VERSION, parser_variant
+
+
+CACHE_DIR_NAME = 'page_cache'
+
+# Default size bound for the whole page cache
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def page_content_hash(page) -> str:
+    """SHA-256 of a pdfplumber page's content streams and the resources they draw with
+
+    The same content stream can render different text through other fonts,
+    ToUnicode maps or Form XObjects, so the page's resource dictionary is
+    hashed too, down to the data of every stream it references.
+    """
+    from pdfminer.pdftypes import resolve1
+
+    digest = hashlib.sha256()
+    for stream in page.page_obj.contents or ():
+        digest.update(resolve1(stream).get_data())
+    digest.update(b'\0resources')
+    _hash_object(digest, page.page_obj.resources, set())
+    return digest.hexdigest()
+
+
+def _hash_object(digest, obj, seen: set):
+    """Feed a PDF object to ``digest`` in a canonical form, following references once"""
+    from pdfminer.psparser import PSLiteral
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in seen:
+            # Already hashed (or a cycle back to a parent): its id is enough
+            digest.update(b'R%d;' % obj.objid)
+            return
+        seen.add(obj.objid)
+        try:
+            obj = obj.resolve()
+        except Exception:
+            digest.update(b'?;')
+            return
+    if isinstance(obj, PDFStream):
+        digest.update(b'S')
+        _hash_object(digest, obj.attrs, seen)
+        # Decoded data: pdfminer drops the raw bytes once a stream is decoded, and shared fonts may be already
+        digest.update(obj.get_data())
+        digest.update(b';')
+    elif isinstance(obj, dict):
+        digest.update(b'{')
+        for key in sorted(obj, key=str):
+            digest.update(str(key).encode('utf-8', 'replace') + b':')
+            _hash_object(digest, obj[key], seen)
+        digest.update(b'}')
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'[')
+        for item in obj:
+            _hash_object(digest, item, seen)
+        digest.update(b']')
+    elif isinstance(obj, PSLiteral):
+        digest.update(b'/' + str(obj.name).encode('utf-8', 'replace') + b';')
+    elif isinstance(obj, bytes):
+        digest.update(b'b%d:' % len(obj) + obj)
+    else:
+        digest.update(repr(obj).encode('utf-8', 'replace') + b';')
+
+
+class PageCache:
+    """Extracted pages on disk, keyed by the hash of each page's content stream and resources.
+
+    One gzip'd JSON file per page under ``MEDIA_ROOT/page_cache/<variant>-v<PARSER_VERSION>/``
+    holds what the engine extracted from it (text, or lines of words); the
+    variant (see ``parser_variant``) keeps pypdf fast-path text apart from
+    pdfplumber's, so turning ``fast_text`` off never serves pypdf text. When
+    a round PDF is re-issued with a few corrected pages, the unchanged pages
+    are read back from here and only the edited ones go through pdfminer;
+    parsing the extracted page into rows is cheap and redone every time, so
+    college and branch-continuation context across pages stays exact.
+
+    Hits refresh the file's mtime, and ``prune`` evicts least recently used
+    files until the cache fits in ``max_bytes``. Instances only hold a path
+    and a number, so they can be handed to parser pool workers.
+    """
+
+    def __init__(self, root: str, variant: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.variant = variant
+        self.directory = os.path.join(root, f'{variant}-v{PARSER_VERSION}')
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_settings(cls, engine: Optional[str] = None, fast_text: Optional[bool] = None) -> Optional['PageCache']:
+        """Cache for ``engine`` (with or without the fast path), or None when ``CUTOFF_PAGE_CACHE`` is off"""
+        if not getattr(settings, 'CUTOFF_PAGE_CACHE', True):
+            return None
+        return cls(
+            os.path.join(settings.MEDIA_ROOT, CACHE_DIR_NAME), parser_variant(engine, fast_text),
+            getattr(settings, 'CUTOFF_PAGE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES),
+        )
+
+    @staticmethod
+    def key(page) -> str:
+        return page_content_hash(page)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f'{key}.json.gz')
+
+    def load(self, key: str):
+        """The extracted page stored under ``key``, or None"""
+        path = self.path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                payload = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return payload['page']
+
+    def store(self, key: str, page):
+        """Write an extracted page (atomically replaces any existing entry)"""
+        path = self.path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                json.dump({'page': page}, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError:
+            # A cache that can't be written only costs speed
+            pass
+
+    # ---- maintenance ----
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """``(path, size, last_used)`` of every cached page, all engines and parser versions"""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """``{'<variant>-v<version>': {'pages': n, 'bytes': n}}`` for every cache generation on disk"""
+        stats = {}
+        for path, size, _ in self.entries():
+            generation = os.path.relpath(path, self.root).split(os.sep)[0]
+            bucket = stats.setdefault(generation, {'pages': 0, 'bytes': 0})
+            bucket['pages'] += 1
+            bucket['bytes'] += size
+        return stats
+
+    def prune(self, max_bytes: Optional[int] = None) -> Tuple[int, int]:
+        """Evict stale generations, then least recently used pages down to ``max_bytes``
+
+        A generation is stale when its parser version is not the current
+        one. Returns ``(pages_removed, bytes_freed)``.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        current = f'-v{PARSER_VERSION}'
+        entries = self.entries()
+        stale = [e for e in entries if not os.path.relpath(e[0], self.root).split(os.sep)[0].endswith(current)]
+        stale_paths = {path for path, _, _ in stale}
+        live = sorted((e for e in entries if e[0] not in stale_paths), key=lambda e: e[2])
+
+        total = sum(size for _, size, _ in live)
+        evict = list(stale)
+        for entry in live:
+            if total <= max_bytes:
+                break
+            evict.append(entry)
+            total -= entry[1]
+
+        removed = freed = 0
+        for path, size, _ in evict:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+            freed += size
+        return removed, freed
+
+    def clear(self):
+        """Remove every cached page"""
+        shutil.rmtree(self.root, ignore_errors=True)
@@ -0,0 +1,88 @@
+import gzip
+import hashlib
+import json
+import os
+from typing import Dict, Iterator, Optional
+
+from django.conf import settings
+
+from .parsed_rows import ParsedRows
+from .pdf_parser import PARSER_VERSION, parser_variant
+
+
+CACHE_DIR_NAME = 'parse_cache'
+
+# Bump when the on-disk layout changes
+CACHE_FORMAT = 3
+
+
+def file_sha256(f) -> str:
+    """SHA-256 of an uploaded or opened file, read in chunks"""
+    digest = hashlib.sha256()
+    if hasattr(f, 'chunks'):
+        for chunk in f.chunks():
+            digest.update(chunk)
+    else:
+        f.seek(0)
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+        f.seek(0)
+    return digest.hexdigest()
+
+
+def cache_path(content_hash: str, engine: Optional[str] = None, fast_text: Optional[bool] = None) -> str:
+    """Cache file for ``content_hash`` as parsed by ``engine`` with or without the pypdf fast path
+
+    Both default to the configured settings; see ``parser_variant``.
+    """
+    return os.path.join(
+        settings.MEDIA_ROOT, CACHE_DIR_NAME,
+        f'{content_hash}-{parser_variant(engine, fast_text)}-v{PARSER_VERSION}.{CACHE_FORMAT}.json.gz'
+    )
+
+
+class CachedParse:
+    """Parsed rows loaded back from the cache"""
+
+    def __init__(self, payload: Dict):
+        self.pages_total = payload['pages_total']
+        self.colleges_found = set(payload['colleges_found'])
+        self.rows = ParsedRows.from_payload(payload['rows'])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def iter_rows(self) -> Iterator[Dict]:
+        return iter(self.rows)
+
+
+def store(content_hash: str, rows: ParsedRows, colleges_found, pages_total: int, engine: Optional[str] = None,
+          fast_text: Optional[bool] = None):
+    """Write a parse result for ``content_hash`` (atomically replaces any existing entry)"""
+    path = cache_path(content_hash, engine, fast_text)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = {
+        'version': PARSER_VERSION,
+        'format': CACHE_FORMAT,
+        'pages_total': pages_total,
+        'colleges_found': sorted(colleges_found),
+        'rows': rows.to_payload(),
+    }
+    tmp_path = f'{path}.tmp'
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(payload, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def load(content_hash: str, engine: Optional[str] = None, fast_text: Optional[bool] = None) -> Optional[CachedParse]:
+    """Return the cached parse for ``content_hash`` or None"""
+    if not content_hash:
+        return None
+    try:
+        with gzip.open(cache_path(content_hash, engine, fast_text), 'rt', encoding='utf-8') as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if payload.get('version') != PARSER_VERSION or payload.get('format') != CACHE_FORMAT:
+        return None
+    return CachedParse(payload)
@@ -0,0 +1,179 @@
+from array import array
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+
+NO_RANK = -1          # '-', '--' or a missing cell
+RANK_OVERFLOW = -2    # token that doesn't round-trip through int64; kept in a side table
+
+_INT64_MAX = 2 ** 63 - 1
+
+
+class _StringTable:
+    """Interned values with stable integer ids"""
+
+    __slots__ = ('values', '_ids')
+
+    def __init__(self, values: Iterable = ()):
+        self.values = []
+        self._ids = {}
+        for value in values:
+            self.intern(value)
+
+    def intern(self, value) -> int:
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = self._ids[value] = len(self.values)
+            self.values.append(value)
+        return idx
+
+    def __getitem__(self, idx):
+        return self.values[idx]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class ParsedRows:
+    """Compact columnar store for parsed cutoff rows.
+
+    Colleges ``(code, name)``, branches ``(code, name)`` and categories
+    ``(code, description)`` are interned into tables; each row is an index
+    into each table plus an integer rank
+    (``NO_RANK`` for ``-``/``--``) and page number held in ``array`` columns.
+    Indexing or iterating yields the familiar row dicts, so callers that
+    expect ``extracted_data`` to be a list of dicts keep working.
+    """
+
+    def __init__(self):
+        self.colleges = _StringTable()
+        self.branches = _StringTable()
+        self.categories = _StringTable()
+        self.college_idx = array('I')
+        self.branch_idx = array('I')
+        self.category_idx = array('H')
+        self.ranks = array('q')
+        self.pages = array('H')
+        self._rank_overflow: Dict[int, str] = {}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict]) -> 'ParsedRows':
+        parsed = cls()
+        parsed.extend(rows)
+        return parsed
+
+    # ---- building ----
+
+    def append(self, row: Dict):
+        self.add(
+            row['college_code'], row['college_name'], row['branch_name'], row['category_code'],
+            row['category_description'], row['cutoff_rank'], row.get('page_num', 0), row.get('branch_code', ''),
+        )
+
+    def extend(self, rows: Iterable[Dict]):
+        for row in rows:
+            self.append(row)
+
+    def add(self, college_code: str, college_name: str, branch_name: str, category_code: str,
+            category_description: str, cutoff_rank: Optional[str], page_num: int = 0, branch_code: str = ''):
+        self.college_idx.append(self.colleges.intern((college_code, college_name)))
+        self.branch_idx.append(self.branches.intern((branch_code, branch_name)))
+        self.category_idx.append(self.categories.intern((category_code, category_description)))
+        self.pages.append(page_num)
+        if cutoff_rank is None:
+            self.ranks.append(NO_RANK)
+            return
+        value = int(cutoff_rank) if cutoff_rank.isdigit() else -1
+        if value < 0 or value > _INT64_MAX or str(value) != cutoff_rank:
+            self._rank_overflow[len(self.ranks)] = cutoff_rank
+            value = RANK_OVERFLOW
+        self.ranks.append(value)
+
+    # ---- reading ----
+
+    def __len__(self):
+        return len(self.ranks)
+
+    def rank_text(self, i: int) -> Optional[str]:
+        value = self.ranks[i]
+        if value == NO_RANK:
+            return None
+        if value == RANK_OVERFLOW:
+            return self._rank_overflow[i]
+        return str(value)
+
+    def row(self, i: int) -> Dict:
+        college_code, college_name = self.colleges[self.college_idx[i]]
+        branch_code, branch_name = self.branches[self.branch_idx[i]]
+        category_code, category_description = self.categories[self.category_idx[i]]
+        return {
+            'college_code': college_code,
+            'college_name': college_name,
+            'branch_code': branch_code,
+            'branch_name': branch_name,
+            'category_code': category_code,
+            'category_description': category_description,
+            'cutoff_rank': self.rank_text(i),
+            'page_num': self.pages[i],
+        }
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.row(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('row index out of range')
+        return self.row(i)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def __eq__(self, other):
+        if isinstance(other, (ParsedRows, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def iter_records(self) -> Iterator[Tuple[str, str, str, str, str, str, Optional[str]]]:
+        """Yield ``(college_code, college_name, branch_code, branch_name, category_code, category_description, cutoff_rank)``
+
+        Cheaper than the dict view: table lookups only, no per-row dicts.
+        """
+        colleges = self.colleges.values
+        branches = self.branches.values
+        categories = self.categories.values
+        for i, (c, b, k) in enumerate(zip(self.college_idx, self.branch_idx, self.category_idx)):
+            college_code, college_name = colleges[c]
+            branch_code, branch_name = branches[b]
+            category_code, category_description = categories[k]
+            yield (college_code, college_name, branch_code, branch_name,
+                   category_code, category_description, self.rank_text(i))
+
+    # ---- serialisation ----
+
+    def to_payload(self) -> Dict:
+        return {
+            'colleges': [list(c) for c in self.colleges.values],
+            'branches': [list(b) for b in self.branches.values],
+            'categories': [list(c) for c in self.categories.values],
+            'college_idx': self.college_idx.tolist(),
+            'branch_idx': self.branch_idx.tolist(),
+            'category_idx': self.category_idx.tolist(),
+            'ranks': self.ranks.tolist(),
+            'pages': self.pages.tolist(),
+            'rank_overflow': {str(k): v for k, v in self._rank_overflow.items()},
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> 'ParsedRows':
+        parsed = cls()
+        parsed.colleges = _StringTable(tuple(c) for c in payload['colleges'])
+        parsed.branches = _StringTable(tuple(b) for b in payload['branches'])
+        parsed.categories = _StringTable(tuple(c) for c in payload['categories'])
+        parsed.college_idx = array('I', payload['college_idx'])
+        parsed.branch_idx = array('I', payload['branch_idx'])
+        parsed.category_idx = array('H', payload['category_idx'])
+        parsed.ranks = array('q', payload['ranks'])
+        parsed.pages = array('H', payload['pages'])
+        parsed._rank_overflow = {int(k): v for k, v in payload['rank_overflow'].items()}
+        return parsed
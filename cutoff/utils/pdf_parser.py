@@ -1,49 +1,550 @@
+import io
+import os
 import pdfplumber
 import re
-from typing import Dict, List, Tuple
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from io import BytesIO
 
+from django.conf import settings
+
+from .instrumentation import IngestMetrics
+
+
+# Bump whenever parser output changes so cached parse results are invalidated
+PARSER_VERSION = 4
+
+# Category columns in the order they appear on every branch line
+CATEGORY_DESCRIPTIONS = {
+    '1G': 'General - 1st', '1K': 'Kannada - 1st', '1R': 'Reserved - 1st',
+    '2AG': 'OBC - 2nd', '2AK': 'OBC Kannada - 2nd', '2AR': 'OBC Reserved - 2nd',
+    '2BG': 'General - 2nd', '2BK': 'Kannada - 2nd', '2BR': 'Reserved - 2nd',
+    '3AG': 'SC - 3rd', '3AK': 'SC Kannada - 3rd', '3AR': 'SC Reserved - 3rd',
+    '3BG': 'SC - 3rd', '3BK': 'SC Kannada - 3rd', '3BR': 'SC Reserved - 3rd',
+    '4G': 'ST - 4th', '4K': 'ST Kannada - 4th', '4R': 'ST Reserved - 4th',
+    'STG': 'Special - General', 'STK': 'Special - Kannada', 'STR': 'Special - Reserved',
+    # Only produced by the word engine, which labels columns from the PDF's own header row
+    'GM': 'General Merit', 'GMK': 'General Merit - Kannada', 'GMR': 'General Merit - Reserved',
+    'SCG': 'SC - General', 'SCK': 'SC - Kannada', 'SCR': 'SC - Reserved',
+}
+CATEGORY_CODES = (
+    '1G', '1K', '1R', '2AG', '2AK', '2AR', '2BG', '2BK', '2BR', '3AG', '3AK',
+    '3AR', '3BG', '3BK', '3BR', '4G', '4K', '4R', 'STG', 'STK', 'STR',
+)
+CATEGORIES = tuple((code, CATEGORY_DESCRIPTIONS[code]) for code in CATEGORY_CODES)
+NO_RANK_TOKENS = frozenset({None, '-', '--'})
+
+COLLEGE_CODE_RE = re.compile(r'E\d{3}')
+COLLEGE_HEADER_RE = re.compile(r'E\d{3}\s+(.+?)(?:\s+\(|$)')
+PARENTHESISED_RE = re.compile(r'\s*\(.*?\)\s*')
+CATEGORY_HEADER_RE = re.compile(r'\b[0-9]G\s+[0-9]K\s+[0-9]R\b')
+# Code, name, then the ranks: the name stops at the first rank token so a
+# leading '--' (no allotment in 1G) stays with the ranks instead of the name
+BRANCH_LINE_RE = re.compile(r'^([A-Z]{2})\s+([A-Za-z][A-Za-z\s\.\-]*?)\s+((?:\d|--?(?=\s|$))(?=.*\d).*)$')
+RANK_TOKEN_RE = re.compile(r'--|-|\d+')
+DIGIT_RE = re.compile(r'\d')
+BRANCH_CODE_RE = re.compile(r'[A-Z]{2}')
+RANK_WORD_RE = re.compile(r'\d+|-+')
+
+# Words whose tops are this close (in points) belong to the same line
+LINE_TOLERANCE = 3
+
+
+def _pdf_path(pdf_file) -> Optional[str]:
+    """On-disk path of ``pdf_file``, if it has one
+
+    Covers plain paths, Django's ``TemporaryUploadedFile``, stored
+    ``FieldFile``s on a local storage and files opened with ``open()``.
+    """
+    if isinstance(pdf_file, (str, os.PathLike)):
+        return os.fspath(pdf_file)
+    temporary_file_path = getattr(pdf_file, 'temporary_file_path', None)
+    if callable(temporary_file_path):
+        return temporary_file_path()
+    if hasattr(pdf_file, 'storage'):
+        try:
+            return pdf_file.path
+        except NotImplementedError:
+            return None
+    name = getattr(pdf_file, 'name', None)
+    if isinstance(pdf_file, io.IOBase) and isinstance(name, str) and os.path.isfile(name):
+        return name
+    return None
+
+
+def _pdf_source(pdf_file) -> Union[str, bytes]:
+    """What to open a PDF from: its on-disk path when it has one, its bytes otherwise"""
+    path = _pdf_path(pdf_file)
+    if path is not None:
+        return path
+    return pdf_file.read()
+
+
+def _open_source(source: Union[str, bytes], stack: ExitStack):
+    """A fresh binary stream over ``source``; files opened here are closed with ``stack``"""
+    if isinstance(source, str):
+        return stack.enter_context(open(source, 'rb'))
+    return BytesIO(source)
+
+
+def _extract_page_range(source: Union[str, bytes], start: int, stop: int, engine: str = 'text',
+                        fast_text: bool = False, page_cache=None) -> List[Tuple[Optional[object], str, float, float]]:
+    """Extract pages ``start``..``stop`` with ``engine`` (runs inside pool workers)
+
+    ``source`` is the PDF's path, so each worker opens the file itself, or
+    its bytes for uploads that only live in memory. Returns
+    ``(extracted, backend, seconds, cpu_seconds)`` per page, like ``_extract_page``.
+    """
+    engine_cls = PARSER_ENGINES[engine]
+    with ExitStack() as stack, pdfplumber.open(_open_source(source, stack)) as pdf:
+        fast_reader = _open_fast_reader(source, stack) if fast_text and engine_cls.fast_path else None
+        return [_extract_page(engine_cls, pdf, fast_reader, index, page_cache) for index in range(start, stop)]
+
+
+def _extract_page(engine_cls, pdf, fast_reader, index: int,
+                  page_cache=None) -> Tuple[Optional[object], str, float, float]:
+    """Extract page ``index`` as ``(extracted, backend, seconds, cpu_seconds)``
+
+    A page whose content stream is in ``page_cache`` comes straight from
+    it. Otherwise the pypdf fast path is tried first when ``fast_reader`` is
+    given, and pdfplumber is used for pages it can't handle; either result
+    is added to the cache. Pages that fail to extract come back as ``None``
+    with backend ``'failed'`` so the caller can skip them.
+    """
+    start, cpu = time.perf_counter(), time.process_time()
+    page = pdf.pages[index]
+    key = None
+    if page_cache is not None:
+        try:
+            key = page_cache.key(page)
+        except Exception:
+            key = None
+        cached = page_cache.load(key) if key else None
+        if cached is not None:
+            return cached, 'cache', time.perf_counter() - start, time.process_time() - cpu
+
+    extracted = _fast_page_text(fast_reader, index) if fast_reader is not None else None
+    if extracted is not None:
+        backend = 'pypdf'
+    else:
+        try:
+            extracted, backend = engine_cls.extract(page), 'pdfplumber'
+        except Exception:
+            extracted, backend = None, 'failed'
+        # Release pdfminer layout objects so memory stays flat
+        page.close()
+    if key and extracted is not None:
+        page_cache.store(key, extracted)
+    return extracted, backend, time.perf_counter() - start, time.process_time() - cpu
+
+
+def _open_fast_reader(source: Union[str, bytes], stack: ExitStack):
+    """pypdf reader for the fast path, or None if pypdf is missing or can't open the file
+
+    pypdf gets a stream of its own: given a path it would read the whole
+    file into memory, and pdfminer's reads assume nobody else moves the
+    position of the stream it holds.
+    """
+    try:
+        from pypdf import PdfReader
+
+        return PdfReader(_open_source(source, stack))
+    except Exception:
+        return None
+
+
+def _fast_page_text(reader, index: int) -> Optional[str]:
+    """Layout-mode pypdf text of one page, or None if it fails ``_fast_text_ok``
+
+    The column padding of layout mode is collapsed to single spaces so lines
+    read like pdfplumber's.
+    """
+    try:
+        text = reader.pages[index].extract_text(extraction_mode='layout')
+    except Exception:
+        return None
+    text = '\n'.join(' '.join(line.split()) for line in text.split('\n'))
+    return text if _fast_text_ok(text) else None
+
+
+def _fast_text_ok(text: str) -> bool:
+    """Cheap structural checks on fast-path text
+
+    A category header row must come before the first branch line, and every
+    branch line must have between half and all of the header's columns
+    (cells glued together lower the count a little; text read out of order
+    changes it a lot). Pages without any branch line are handed to
+    pdfplumber as well.
+    """
+    columns = 0
+    branch_lines = 0
+    for line in text.split('\n'):
+        line = line.strip()
+        if CATEGORY_HEADER_RE.search(line):
+            columns = len(line.split())
+            continue
+        branch_match = BRANCH_LINE_RE.match(line)
+        if branch_match:
+            tokens = len(RANK_TOKEN_RE.findall(branch_match.group(3)))
+            if not columns or not columns // 2 <= tokens <= columns:
+                return False
+            branch_lines += 1
+    return branch_lines > 0
+
+
+class EmptyPDFError(ValueError):
+    """Raised when a PDF has no pages to extract"""
+
+
+class _LineParser:
+    """Line-at-a-time cutoff parser.
+
+    Each line is classified once (college header, category header, branch
+    row or noise) with precompiled patterns. The parser holds the current
+    college and a branch line whose name may continue on the next line, so
+    text can be fed page by page and rows come out as soon as they are
+    complete. College codes are collected in ``colleges_found`` as lines go by.
+    """
+
+    def __init__(self):
+        self.current_college_code = None
+        self.current_college_name = None
+        self.pending_branch = None  # (branch_code, branch_name, ranks_part, page_num) awaiting a possible continuation line
+        self.colleges_found = set()
+
+    def feed_page(self, text: str, page_num: int = 0) -> Iterator[Dict]:
+        for line in text.split('\n'):
+            yield from self.feed(line, page_num)
+
+    def feed(self, raw_line: str, page_num: int = 0) -> Iterator[Dict]:
+        line = raw_line.strip()
+
+        if self.pending_branch is not None:
+            branch_code, branch_name, ranks_part, branch_page = self.pending_branch
+            self.pending_branch = None
+            # If next line is pure text (no numbers), it's continuation of branch name
+            if line and len(line) < 50 and not DIGIT_RE.search(line):
+                yield from self._branch_rows(branch_code, branch_name + " " + line, ranks_part, branch_page)
+                return
+            yield from self._branch_rows(branch_code, branch_name, ranks_part, branch_page)
+
+        if len(line) < 3:
+            return
+
+        # College header line (contains "E" followed by 3 digits)
+        codes = COLLEGE_CODE_RE.findall(line)
+        if codes:
+            self.colleges_found.update(codes)
+            college_match = COLLEGE_HEADER_RE.search(line)
+            if college_match:
+                self.current_college_code = codes[0]
+                # Clean up college name
+                self.current_college_name = PARENTHESISED_RE.sub(' ', college_match.group(1).strip()).strip()
+                return
+
+        # Skip header lines with category codes
+        if CATEGORY_HEADER_RE.search(line):
+            return
+
+        # Branch data line: "XX BranchName Numbers..."
+        if self.current_college_code:
+            branch_match = BRANCH_LINE_RE.match(line)
+            if branch_match:
+                # Wait for the next line in case the branch name continues there
+                self.pending_branch = (
+                    branch_match.group(1), branch_match.group(2).strip(), branch_match.group(3), page_num
+                )
+
+    def close(self) -> Iterator[Dict]:
+        if self.pending_branch is not None:
+            branch_code, branch_name, ranks_part, branch_page = self.pending_branch
+            self.pending_branch = None
+            yield from self._branch_rows(branch_code, branch_name, ranks_part, branch_page)
+
+    def _branch_rows(self, branch_code: str, branch_name: str, ranks_part: str, page_num: int) -> Iterator[Dict]:
+        # Split by spaces but keep '-' and '--'
+        rank_parts = RANK_TOKEN_RE.findall(ranks_part)
+        rank_parts += [None] * (len(CATEGORIES) - len(rank_parts))
+
+        college_code = self.current_college_code
+        college_name = self.current_college_name
+        for (cat_code, cat_desc), part in zip(CATEGORIES, rank_parts):
+            yield {
+                'college_code': college_code,
+                'college_name': college_name,
+                'branch_code': branch_code,
+                'branch_name': branch_name,
+                'category_code': cat_code,
+                'category_description': cat_desc,
+                'cutoff_rank': None if part in NO_RANK_TOKENS else part,
+                'page_num': page_num
+            }
+
+
+def _extract_words(page) -> List[List[Tuple[float, float, str, Tuple[float, ...]]]]:
+    """A page as lines of ``(x0, x1, text, char_centres)`` words, top to bottom
+
+    Character centres are only kept for digit runs: that is all the word
+    engine needs to split cells that ``extract_text`` glues together.
+    """
+    lines = []
+    line_top = None
+    for word in page.extract_words(return_chars=True):
+        text = word['text']
+        centres = tuple((c['x0'] + c['x1']) / 2 for c in word['chars']) if text.isdigit() else ()
+        if line_top is None or word['top'] - line_top > LINE_TOLERANCE:
+            lines.append([])
+            line_top = word['top']
+        lines[-1].append((word['x0'], word['x1'], text, centres))
+    for words in lines:
+        words.sort()
+    return lines
+
+
+class _ColumnLayout:
+    """Category columns learned from a ``1G 1K 1R ...`` header row"""
+
+    def __init__(self, header_words):
+        self.codes = [word[2] for word in header_words]
+        centres = [(word[0] + word[1]) / 2 for word in header_words]
+        half_gap = (centres[1] - centres[0]) / 2 if len(centres) > 1 else header_words[0][1] - header_words[0][0]
+        # Left edge of every column; a point belongs to the last edge at or left of it
+        self.edges = [centres[0] - half_gap] + [(a + b) / 2 for a, b in zip(centres, centres[1:])]
+
+    @property
+    def left(self) -> float:
+        return self.edges[0]
+
+    def column(self, x: float) -> int:
+        return max(0, bisect_right(self.edges, x) - 1)
+
+    def is_header(self, words) -> bool:
+        return len(words) > 1 and words[0][2] == self.codes[0] and words[1][2] == self.codes[1]
+
+
+class _WordTableParser:
+    """Cutoff parser working on word coordinates instead of text lines.
+
+    The column layout is learned from the first category header row and
+    reused for the rest of the document, so later headers are recognised
+    by their first two words and skipped. Every rank is placed in the
+    column under which it sits, one character at a time, so a missing cell
+    leaves only that cell empty and cells printed without a gap between
+    them are split apart again. Branch name continuation lines are picked
+    up the same way as in ``_LineParser``.
+    """
+
+    def __init__(self):
+        self.layout: Optional[_ColumnLayout] = None
+        self.current_college_code = None
+        self.current_college_name = None
+        self.pending_branch = None  # (branch_code, branch_name, cells, page_num) awaiting a possible continuation line
+        self.colleges_found = set()
+
+    def feed_page(self, lines, page_num: int = 0) -> Iterator[Dict]:
+        for words in lines:
+            yield from self.feed(words, page_num)
+
+    def feed(self, words, page_num: int = 0) -> Iterator[Dict]:
+        line = ' '.join(word[2] for word in words)
+
+        if self.pending_branch is not None:
+            branch_code, branch_name, cells, branch_page = self.pending_branch
+            self.pending_branch = None
+            if line and len(line) < 50 and not DIGIT_RE.search(line) and words[-1][1] <= self.layout.left:
+                yield from self._branch_rows(branch_code, branch_name + " " + line, cells, branch_page)
+                return
+            yield from self._branch_rows(branch_code, branch_name, cells, branch_page)
+
+        if len(line) < 3:
+            return
+
+        codes = COLLEGE_CODE_RE.findall(line)
+        if codes:
+            self.colleges_found.update(codes)
+            college_match = COLLEGE_HEADER_RE.search(line)
+            if college_match:
+                self.current_college_code = codes[0]
+                self.current_college_name = PARENTHESISED_RE.sub(' ', college_match.group(1).strip()).strip()
+                return
+
+        if self.layout is None:
+            if CATEGORY_HEADER_RE.search(line):
+                self.layout = _ColumnLayout(words)
+            return
+        if self.layout.is_header(words):
+            return
+
+        if self.current_college_code and BRANCH_CODE_RE.fullmatch(words[0][2]):
+            branch = self._split_branch_line(words)
+            if branch is not None:
+                self.pending_branch = branch + (page_num,)
+
+    def close(self) -> Iterator[Dict]:
+        if self.pending_branch is not None:
+            branch_code, branch_name, cells, branch_page = self.pending_branch
+            self.pending_branch = None
+            yield from self._branch_rows(branch_code, branch_name, cells, branch_page)
+
+    def _split_branch_line(self, words) -> Optional[Tuple[str, str, Dict[int, str]]]:
+        """``(branch_code, branch_name, {column: digits})``, or None if the line has no ranks"""
+        name_words = []
+        cells: Dict[int, str] = {}
+        for x0, x1, text, centres in words[1:]:
+            if x1 <= self.layout.left or not RANK_WORD_RE.fullmatch(text):
+                if not cells:
+                    name_words.append(text)
+            elif centres:
+                for char, centre in zip(text, centres):
+                    column = self.layout.column(centre)
+                    cells[column] = cells.get(column, '') + char
+            else:
+                # '-' / '--': no allotment, but the cell is accounted for
+                cells.setdefault(self.layout.column((x0 + x1) / 2), '')
+        if not name_words or not name_words[0][0].isalpha() or not any(cells.values()):
+            return None
+        return words[0][2], ' '.join(name_words), cells
+
+    def _branch_rows(self, branch_code: str, branch_name: str, cells: Dict[int, str], page_num: int) -> Iterator[Dict]:
+        college_code = self.current_college_code
+        college_name = self.current_college_name
+        for column, cat_code in enumerate(self.layout.codes):
+            yield {
+                'college_code': college_code,
+                'college_name': college_name,
+                'branch_code': branch_code,
+                'branch_name': branch_name,
+                'category_code': cat_code,
+                'category_description': CATEGORY_DESCRIPTIONS.get(cat_code, cat_code),
+                'cutoff_rank': cells.get(column) or None,
+                'page_num': page_num
+            }
+
+
+class _TextEngine:
+    """``extract_text()`` per page, ranks matched line by line in column order"""
+    name = 'text'
+    # Plain text can come from pypdf instead of pdfplumber
+    fast_path = True
+
+    @staticmethod
+    def extract(page) -> str:
+        return page.extract_text() or ""
+
+    @staticmethod
+    def document_parser() -> _LineParser:
+        return _LineParser()
+
+
+class _WordEngine:
+    """``extract_words()`` per page, ranks placed in category columns by x-position"""
+    name = 'words'
+    fast_path = False
+
+    extract = staticmethod(_extract_words)
+
+    @staticmethod
+    def document_parser() -> _WordTableParser:
+        return _WordTableParser()
+
+
+PARSER_ENGINES = {engine.name: engine for engine in (_TextEngine, _WordEngine)}
+
+
+def parser_engine(name: Optional[str] = None) -> str:
+    """Validated engine name, defaulting to ``settings.CUTOFF_PARSER_ENGINE``"""
+    name = name or getattr(settings, 'CUTOFF_PARSER_ENGINE', 'text')
+    if name not in PARSER_ENGINES:
+        raise ValueError(f"Unknown parser engine {name!r} (choose from {', '.join(PARSER_ENGINES)})")
+    return name
+
+
+def parser_variant(engine: Optional[str] = None, fast_text: Optional[bool] = None) -> str:
+    """Name of what produces the rows, for cache keys: the engine, plus ``-fast`` with the pypdf fast path
+
+    The two backends extract slightly different text, so their results are
+    never served in place of each other.
+    """
+    engine = parser_engine(engine)
+    if fast_text is None:
+        fast_text = getattr(settings, 'CUTOFF_PARSER_FAST_TEXT', True)
+    return f'{engine}-fast' if fast_text and PARSER_ENGINES[engine].fast_path else engine
+
 
 class PDFParser:
-    """Parse KCET cutoff PDFs using fast text extraction"""
+    """Parse KCET cutoff PDFs using fast text extraction
+
+    ``engine`` picks how pages are read: ``'text'`` (``extract_text()`` and
+    line regexes) or ``'words'`` (word coordinates and category columns
+    learned from the header row). It defaults to
+    ``settings.CUTOFF_PARSER_ENGINE``.
+
+    With ``fast_text`` (``settings.CUTOFF_PARSER_FAST_TEXT`` by default) the
+    text engine reads pages with pypdf's layout mode first and only falls
+    back to pdfplumber for pages whose text fails ``_fast_text_ok``. The
+    backend, wall and CPU time of every page are kept in ``page_stats``;
+    opening the file, extraction and parsing are also timed on ``metrics``
+    (pass an ``IngestMetrics`` to share it with the rest of an ingest).
+
+    ``page_cache=True`` reuses pages extracted before from the on-disk
+    ``PageCache`` (when ``settings.CUTOFF_PAGE_CACHE`` is on), so only the
+    pages that changed in a re-issued PDF are extracted again.
+    """
 
-    def __init__(self, pdf_file):
+    def __init__(self, pdf_file, workers: Optional[int] = None, engine: Optional[str] = None,
+                 fast_text: Optional[bool] = None, page_cache: bool = False,
+                 metrics: Optional[IngestMetrics] = None):
         self.pdf_file = pdf_file
         self.parsed_data = []
+        self.colleges_found = set()
+        self.pages_total = 0
+        if workers is None:
+            workers = getattr(settings, 'CUTOFF_PARSER_WORKERS', 1)
+        self.workers = max(1, int(workers or 1))
+        self.engine = parser_engine(engine)
+        if fast_text is None:
+            fast_text = getattr(settings, 'CUTOFF_PARSER_FAST_TEXT', True)
+        self.fast_text = bool(fast_text) and PARSER_ENGINES[self.engine].fast_path
+        self.page_cache = None
+        if page_cache:
+            from .page_cache import PageCache
 
-    def parse(self) -> Tuple[bool, Dict]:
-        """Fast text-based parsing"""
+            self.page_cache = PageCache.from_settings(self.engine, self.fast_text)
+        self.page_stats: List[Dict] = []
+        # Wall time spent waiting on pool workers (None when pages are extracted in this process)
+        self.extract_wall: Optional[float] = None
+        self.metrics = metrics if metrics is not None else IngestMetrics()
+
+    def parse(self, progress: Optional[Callable[[int, int], None]] = None) -> Tuple[bool, Dict]:
+        """Fast text-based parsing
+
+        ``extracted_data`` in the result is a columnar ``ParsedRows``; index
+        or iterate it to get row dicts. ``pages`` lists the backend and time
+        of every page and ``backends`` counts pages per backend. ``progress``
+        is called as ``progress(pages_done, pages_total)`` after every page
+        is extracted.
+        """
         try:
             result = {'success': False, 'total_rows': 0, 'extracted_data': [], 'errors': [], 'colleges_found': []}
-            
-            if hasattr(self.pdf_file, 'read'):
-                pdf_content = self.pdf_file.read()
-            else:
-                with open(self.pdf_file, 'rb') as f:
-                    pdf_content = f.read()
-
-            pdf_bytes = BytesIO(pdf_content)
 
-            with pdfplumber.open(pdf_bytes) as pdf:
-                if len(pdf.pages) == 0:
-                    result['errors'].append('PDF has no pages')
-                    return False, result
+            from .parsed_rows import ParsedRows
 
-                full_text = ""
-                for page_num in range(len(pdf.pages)):  # Read ALL pages
-                    try:
-                        text = pdf.pages[page_num].extract_text() or ""
-                        full_text += text + "\n"
-                    except:
-                        pass
+            try:
+                parsed_rows = ParsedRows.from_rows(self.iter_rows(progress))
+            except EmptyPDFError as e:
+                result['errors'].append(str(e))
+                return False, result
 
-            parsed_rows = self._parse_text(full_text)
             if not parsed_rows:
                 result['errors'].append('No cutoff data found')
                 return False, result
 
-            college_codes = re.findall(r'E\d{3}', full_text)
-            result['colleges_found'] = list(set(college_codes))
+            result['colleges_found'] = list(self.colleges_found)
+            result['pages'] = self.page_stats
+            result['backends'] = self.backend_counts()
             result['extracted_data'] = parsed_rows
             result['total_rows'] = len(parsed_rows)
             result['success'] = True
@@ -52,132 +553,117 @@ class PDFParser:
         except Exception as e:
             return False, {'success': False, 'errors': [f'PDF error: {str(e)}'], 'total_rows': 0, 'extracted_data': [], 'colleges_found': []}
 
+    def iter_rows(self, progress: Optional[Callable[[int, int], None]] = None) -> Iterator[Dict]:
+        """Stream parsed rows one page at a time.
+
+        Only the current page is held in memory; college, column layout and
+        pending branch-continuation state carry across page boundaries.
+        College codes seen so far are collected in ``self.colleges_found``.
+        """
+        document_parser = PARSER_ENGINES[self.engine].document_parser()
+        self.colleges_found = document_parser.colleges_found
+        for page_num, page in self.iter_pages(progress):
+            if page is None:
+                continue
+            yield from self.metrics.timed(document_parser.feed_page(page, page_num), 'parse')
+        yield from self.metrics.timed(document_parser.close(), 'parse')
+        self.metrics.add_pages(self.page_stats, self.extract_wall)
+
+    def iter_pages(self, progress: Optional[Callable[[int, int], None]] = None) -> Iterator[Tuple[int, Optional[object]]]:
+        """Yield ``(page_num, extracted)`` in page order, as the engine extracts it
+
+        ``extracted`` is the page text for the text engine and its lines of
+        words for the word engine; None for pages that failed to extract.
+        How each page was extracted is recorded in ``page_stats``.
+        """
+        with ExitStack() as stack:
+            with self.metrics.stage('read'):
+                source = _pdf_source(self.pdf_file)
+                pdf = stack.enter_context(pdfplumber.open(_open_source(source, stack)))
+                total_pages = len(pdf.pages)
+            self.pages_total = total_pages
+            self.page_stats = []
+            self.extract_wall = None
+            if total_pages == 0:
+                raise EmptyPDFError('PDF has no pages')
+
+            if self.workers > 1 and total_pages > 1:
+                yield from self._iter_parallel(source, total_pages, progress)
+            else:
+                engine_cls = PARSER_ENGINES[self.engine]
+                with self.metrics.stage('read'):
+                    fast_reader = _open_fast_reader(source, stack) if self.fast_text else None
+                for page_num in range(total_pages):  # Read ALL pages
+                    extracted, backend, seconds, cpu = _extract_page(
+                        engine_cls, pdf, fast_reader, page_num, self.page_cache
+                    )
+                    self._record_page(page_num + 1, backend, seconds, cpu)
+                    if progress:
+                        progress(page_num + 1, total_pages)
+                    yield page_num + 1, extracted
+
+        if self.page_cache is not None and any(stat['backend'] != 'cache' for stat in self.page_stats):
+            # New pages were cached: keep the cache within its size bound
+            self.page_cache.prune()
+
+    def _iter_parallel(self, source: Union[str, bytes], total_pages: int, progress=None) -> Iterator[Tuple[int, Optional[object]]]:
+        """Split the page range across a process pool and yield pages back in order"""
+        workers = min(self.workers, total_pages)
+        step = -(-total_pages // workers)
+        slices = [(start, min(start + step, total_pages)) for start in range(0, total_pages, step)]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_extract_page_range, source, start, stop, self.engine, self.fast_text, self.page_cache)
+                for start, stop in slices
+            ]
+            self.extract_wall = 0.0
+            for (start, _), future in zip(slices, futures):
+                # Workers extract concurrently: the time spent waiting on them is the stage's wall time
+                waited = time.perf_counter()
+                pages = future.result()
+                self.extract_wall += time.perf_counter() - waited
+                for offset, (extracted, backend, seconds, cpu) in enumerate(pages):
+                    page_num = start + offset + 1
+                    self._record_page(page_num, backend, seconds, cpu)
+                    if progress:
+                        progress(page_num, total_pages)
+                    yield page_num, extracted
+
+    def _record_page(self, page_num: int, backend: str, seconds: float, cpu: float = 0.0):
+        self.page_stats.append({
+            'page': page_num, 'backend': backend, 'seconds': round(seconds, 4), 'cpu': round(cpu, 4),
+        })
+
+    def backend_counts(self) -> Dict[str, int]:
+        """Pages extracted per backend (``'cache'``, ``'pypdf'``, ``'pdfplumber'``, ``'failed'``)"""
+        counts: Dict[str, int] = {}
+        for stat in self.page_stats:
+            counts[stat['backend']] = counts.get(stat['backend'], 0) + 1
+        return counts
+
     def _parse_text(self, text: str) -> List[Dict]:
         """Parse cutoff lines from text"""
+        line_parser = _LineParser()
         parsed_rows = []
-        lines = text.split('\n')
-        
-        current_college_code = None
-        current_college_name = None
-        pending_branch_line = None  # For incomplete branch lines
-        
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line or len(line) < 3:
-                continue
-            
-            # Check if this is a college header line (contains "E" followed by 3 digits)
-            college_match = re.search(r'E\d{3}\s+(.+?)(?:\s+\(|$)', line)
-            if college_match and re.search(r'E\d{3}', line):
-                current_college_code = re.search(r'E\d{3}', line).group()
-                college_name = college_match.group(1).strip()
-                # Clean up college name
-                college_name = re.sub(r'\s*\(.*?\)\s*', ' ', college_name).strip()
-                current_college_name = college_name
-                pending_branch_line = None
-                continue
-            
-            # Skip header lines with category codes
-            if re.search(r'\b[0-9]G\s+[0-9]K\s+[0-9]R\b', line):
-                continue
-            
-            # Check if this is a branch data line (starts with 2 letter codes followed by numbers)
-            # Pattern: "XX BranchName Numbers..."
-            branch_match = re.match(r'^([A-Z]{2})\s+([A-Za-z\s\.\-]+?)\s+(\d.*)$', line)
-            if branch_match and current_college_code:
-                branch_code = branch_match.group(1)
-                branch_name = branch_match.group(2).strip()
-                ranks_part = branch_match.group(3)
-                
-                # Check next line for continuation (multi-line branch name)
-                if i + 1 < len(lines):
-                    next_line = lines[i + 1].strip()
-                    # If next line is pure text (no numbers), it's continuation of branch name
-                    if next_line and not re.search(r'\d', next_line) and len(next_line) < 50:
-                        branch_name += " " + next_line
-                        # Skip the next line in next iteration
-                        lines[i + 1] = ''
-                
-                # Parse ranks
-                # Split by spaces but keep '-' and '--'
-                rank_parts = re.findall(r'--|-|\d+', ranks_part)
-                
-                # Create records for each category
-                categories = ['1G', '1K', '1R', '2AG', '2AK', '2AR', '2BG', '2BK', '2BR', '3AG', '3AK', '3AR', '3BG', '3BK', '3BR', '4G', '4K', '4R', 'STG', 'STK', 'STR']
-                
-                for idx, cat_code in enumerate(categories):
-                    rank_value = None
-                    if idx < len(rank_parts):
-                        part = rank_parts[idx]
-                        if part and part not in ['-', '--']:
-                            rank_value = part
-                    
-                    parsed_rows.append({
-                        'college_code': current_college_code,
-                        'college_name': current_college_name,
-                        'branch_name': branch_name,
-                        'category_code': cat_code,
-                        'category_description': self._get_category_description(cat_code),
-                        'cutoff_rank': rank_value,
-                        'page_num': 0
-                    })
-        
+        for line in text.split('\n'):
+            parsed_rows.extend(line_parser.feed(line))
+        parsed_rows.extend(line_parser.close())
         return parsed_rows
 
     def _get_category_description(self, code: str) -> str:
         """Get category description"""
-        desc = {
-            '1G': 'General - 1st', '1K': 'Kannada - 1st', '1R': 'Reserved - 1st',
-            '2AG': 'OBC - 2nd', '2AK': 'OBC Kannada - 2nd', '2AR': 'OBC Reserved - 2nd',
-            '2BG': 'General - 2nd', '2BK': 'Kannada - 2nd', '2BR': 'Reserved - 2nd',
-            '3AG': 'SC - 3rd', '3AK': 'SC Kannada - 3rd', '3AR': 'SC Reserved - 3rd',
-            '3BG': 'SC - 3rd', '3BK': 'SC Kannada - 3rd', '3BR': 'SC Reserved - 3rd',
-            '4G': 'ST - 4th', '4K': 'ST Kannada - 4th', '4R': 'ST Reserved - 4th',
-            'STG': 'Special - General', 'STK': 'Special - Kannada', 'STR': 'Special - Reserved',
-        }
-        return desc.get(code, code)
-
-
-def save_cutoff_data(parsed_data: List[Dict], year_obj, round_obj) -> Tuple[int, int, List[str]]:
-    """Save parsed data to database"""
-    from ..models import College, Branch, Category, Cutoff
-
-    inserted = 0
-    updated = 0
-    errors = []
-    
-    colleges = {}
-    for row in parsed_data:
-        col_code = row.get('college_code', 'Unknown')
-        if col_code not in colleges:
-            colleges[col_code] = []
-        colleges[col_code].append(row)
-
-    for col_code, rows in colleges.items():
-        try:
-            # Use college_name from parsed data, fallback to code
-            col_name = rows[0].get('college_name', col_code) if rows else col_code
-            college, _ = College.objects.get_or_create(name=col_name, defaults={'city': 'Not Specified'})
-        except Exception as e:
-            errors.append(str(e))
-            continue
+        return CATEGORY_DESCRIPTIONS.get(code, code)
 
-        for row in rows:
-            try:
-                branch, _ = Branch.objects.get_or_create(
-                    college=college,
-                    name=row['branch_name']
-                )
-                category, _ = Category.objects.get_or_create(code=row['category_code'], defaults={'description': row['category_description']})
-                cutoff, created = Cutoff.objects.update_or_create(
-                    college=college, branch=branch, category=category, year=year_obj, round=round_obj,
-                    defaults={'cutoff_rank': row['cutoff_rank']}
-                )
-                if created:
-                    inserted += 1
-                else:
-                    updated += 1
-            except Exception as e:
-                errors.append(str(e))
-
-    return inserted, updated, errors
+
+def save_cutoff_data(parsed_data: Iterable[Dict], year_obj, round_obj, diff: bool = False,
+                     delete_missing: bool = False) -> Tuple[int, int, List[str]]:
+    """Save parsed data to database using set-based bulk upserts
+
+    ``parsed_data`` may be a list or a generator such as
+    ``PDFParser.iter_rows()``; it is consumed in fixed-size batches. ``diff``
+    writes only the cutoffs whose rank changed.
+    """
+    from .ingest import CutoffBulkWriter
+
+    return CutoffBulkWriter(year_obj, round_obj, diff=diff, delete_missing=delete_missing).write(parsed_data)
@@ -0,0 +1,125 @@
+import heapq
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from ..models import College, Branch, Category, Year, Round, Cutoff
+from .data_version import current_version
+
+
+class PredictorIndex:
+    """In-memory rank index answering "with rank R in category C, what can I get?"
+
+    Cutoffs with a numeric closing rank are grouped per (year, round,
+    category) and sorted by closing rank, so the eligible college/branch
+    pairs for a rank are one ``bisect`` away and already in order.
+    """
+
+    def __init__(self, version: str = '0'):
+        self.version = version
+        # (year_id, round_id, category_id) -> (closing ranks, [(college_id, branch_id), ...])
+        self.buckets: Dict[Tuple[int, int, int], Tuple[array, List[Tuple[int, int]]]] = {}
+        self.colleges: Dict[int, Tuple[str, str]] = {}
+        self.branches: Dict[int, str] = {}
+        self.category_ids: Dict[str, int] = {}
+        self.years: Dict[int, int] = {}
+        self.rounds: Dict[int, Tuple[str, Optional[int]]] = {}
+
+    @classmethod
+    def build(cls, version: str = '0') -> 'PredictorIndex':
+        index = cls(version)
+        grouped = {}
+        rows = Cutoff.objects.filter(closing_rank__isnull=False).order_by().values_list(
+            'year_id', 'round_id', 'category_id', 'closing_rank', 'college_id', 'branch_id'
+        )
+        for year_id, round_id, category_id, rank, college_id, branch_id in rows.iterator(chunk_size=5000):
+            grouped.setdefault((year_id, round_id, category_id), []).append((rank, college_id, branch_id))
+
+        for key, entries in grouped.items():
+            entries.sort()
+            index.buckets[key] = (
+                array('q', (rank for rank, _, _ in entries)),
+                [(college_id, branch_id) for _, college_id, branch_id in entries],
+            )
+
+        index.colleges = {pk: (name, city) for pk, name, city in College.objects.values_list('id', 'name', 'city')}
+        index.branches = dict(Branch.objects.values_list('id', 'name'))
+        index.category_ids = {code: pk for pk, code in Category.objects.values_list('id', 'code')}
+        index.years = dict(Year.objects.values_list('id', 'year'))
+        index.rounds = {pk: (name, number) for pk, name, number in Round.objects.values_list('id', 'name', 'round_number')}
+        return index
+
+    def latest_year_round(self, category_id: int) -> Tuple[Optional[int], Optional[int]]:
+        """Most recent (year_id, round_id) that has data for ``category_id``"""
+        keys = [(y, r) for y, r, c in self.buckets if c == category_id]
+        if not keys:
+            return None, None
+        return max(keys, key=lambda k: (self.years.get(k[0], 0), self.rounds.get(k[1], ('', 0))[1] or 0))
+
+    def eligible(self, rank: int, category_id: int, year_id: Optional[int] = None,
+                 round_id: Optional[int] = None, city: Optional[str] = None,
+                 limit: Optional[int] = None) -> List[Dict]:
+        """College/branch pairs whose closing rank is ``>= rank``, sorted by closing rank.
+
+        Without a year/round the latest year (and its latest round) with data
+        for the category is used.
+        """
+        if year_id is None and round_id is None:
+            year_id, round_id = self.latest_year_round(category_id)
+            if year_id is None:
+                return []
+
+        streams = []
+        for (y, r, c), (ranks, entries) in self.buckets.items():
+            if c != category_id or (year_id is not None and y != year_id) or (round_id is not None and r != round_id):
+                continue
+            streams.append(_from_rank(ranks, entries, rank, y, r))
+
+        city = city.strip().lower() if city else None
+        results = []
+        for closing_rank, y, r, (college_id, branch_id) in heapq.merge(*streams, key=lambda item: item[0]):
+            college_name, college_city = self.colleges.get(college_id, ('', ''))
+            if city and college_city.lower() != city:
+                continue
+            results.append({
+                'college_id': college_id,
+                'college': college_name,
+                'city': college_city,
+                'branch_id': branch_id,
+                'branch': self.branches.get(branch_id, ''),
+                'year': self.years.get(y),
+                'round': self.rounds.get(r, ('', None))[0],
+                'closing_rank': closing_rank,
+            })
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+
+def _from_rank(ranks: array, entries: List[Tuple[int, int]], rank: int, year_id: int, round_id: int):
+    for i in range(bisect_left(ranks, rank), len(ranks)):
+        yield ranks[i], year_id, round_id, entries[i]
+
+
+_lock = threading.Lock()
+_index: Optional[PredictorIndex] = None
+
+
+def get_index() -> PredictorIndex:
+    """The process-wide index, rebuilt whenever the data version moves on"""
+    global _index
+    version = current_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = PredictorIndex.build(version)
+        return _index
+
+
+def invalidate():
+    global _index
+    with _lock:
+        _index = None
@@ -0,0 +1,34 @@
+from typing import Dict, List
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ..models import College, Category, Year, Round
+from .data_version import current_version
+
+
+CACHE_KEY_PREFIX = 'cutoff:reference'
+
+
+def _load() -> Dict[str, List[Dict]]:
+    return {
+        'colleges': list(College.objects.order_by('name', 'code').values('id', 'code', 'name', 'city')),
+        'categories': list(Category.objects.order_by('code').values('id', 'code', 'description')),
+        'years': list(Year.objects.order_by('-year').values('id', 'year')),
+        'rounds': list(Round.objects.order_by('round_number').values('id', 'name', 'round_number')),
+    }
+
+
+def reference_data() -> Dict[str, List[Dict]]:
+    """Dropdown data (colleges, categories, years, rounds) as lists of dicts.
+
+    Cached under the current data version, so any write that bumps the
+    version (ingest, admin edits, ``populate_data``) is picked up on the
+    next request without explicit cache deletes.
+    """
+    key = f'{CACHE_KEY_PREFIX}:{current_version()}'
+    data = cache.get(key)
+    if data is None:
+        data = _load()
+        cache.set(key, data, settings.CUTOFF_REFERENCE_CACHE_TIMEOUT)
+    return data
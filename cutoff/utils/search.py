@@ -0,0 +1,115 @@
+import base64
+import json
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Q
+
+from ..models import Cutoff
+from .colleges import college_id_from
+
+
+# Keyset order: the columns of the ``unique_cutoff`` constraint, so the order
+# is total and follows that constraint's index
+KEYSET_FIELDS = ('college_id', 'branch_id', 'category_id', 'year_id', 'round_id')
+
+FILTER_FIELDS = KEYSET_FIELDS
+
+# (result key, queryset column) - only what the results table shows
+RESULT_COLUMNS = (
+    ('id', 'id'),
+    ('college_id', 'college_id'),
+    ('college', 'college__name'),
+    ('college_code', 'college__code'),
+    ('city', 'college__city'),
+    ('branch_id', 'branch_id'),
+    ('branch', 'branch__name'),
+    ('category_id', 'category_id'),
+    ('category', 'category__code'),
+    ('category_description', 'category__description'),
+    ('year_id', 'year_id'),
+    ('year', 'year__year'),
+    ('round_id', 'round_id'),
+    ('round', 'round__name'),
+    ('cutoff_rank', 'cutoff_rank'),
+    ('closing_rank', 'closing_rank'),
+)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidSearch(ValueError):
+    pass
+
+
+def parse_filters(params) -> Dict[str, int]:
+    """Integer id filters taken from request GET/POST data; blanks are ignored
+
+    ``college_code`` (``E001``) may be given instead of ``college_id``.
+    """
+    filters = {}
+    for field in FILTER_FIELDS:
+        value = params.get(field)
+        if not value:
+            continue
+        try:
+            filters[field] = int(value)
+        except ValueError:
+            raise InvalidSearch(f'{field} must be an integer')
+    if 'college_id' not in filters and params.get('college_code'):
+        try:
+            filters['college_id'] = college_id_from(params)
+        except ValueError as e:
+            raise InvalidSearch(str(e))
+    return filters
+
+
+def parse_page_size(value) -> int:
+    if not value:
+        return DEFAULT_PAGE_SIZE
+    try:
+        size = int(value)
+    except ValueError:
+        raise InvalidSearch('page_size must be an integer')
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(key: Tuple[int, ...]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, ...]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidSearch('invalid cursor')
+    if not (isinstance(key, list) and len(key) == len(KEYSET_FIELDS) and all(isinstance(v, int) for v in key)):
+        raise InvalidSearch('invalid cursor')
+    return tuple(key)
+
+
+def _after(key: Tuple[int, ...]) -> Q:
+    """Row-value comparison ``(college, branch, ...) > key`` spelled out as ORed prefixes"""
+    condition = Q()
+    for i, field in enumerate(KEYSET_FIELDS):
+        prefix = Q(**{f: v for f, v in zip(KEYSET_FIELDS[:i], key[:i])})
+        condition |= prefix & Q(**{f'{field}__gt': key[i]})
+    return condition
+
+
+def search_page(filters: Dict[str, int], cursor: Optional[str] = None,
+                page_size: int = DEFAULT_PAGE_SIZE) -> Tuple[List[Dict], Optional[str]]:
+    """One page of cutoffs matching ``filters`` plus the cursor for the next page (None on the last)"""
+    queryset = Cutoff.objects.filter(**filters)
+    if cursor:
+        queryset = queryset.filter(_after(decode_cursor(cursor)))
+    keys = [key for key, _ in RESULT_COLUMNS]
+    rows = queryset.order_by(*KEYSET_FIELDS).values_list(*(column for _, column in RESULT_COLUMNS))
+    results = [dict(zip(keys, row)) for row in rows[:page_size + 1]]
+
+    next_cursor = None
+    if len(results) > page_size:
+        results = results[:page_size]
+        next_cursor = encode_cursor(tuple(results[-1][field] for field in KEYSET_FIELDS))
+    return results, next_cursor
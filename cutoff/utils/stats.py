@@ -0,0 +1,111 @@
+from typing import Dict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from ..models import College, Branch, Category, Cutoff, PYQ, DashboardStats
+
+
+STATS_ID = 1
+
+
+def _sort_breakdown(entries):
+    return sorted(entries, key=lambda e: (-e['year'], e['round']))
+
+
+def recompute() -> DashboardStats:
+    """Rebuild the stats row from the tables (the repair path; scans Cutoff)"""
+    by_year_round = Cutoff.objects.order_by().values('year__year', 'round__name').annotate(count=Count('id'))
+    by_city = College.objects.order_by().values('city').annotate(count=Count('id'))
+    latest = Cutoff.objects.order_by('-updated_at').values_list('updated_at', flat=True).first()
+    fields = {
+        'total_colleges': College.objects.count(),
+        'total_branches': Branch.objects.count(),
+        'total_categories': Category.objects.count(),
+        'total_cutoffs': Cutoff.objects.count(),
+        'total_pyqs': PYQ.objects.count(),
+        'cutoffs_by_year_round': _sort_breakdown(
+            {'year': e['year__year'], 'round': e['round__name'], 'count': e['count']} for e in by_year_round
+        ),
+        'colleges_by_city': {e['city']: e['count'] for e in by_city},
+        'last_ingest_at': latest,
+    }
+    stats, _ = DashboardStats.objects.update_or_create(id=STATS_ID, defaults=fields)
+    return stats
+
+
+def get_stats() -> DashboardStats:
+    """The stats row, computed on first use"""
+    stats = DashboardStats.objects.filter(id=STATS_ID).first()
+    return stats if stats is not None else recompute()
+
+
+def adjust_totals(counters: Dict[str, int], **fields):
+    updates = {name: F(name) + delta for name, delta in counters.items() if delta}
+    updates.update(fields)
+    if updates:
+        DashboardStats.objects.filter(id=STATS_ID).update(**updates)
+
+
+def _adjust_breakdowns(year_obj=None, round_obj=None, cutoffs: int = 0, cities: Dict[str, int] = None):
+    """Read-modify-write of the JSON breakdowns under a row lock"""
+    with transaction.atomic():
+        stats = DashboardStats.objects.select_for_update().filter(id=STATS_ID).first()
+        if stats is None:
+            return
+        if cutoffs and year_obj is not None and round_obj is not None:
+            entries = list(stats.cutoffs_by_year_round)
+            for entry in entries:
+                if entry['year'] == year_obj.year and entry['round'] == round_obj.name:
+                    entry['count'] += cutoffs
+                    break
+            else:
+                entries.append({'year': year_obj.year, 'round': round_obj.name, 'count': cutoffs})
+            stats.cutoffs_by_year_round = _sort_breakdown(entries)
+        for city, delta in (cities or {}).items():
+            stats.colleges_by_city[city] = stats.colleges_by_city.get(city, 0) + delta
+        stats.save(update_fields=['cutoffs_by_year_round', 'colleges_by_city', 'updated_at'])
+
+
+def record_ingest(year_obj, round_obj, inserted: int = 0, colleges: Dict[str, int] = None,
+                  branches: int = 0, categories: int = 0, deleted: int = 0):
+    """Account for one ingest batch: new (or deleted) cutoffs, and references created along the way"""
+    colleges = colleges or {}
+    cutoffs = inserted - deleted
+    adjust_totals(
+        {
+            'total_cutoffs': cutoffs,
+            'total_colleges': sum(colleges.values()),
+            'total_branches': branches,
+            'total_categories': categories,
+        },
+        last_ingest_at=timezone.now(),
+    )
+    if cutoffs or colleges:
+        _adjust_breakdowns(year_obj, round_obj, cutoffs=cutoffs, cities=colleges)
+
+
+def record_pyqs(delta: int):
+    adjust_totals({'total_pyqs': delta})
+
+
+def record_cutoff_added(cutoff: Cutoff):
+    adjust_totals({'total_cutoffs': 1})
+    _adjust_breakdowns(cutoff.year, cutoff.round, cutoffs=1)
+
+
+def recompute_on_commit(using=None):
+    """Recompute once the transaction commits; repeat calls before then share that one recompute"""
+    connection = transaction.get_connection(using)
+    pending = getattr(connection, '_cutoff_stats_recompute', None)
+    # A rollback drops the callback without running it, so only trust one still queued
+    if pending is not None and any(entry[1] is pending for entry in connection.run_on_commit):
+        return
+
+    def run():
+        connection._cutoff_stats_recompute = None
+        recompute()
+
+    connection._cutoff_stats_recompute = run
+    transaction.on_commit(run, using=using)
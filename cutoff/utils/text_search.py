@@ -0,0 +1,144 @@
+import heapq
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from ..models import College, Branch, Cutoff
+from .data_version import current_version
+
+
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text: str) -> str:
+    return _NON_ALNUM_RE.sub(' ', text.lower()).strip()
+
+
+def _words(text: str) -> List[str]:
+    """Words of normalised ``text`` plus runs of initials joined up ("r v college" also gives "rv")"""
+    words = text.split()
+    extra, run = [], []
+    for word in words + ['']:
+        if len(word) == 1:
+            run.append(word)
+            continue
+        if len(run) > 1:
+            extra.append(''.join(run))
+        run = []
+    return words + extra
+
+
+def trigrams(text: str) -> set:
+    """Trigrams of every word, padded so short words and word starts still match"""
+    grams = set()
+    for word in _words(text):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class SearchIndex:
+    """In-memory trigram index over college names/cities/codes and branch names/codes.
+
+    Each distinct normalised text is indexed once ("key") and maps to the
+    results it stands for, so a branch offered by 200 colleges is scored
+    once (one result per college that has cutoffs for it). Scores are the share of the query's trigrams found in the text
+    (with trigram similarity as a tie-breaker) plus a bonus when every query
+    word is a prefix of a word in the text, which is what typeahead needs.
+    """
+
+    KINDS = ('college', 'branch')
+
+    # Share of the query's trigrams a text must contain to be a result
+    MIN_COVERAGE = 0.4
+
+    def __init__(self, version: str = '0'):
+        self.version = version
+        self.keys: List[Tuple[str, str, int]] = []         # (kind, normalised text, trigram count)
+        self.entries: List[List[Dict]] = []                # key index -> results
+        self.postings: Dict[str, List[int]] = {}           # trigram -> key indexes
+
+    @classmethod
+    def build(cls, version: str = '0') -> 'SearchIndex':
+        index = cls(version)
+        key_ids: Dict[Tuple[str, str], int] = {}
+
+        def add(kind, text, entry):
+            key = (kind, normalize(text))
+            if not key[1]:
+                return
+            idx = key_ids.get(key)
+            if idx is None:
+                idx = key_ids[key] = len(index.keys)
+                grams = trigrams(key[1])
+                index.keys.append((kind, key[1], len(grams)))
+                index.entries.append([])
+                for gram in grams:
+                    index.postings.setdefault(gram, []).append(idx)
+            index.entries[idx].append(entry)
+
+        colleges = {}
+        for pk, code, name, city in College.objects.order_by('name', 'code').values_list('id', 'code', 'name', 'city'):
+            colleges[pk] = name
+            add('college', f'{name} {city} {code}', {'type': 'college', 'id': pk, 'code': code, 'name': name, 'city': city})
+        offered = {}
+        for college_id, branch_id in Cutoff.objects.order_by().values_list('college_id', 'branch_id').distinct():
+            offered.setdefault(branch_id, []).append(college_id)
+        for pk, name, code in Branch.objects.order_by('name').values_list('id', 'name', 'code'):
+            for college_id in sorted(offered.get(pk, ()), key=lambda c: colleges.get(c, '')):
+                add('branch', f'{name} {code}', {
+                    'type': 'branch', 'id': pk, 'name': name, 'code': code,
+                    'college_id': college_id, 'college': colleges.get(college_id, ''),
+                })
+        return index
+
+    def search(self, query: str, kind: Optional[str] = None, limit: int = 10) -> List[Dict]:
+        text = normalize(query)
+        if not text:
+            return []
+        grams = trigrams(text)
+        hits = Counter()
+        for gram in grams:
+            hits.update(self.postings.get(gram, ()))
+
+        words = text.split()
+        scored = []
+        for idx, shared in hits.items():
+            coverage = shared / len(grams)
+            if coverage < self.MIN_COVERAGE:
+                continue
+            key_kind, key_text, key_grams = self.keys[idx]
+            if kind and key_kind != kind:
+                continue
+            # Coverage of the query first; similarity breaks ties in favour of shorter texts
+            score = coverage + 0.25 * shared / (len(grams) + key_grams - shared)
+            key_words = _words(key_text)
+            if all(any(w.startswith(q) for w in key_words) for q in words):
+                score += 1.0
+            scored.append((score, idx))
+
+        results = []
+        for score, idx in heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1])):
+            for entry in self.entries[idx]:
+                results.append({**entry, 'score': round(score, 4)})
+                if len(results) >= limit:
+                    return results
+        return results
+
+
+_lock = threading.Lock()
+_index: Optional[SearchIndex] = None
+
+
+def get_search_index() -> SearchIndex:
+    """The process-wide index, rebuilt whenever the data version moves on"""
+    global _index
+    version = current_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = SearchIndex.build(version)
+        return _index
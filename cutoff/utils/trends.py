@@ -0,0 +1,86 @@
+from statistics import median
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+
+from ..models import BranchTrend, Cutoff, Year, Round
+
+
+def aggregate(rows: Iterable[Tuple[int, int, int, int]]) -> Dict[Tuple[int, int], Dict]:
+    """Group ``(branch_id, category_id, college_id, closing_rank)`` rows into trend figures"""
+    ranks: Dict[Tuple[int, int], List[int]] = {}
+    colleges: Dict[Tuple[int, int], set] = {}
+    for branch_id, category_id, college_id, rank in rows:
+        key = (branch_id, category_id)
+        ranks.setdefault(key, []).append(rank)
+        colleges.setdefault(key, set()).add(college_id)
+    return {
+        key: {
+            'colleges': len(colleges[key]),
+            'min_rank': min(values),
+            'median_rank': float(median(values)),
+            'max_rank': max(values),
+        }
+        for key, values in ranks.items()
+    }
+
+
+def refresh_trends(year_obj, round_obj) -> int:
+    """Recompute the ``BranchTrend`` rows of one year/round; returns how many were written"""
+    rows = Cutoff.objects.filter(
+        year=year_obj, round=round_obj, closing_rank__isnull=False
+    ).order_by().values_list('branch_id', 'category_id', 'college_id', 'closing_rank')
+    figures = aggregate(rows.iterator(chunk_size=5000))
+    with transaction.atomic():
+        BranchTrend.objects.filter(year=year_obj, round=round_obj).delete()
+        BranchTrend.objects.bulk_create(
+            [
+                BranchTrend(branch_id=branch_id, category_id=category_id, year=year_obj, round=round_obj, **values)
+                for (branch_id, category_id), values in figures.items()
+            ],
+            batch_size=2000,
+        )
+    return len(figures)
+
+
+def refresh_all_trends() -> int:
+    """Rebuild the aggregates of every year/round that has cutoffs"""
+    pairs = set(Cutoff.objects.order_by().values_list('year_id', 'round_id').distinct())
+    BranchTrend.objects.all().delete()
+    years = Year.objects.in_bulk({y for y, _ in pairs})
+    rounds = Round.objects.in_bulk({r for _, r in pairs})
+    return sum(refresh_trends(years[y], rounds[r]) for y, r in pairs)
+
+
+def refresh_trends_on_commit(year_obj, round_obj, using=None):
+    transaction.on_commit(lambda: refresh_trends(year_obj, round_obj), using=using)
+
+
+def cutoff_series(college_id: int, branch_id: int, category_id: int) -> List[Dict]:
+    """Every year/round of one college/branch/category, oldest first (an index lookup, no aggregation)"""
+    rows = Cutoff.objects.filter(
+        college_id=college_id, branch_id=branch_id, category_id=category_id
+    ).order_by('year__year', 'round__round_number').values_list(
+        'year__year', 'round__name', 'round__round_number', 'cutoff_rank', 'closing_rank'
+    )
+    return [
+        {'year': year, 'round': name, 'round_number': number, 'cutoff_rank': cutoff_rank, 'closing_rank': closing_rank}
+        for year, name, number, cutoff_rank, closing_rank in rows
+    ]
+
+
+def branch_trend(branch_id: int, category_id: int, round_number: Optional[int] = None) -> List[Dict]:
+    """Min/median/max closing rank of a branch across colleges, per year/round, oldest first"""
+    trends = BranchTrend.objects.filter(branch_id=branch_id, category_id=category_id)
+    if round_number is not None:
+        trends = trends.filter(round__round_number=round_number)
+    rows = trends.order_by('year__year', 'round__round_number').values_list(
+        'year__year', 'round__name', 'round__round_number', 'colleges', 'min_rank', 'median_rank', 'max_rank'
+    )
+    return [
+        {
+            'year': year, 'round': name, 'round_number': number, 'colleges': colleges,
+            'min_rank': min_rank, 'median_rank': median_rank, 'max_rank': max_rank,
+        }
+        for year, name, number, colleges, min_rank, median_rank, max_rank in rows
+    ]
@@ -0,0 +1,15 @@
+import os
+
+
+def setup_django():
+    """Process pool initializer that sets Django up in the worker
+
+    Workers started with ``spawn`` (the default on Windows and macOS) begin
+    with a fresh interpreter, so anything that imports models would fail
+    with ``AppRegistryNotReady``. This module imports nothing from the app,
+    so the initializer itself can be unpickled before setup.
+    """
+    import django
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kcet_project.settings')
+    django.setup()
@@ -2,14 +2,27 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
-from django.http import JsonResponse, FileResponse
-from django.views.decorators.http import require_http_methods
-from django.db.models import Q
+from django.http import JsonResponse, FileResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_http_methods
+from functools import wraps
 import json
+import tempfile
 
-from .models import College, Branch, Category, Year, Round, Cutoff, PYQ, CutoffUploadLog
+from .models import College, Branch, Year, Round, Cutoff, PYQ, CutoffUploadLog
 from .forms import PDFUploadForm, PYQUploadForm
-from .utils.pdf_parser import PDFParser, save_cutoff_data
+from .utils.branches import find_branch
+from .utils.colleges import college_id_from
+from .utils.data_version import current_version
+from .utils.dropdowns import get_maps
+from .utils.export import FORMATS, WRITERS, export_rows, iter_csv
+from .utils.jobs import enqueue_upload, job_progress
+from .utils.predictor import get_index
+from .utils.reference_cache import reference_data
+from .utils.stats import get_stats
+from .utils.text_search import SearchIndex, get_search_index
+from .utils.trends import branch_trend, cutoff_series
+from .utils.search import InvalidSearch, parse_filters, parse_page_size, search_page
 
 
 # ============= Index/Root View =============
@@ -78,12 +91,16 @@ def is_staff_user(user):
 @login_required(login_url='cutoff:login')
 def dashboard(request):
     """Dashboard home page"""
+    stats = get_stats()
     context = {
-        'total_colleges': College.objects.count(),
-        'total_branches': Branch.objects.count(),
-        'total_categories': Category.objects.count(),
-        'total_cutoffs': Cutoff.objects.count(),
-        'total_pyqs': PYQ.objects.count(),
+        'total_colleges': stats.total_colleges,
+        'total_branches': stats.total_branches,
+        'total_categories': stats.total_categories,
+        'total_cutoffs': stats.total_cutoffs,
+        'total_pyqs': stats.total_pyqs,
+        'cutoffs_by_year_round': stats.cutoffs_by_year_round,
+        'colleges_by_city': sorted(stats.colleges_by_city.items(), key=lambda item: (-item[1], item[0])),
+        'last_ingest_at': stats.last_ingest_at,
     }
     return render(request, 'dashboard.html', context)
 
@@ -95,9 +112,10 @@ def dashboard(request):
 def upload_pdf(request):
     """Admin page for uploading and processing cutoff PDFs"""
     
+    reference = reference_data()
     context = {
-        'years': Year.objects.all().order_by('-year'),
-        'rounds': Round.objects.all().order_by('round_number'),
+        'years': reference['years'],
+        'rounds': reference['rounds'],
         'recent_uploads': CutoffUploadLog.objects.all()[:10]
     }
 
@@ -122,59 +140,33 @@ def upload_pdf(request):
                 context['form'] = form
                 return render(request, 'upload_pdf.html', context)
 
-            # Parse PDF
-            parser = PDFParser(pdf_file)
-            success, parse_result = parser.parse()
-
-            if not success:
-                log = CutoffUploadLog.objects.create(
-                    uploaded_file=pdf_file,
-                    status='failed',
-                    error_message='; '.join(parse_result['errors']),
-                    uploaded_by=request.user,
-                    total_rows=0
-                )
-                context['error'] = f'PDF parsing failed: {"; ".join(parse_result["errors"])}'
-                context['form'] = form
-                context['recent_uploads'] = CutoffUploadLog.objects.all()[:10]
-                return render(request, 'upload_pdf.html', context)
-
-            # Save to database
-            extracted_data = parse_result.get('extracted_data', [])
-            colleges_found = parse_result.get('colleges_found', [])
-
-            inserted_count, updated_count, errors = save_cutoff_data(
-                extracted_data,
-                year_obj,
-                round_obj
+            # Queue the PDF for the background worker
+            log = enqueue_upload(
+                pdf_file, year_obj, round_obj, request.user,
+                mode=form.cleaned_data['mode'] or 'upsert',
+                delete_missing=form.cleaned_data['delete_missing'],
             )
 
-            # Create log entry
-            status = 'success' if not errors else 'partial'
-            log = CutoffUploadLog.objects.create(
-                uploaded_file=pdf_file,
-                status=status,
-                total_rows=len(extracted_data),
-                inserted_count=inserted_count,
-                updated_count=updated_count,
-                error_message='; '.join(errors) if errors else '',
-                uploaded_by=request.user
-            )
+            if request.headers.get('Accept', '').startswith('application/json'):
+                return JsonResponse(job_progress(log), status=202)
 
             context['success'] = True
-            colleges_str = ', '.join(colleges_found) if colleges_found else 'Unknown'
+            if log.status == 'skipped':
+                context['message'] = f'''
+                    PDF skipped (Upload #{log.id}): {log.error_message}.
+                    - Year: {year_obj.year}
+                    - Round: {round_obj.name}
+                '''
+                context['form'] = PDFUploadForm()
+                context['recent_uploads'] = CutoffUploadLog.objects.all()[:10]
+                return render(request, 'upload_pdf.html', context)
+
             context['message'] = f'''
-                PDF processed successfully!
-                - Rows extracted: {len(extracted_data)}
-                - New cutoffs inserted: {inserted_count}
-                - Existing cutoffs updated: {updated_count}
-                - Colleges found: {colleges_str}
+                PDF queued for processing (Upload #{log.id}).
                 - Year: {year_obj.year}
                 - Round: {round_obj.name}
+                Progress is shown under Recent Uploads.
             '''
-            if errors:
-                context['warnings'] = errors
-            
             context['form'] = PDFUploadForm()
             context['recent_uploads'] = CutoffUploadLog.objects.all()[:10]
             return render(request, 'upload_pdf.html', context)
@@ -187,89 +179,255 @@ def upload_pdf(request):
     return render(request, 'upload_pdf.html', context)
 
 
+@login_required(login_url='cutoff:login')
+@user_passes_test(is_staff_user)
+@require_http_methods(["GET"])
+def api_upload_status(request, log_id):
+    """Progress of a queued/running PDF upload"""
+    log = get_object_or_404(CutoffUploadLog, id=log_id)
+    return JsonResponse(job_progress(log))
+
+
 # ============= Cutoff Search =============
 
 @login_required(login_url='cutoff:login')
 def cutoff_search(request):
     """Cutoff search page with dynamic filters"""
+    reference = reference_data()
     context = {
-        'colleges': College.objects.all().order_by('name'),
-        'categories': Category.objects.all().order_by('code'),
-        'years': Year.objects.all().order_by('-year'),
-        'rounds': Round.objects.all().order_by('round_number'),
+        'colleges': reference['colleges'],
+        'categories': reference['categories'],
+        'years': reference['years'],
+        'rounds': reference['rounds'],
     }
 
-    # Handle search
-    if request.method == 'POST' or request.GET:
-        college_id = request.POST.get('college_id') or request.GET.get('college_id')
-        branch_id = request.POST.get('branch_id') or request.GET.get('branch_id')
-        category_id = request.POST.get('category_id') or request.GET.get('category_id')
-        year_id = request.POST.get('year_id') or request.GET.get('year_id')
-        round_id = request.POST.get('round_id') or request.GET.get('round_id')
-
-        # Build filter query
+    # Handle search: one keyset page at a time, so a broad filter stays cheap
+    params = request.POST if request.method == 'POST' else request.GET
+    try:
+        filters = parse_filters(params)
+    except InvalidSearch:
         filters = {}
-        if college_id:
-            filters['college_id'] = college_id
-        if branch_id:
-            filters['branch_id'] = branch_id
-        if category_id:
-            filters['category_id'] = category_id
-        if year_id:
-            filters['year_id'] = year_id
-        if round_id:
-            filters['round_id'] = round_id
-
-        if filters:
-            results = Cutoff.objects.filter(**filters).select_related(
-                'college', 'branch', 'category', 'year', 'round'
-            )
-            context['results'] = results
-            context['selected_filters'] = {
-                'college': college_id,
-                'branch': branch_id,
-                'category': category_id,
-                'year': year_id,
-                'round': round_id
-            }
+
+    if filters:
+        cursor = params.get('cursor') or None
+        try:
+            results, next_cursor = search_page(filters, cursor)
+        except InvalidSearch:
+            results, next_cursor = search_page(filters)
+            cursor = None
+        query = params.copy()
+        query.pop('cursor', None)
+        query.pop('csrfmiddlewaretoken', None)
+        context['results'] = results
+        context['next_cursor'] = next_cursor
+        context['is_first_page'] = not cursor
+        context['search_query'] = query.urlencode()
+        context['selected_filters'] = {
+            'college': filters.get('college_id'),
+            'branch': filters.get('branch_id'),
+            'category': filters.get('category_id'),
+            'year': filters.get('year_id'),
+            'round': filters.get('round_id'),
+        }
 
     return render(request, 'cutoff_search.html', context)
 
 
+@login_required(login_url='cutoff:login')
+@require_http_methods(["GET"])
+def export_cutoffs(request):
+    """Download cutoffs matching the search filters as CSV, XLSX or Parquet"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in FORMATS:
+        return JsonResponse({'error': f'format must be one of {", ".join(FORMATS)}'}, status=400)
+    try:
+        filters = parse_filters(request.GET)
+    except InvalidSearch as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    content_type, extension = FORMATS[export_format]
+    filename = f'cutoffs.{extension}'
+    rows = export_rows(filters)
+
+    if export_format == 'csv':
+        response = StreamingHttpResponse(iter_csv(rows), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    # XLSX and Parquet need a seekable file; build it on disk, not in memory
+    output = tempfile.TemporaryFile()
+    try:
+        WRITERS[export_format](rows, output)
+    except ImportError as e:
+        output.close()
+        return JsonResponse({'error': f'{export_format} export is not available: {e}'}, status=501)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=content_type)
+
+
 # ============= API Endpoints for Dynamic Dropdowns =============
 
+def data_version_etag(request, *args, **kwargs):
+    return current_version()
+
+
+def revalidate(view):
+    """Tag dropdown responses with the data version ETag; caches may keep them but must check it before reuse
+
+    Only successful responses are tagged, so an error is never served as a 304.
+    """
+    view = condition(etag_func=data_version_etag)(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            patch_cache_control(response, public=True, no_cache=True)
+        elif response.has_header('ETag'):
+            del response['ETag']
+        return response
+    return wrapper
+
+
 @login_required(login_url='cutoff:login')
 @require_http_methods(["GET"])
+@revalidate
 def api_get_branches(request):
-    """Get branches for a specific college"""
-    college_id = request.GET.get('college_id')
-    
-    if not college_id:
-        return JsonResponse({'error': 'college_id required'}, status=400)
-
-    branches = Branch.objects.filter(
-        college_id=college_id
-    ).values('id', 'name').order_by('name')
+    """Get branches for a specific college (by ``college_id`` or ``college_code``)"""
+    try:
+        college_id = college_id_from(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if college_id is None:
+        return JsonResponse({'error': 'college_id or college_code required'}, status=400)
+
+    branches = get_maps().branches_for(college_id)
     
-    return JsonResponse({'branches': list(branches)})
+    return JsonResponse({'branches': branches})
 
 
 @login_required(login_url='cutoff:login')
 @require_http_methods(["GET"])
+@revalidate
 def api_get_categories(request):
     """Get categories for selected filters"""
-    college_id = request.GET.get('college_id')
-    branch_id = request.GET.get('branch_id')
+    try:
+        college_id = college_id_from(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    try:
+        branch_id = int(request.GET['branch_id']) if request.GET.get('branch_id') else None
+    except ValueError:
+        return JsonResponse({'error': 'branch_id must be an integer'}, status=400)
+
+    categories = get_maps().categories_for(college_id, branch_id)
+    
+    return JsonResponse({'categories': categories})
 
-    query = Q()
-    if college_id:
-        query &= Q(cutoffs__college_id=college_id)
-    if branch_id:
-        query &= Q(cutoffs__branch_id=branch_id)
 
-    categories = Category.objects.filter(query).distinct().values('id', 'code', 'description').order_by('code')
-    
-    return JsonResponse({'categories': list(categories)})
+@login_required(login_url='cutoff:login')
+@require_http_methods(["GET"])
+def api_search_cutoffs(request):
+    """Cutoffs matching id filters, one keyset page at a time"""
+    try:
+        filters = parse_filters(request.GET)
+        page_size = parse_page_size(request.GET.get('page_size'))
+        results, next_cursor = search_page(filters, request.GET.get('cursor') or None, page_size)
+    except InvalidSearch as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'results': results, 'next_cursor': next_cursor, 'page_size': page_size})
+
+
+@login_required(login_url='cutoff:login')
+@require_http_methods(["GET"])
+def api_search(request):
+    """Fuzzy typeahead over college names/cities and branch names"""
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('type') or None
+    if kind is not None and kind not in SearchIndex.KINDS:
+        return JsonResponse({'error': f'type must be one of {", ".join(SearchIndex.KINDS)}'}, status=400)
+    try:
+        limit = min(int(request.GET.get('limit') or 10), 50)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+
+    results = get_search_index().search(query, kind=kind, limit=max(limit, 1)) if query else []
+    return JsonResponse({'q': query, 'results': results})
+
+
+@login_required(login_url='cutoff:login')
+@require_http_methods(["GET"])
+def api_predict(request):
+    """College/branch pairs reachable with a rank, sorted by closing rank"""
+    def optional_int(name):
+        value = request.GET.get(name)
+        return int(value) if value else None
+
+    try:
+        rank = int(request.GET.get('rank', ''))
+        category_id = optional_int('category_id')
+        year_id = optional_int('year_id')
+        round_id = optional_int('round_id')
+        limit = min(optional_int('limit') or 100, 1000)
+    except ValueError:
+        return JsonResponse({'error': 'rank, category_id, year_id, round_id and limit must be integers'}, status=400)
+
+    index = get_index()
+    if category_id is None:
+        category_id = index.category_ids.get(request.GET.get('category', '').strip().upper())
+        if category_id is None:
+            return JsonResponse({'error': 'category_id or a valid category code required'}, status=400)
+
+    results = index.eligible(
+        rank, category_id, year_id=year_id, round_id=round_id,
+        city=request.GET.get('city'), limit=max(limit, 1),
+    )
+    return JsonResponse({'rank': rank, 'category_id': category_id, 'count': len(results), 'results': results})
+
+
+@login_required(login_url='cutoff:login')
+@require_http_methods(["GET"])
+def api_cutoff_trend(request):
+    """Closing rank of one college/branch/category across every year and round"""
+    try:
+        college_id = int(request.GET.get('college_id', ''))
+        branch_id = int(request.GET.get('branch_id', ''))
+        category_id = int(request.GET.get('category_id', ''))
+    except ValueError:
+        return JsonResponse({'error': 'college_id, branch_id and category_id required'}, status=400)
+
+    return JsonResponse({
+        'college_id': college_id,
+        'branch_id': branch_id,
+        'category_id': category_id,
+        'series': cutoff_series(college_id, branch_id, category_id),
+    })
+
+
+@login_required(login_url='cutoff:login')
+@require_http_methods(["GET"])
+def api_branch_trend(request):
+    """Min/median/max closing rank of a branch across colleges, per year and round"""
+    branch_name = request.GET.get('branch', '').strip()
+    try:
+        category_id = int(request.GET.get('category_id', ''))
+        round_number = int(request.GET['round_number']) if request.GET.get('round_number') else None
+        branch_id = int(request.GET['branch_id']) if request.GET.get('branch_id') else None
+        branch = Branch.objects.get(id=branch_id) if branch_id is not None else None
+    except (ValueError, Branch.DoesNotExist):
+        return JsonResponse({'error': 'category_id and a valid branch or branch_id required'}, status=400)
+    if branch is None and not branch_name:
+        return JsonResponse({'error': 'branch or branch_id required'}, status=400)
+    if branch is None:
+        # "Civil" or "Computers" as printed in the PDFs finds the catalogue branch
+        branch = find_branch(branch_name)
+
+    return JsonResponse({
+        'branch': branch.name if branch else branch_name,
+        'branch_id': branch.id if branch else None,
+        'category_id': category_id,
+        'trend': branch_trend(branch.id, category_id, round_number) if branch else [],
+    })
 
 
 # ============= PYQ Management =============
@@ -281,7 +439,7 @@ def pyq_list(request):
     subject_query = request.GET.get('subject', '').strip()
 
     context = {
-        'years': Year.objects.all().order_by('-year'),
+        'years': reference_data()['years'],
         'subjects': PYQ.objects.values_list('subject', flat=True).distinct().order_by('subject'),
     }
 
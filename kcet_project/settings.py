@@ -124,6 +124,29 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Cutoff PDF parsing
+# Number of processes used to extract PDF pages (1 = serial)
+CUTOFF_PARSER_WORKERS = 1
+# 'text' (extract_text and line regexes) or 'words' (word coordinates and header columns)
+CUTOFF_PARSER_ENGINE = 'text'
+# Text engine: try pypdf first and use pdfplumber only for pages that fail its checks
+CUTOFF_PARSER_FAST_TEXT = True
+# Extracted pages cached under MEDIA_ROOT/page_cache by content-stream hash, evicted LRU past the size bound
+CUTOFF_PAGE_CACHE = True
+CUTOFF_PAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Seconds without a progress update after which a parsing/saving upload is taken to belong to a dead worker
+CUTOFF_UPLOAD_JOB_TIMEOUT = 15 * 60
+
+# Cache (reference data is cached per data version)
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'kcet-cutoff',
+    }
+}
+CUTOFF_REFERENCE_CACHE_TIMEOUT = 60 * 60 * 24
+
 # Login settings
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'